@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Almacenamiento persistente para SistemaBiblioteca.
+
+Combina dos piezas:
+- Un registro de escritura anticipada (WAL) de solo-anexar en un archivo de
+  texto; cada línea es un cambio ('libro' | 'usuario' | 'prestamo' | 'reserva' | 'meta',
+  clave, registro[, {campo: [inicio, elementos nuevos]} de las listas anexables])
+  serializado en JSON.
+- Una instantánea (snapshot) periódica en SQLite con el estado completo.
+  Al tomarla, el WAL se trunca.
+
+Arranque en frío: se carga la instantánea y se reaplica solo la cola del WAL.
+"""
+
+from collections.abc import Mapping
+from contextlib import contextmanager
+from datetime import datetime
+import json
+import os
+import sqlite3
+import threading
+
+TABLAS = ('libro', 'usuario', 'prestamo', 'reserva', 'meta')
+# campos de lista que solo crecen: el WAL guarda solo los elementos nuevos
+LISTAS_ANEXABLES = {'usuario': ('historial',)}
+
+
+# ===========================================================================
+# SERIALIZACIÓN
+# ===========================================================================
+
+def _codificar(obj):
+    if isinstance(obj, datetime):
+        return {'__dt__': obj.isoformat()}
+    if isinstance(obj, (set, frozenset)):
+        return {'__set__': sorted(obj)}
+    if isinstance(obj, Mapping):
+        # p. ej. los registros del catálogo compacto
+        return dict(obj)
+    raise TypeError(f"Tipo no serializable: {type(obj).__name__}")
+
+
+def _decodificar(d):
+    if '__dt__' in d:
+        return datetime.fromisoformat(d['__dt__'])
+    if '__set__' in d:
+        return set(d['__set__'])
+    return d
+
+
+def serializar(registro):
+    return json.dumps(registro, default=_codificar, ensure_ascii=False, separators=(',', ':'))
+
+
+def deserializar(texto):
+    return json.loads(texto, object_hook=_decodificar)
+
+
+# ===========================================================================
+# BACKEND EN MEMORIA (por defecto, sin persistencia)
+# ===========================================================================
+
+class AlmacenamientoMemoria:
+    """Backend nulo: mantiene la misma interfaz pero no guarda nada."""
+
+    def cargar(self):
+        """Retorna {tabla: {clave: registro}} con el estado guardado."""
+        return {tabla: {} for tabla in TABLAS}
+
+    def registrar(self, tabla, clave, registro):
+        pass
+
+    def confirmar(self, sistema):
+        """Cierra una operación; retorna lo que hay que pasarle a esperar()."""
+        return None
+
+    def esperar(self, numero):
+        """Bloquea hasta que la operación confirmada sea durable."""
+        pass
+
+    @contextmanager
+    def grupo(self):
+        yield
+
+    def cerrar(self):
+        pass
+
+
+# ===========================================================================
+# BACKEND SQLITE + WAL
+# ===========================================================================
+
+class AlmacenamientoSQLite(AlmacenamientoMemoria):
+    """
+    Persistencia durable con commit en grupo.
+
+    - ruta: archivo SQLite de la instantánea; el WAL vive en `ruta + '.wal'`.
+    - snapshot_cada: entradas de WAL tras las cuales se toma una instantánea.
+
+    Cada operación es durable cuando retorna: esperar() bloquea hasta que un
+    fsync cubre su entrada. Si varios hilos confirman a la vez, el primero
+    escribe y sincroniza todo lo encolado y los demás esperan ese mismo
+    fsync (o el siguiente), así que comparten el costo sin perder nada ante
+    una caída. Dentro de grupo() la espera se difiere hasta salir del bloque.
+
+    Las listas que solo crecen (LISTAS_ANEXABLES, p. ej. el historial del
+    usuario) no se reescriben en cada cambio: el WAL guarda solo los
+    elementos nuevos junto con la posición donde empiezan, y cargar() los
+    coloca en esa posición de la versión anterior. Así reaplicar una entrada
+    que la instantánea ya incluye (caída entre el commit de SQLite y el
+    truncado del WAL) no duplica elementos.
+    """
+
+    def __init__(self, ruta, snapshot_cada=10000):
+        if snapshot_cada < 1:
+            raise ValueError("snapshot_cada debe ser >= 1")
+        self.ruta = ruta
+        self.ruta_wal = ruta + '.wal'
+        self.snapshot_cada = snapshot_cada
+
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        for tabla in TABLAS:
+            self._conexion.execute(
+                f"CREATE TABLE IF NOT EXISTS {tabla} (clave TEXT PRIMARY KEY, datos TEXT NOT NULL)")
+        self._conexion.commit()
+
+        self._wal = open(self.ruta_wal, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+        self._condicion = threading.Condition(self._lock)
+        self._pendientes = []        # líneas de la operación en curso
+        self._cola = []              # líneas de operaciones confirmadas aún sin fsync
+        self._confirmadas = 0        # número de la última operación confirmada
+        self._durables = 0           # número de la última operación cubierta por un fsync
+        self._sincronizando = False  # hay un hilo escribiendo el WAL
+        self._entradas_wal = 0       # entradas desde la última instantánea
+        self._anexados = {}          # (tabla, clave, campo) -> elementos ya en el WAL
+        self._local = threading.local()
+
+    def cargar(self):
+        estado = {tabla: {} for tabla in TABLAS}
+        for tabla in TABLAS:
+            for clave, datos in self._conexion.execute(f"SELECT clave, datos FROM {tabla}"):
+                estado[tabla][clave] = deserializar(datos)
+        self._entradas_wal = 0
+        if os.path.exists(self.ruta_wal):
+            with open(self.ruta_wal, 'r', encoding='utf-8') as f:
+                for linea in f:
+                    try:
+                        tabla, clave, registro, *anexos = deserializar(linea)
+                    except ValueError:
+                        # última línea truncada por una caída: se descarta
+                        break
+                    if anexos:
+                        anterior = estado[tabla].get(clave, {})
+                        for campo, (inicio, nuevos) in anexos[0].items():
+                            registro[campo] = list(anterior.get(campo, ()))[:inicio] + nuevos
+                    estado[tabla][clave] = registro
+                    self._entradas_wal += 1
+        self._contar_anexados(estado)
+        return estado
+
+    def _contar_anexados(self, estado):
+        self._anexados = {(tabla, clave, campo): len(registro[campo])
+                          for tabla, campos in LISTAS_ANEXABLES.items()
+                          for clave, registro in estado[tabla].items()
+                          for campo in campos if campo in registro}
+
+    def registrar(self, tabla, clave, registro):
+        campos = LISTAS_ANEXABLES.get(tabla)
+        if not campos:
+            self._pendientes.append(serializar([tabla, clave, registro]) + "\n")
+            return
+        anexos = {}
+        for campo in campos:
+            lista = registro.get(campo)
+            if lista is None:
+                continue
+            ya_escritos = self._anexados.get((tabla, clave, campo), 0)
+            anexos[campo] = [ya_escritos, lista[ya_escritos:]]
+            self._anexados[(tabla, clave, campo)] = len(lista)
+        resto = {campo: valor for campo, valor in registro.items() if campo not in anexos}
+        self._pendientes.append(serializar([tabla, clave, resto, anexos]) + "\n")
+
+    def confirmar(self, sistema):
+        """
+        Cierra una operación (se llama con el lock del sistema) y retorna su
+        número para esperar(). Toma la instantánea si corresponde.
+        """
+        with self._lock:
+            self._cola.extend(self._pendientes)
+            self._pendientes = []
+            self._confirmadas += 1
+            numero = self._confirmadas
+            tomar_snapshot = self._entradas_wal + len(self._cola) >= self.snapshot_cada
+        if tomar_snapshot:
+            self.guardar_snapshot(sistema)
+        return numero
+
+    def esperar(self, numero):
+        """Bloquea hasta que la operación `numero` esté en disco (fuera de grupo())."""
+        if getattr(self._local, 'grupos', 0):
+            self._local.ultima = max(numero, getattr(self._local, 'ultima', 0))
+            return
+        with self._condicion:
+            while self._durables < numero:
+                if self._sincronizando:
+                    self._condicion.wait()
+                else:
+                    self._sincronizar()
+
+    @contextmanager
+    def grupo(self):
+        """Agrupa las operaciones de este hilo en un único fsync al salir del bloque."""
+        self._local.grupos = getattr(self._local, 'grupos', 0) + 1
+        try:
+            yield
+        finally:
+            self._local.grupos -= 1
+            if not self._local.grupos:
+                self.esperar(getattr(self._local, 'ultima', 0))
+                self._local.ultima = 0
+
+    def _sincronizar(self):
+        """
+        Escribe la cola en el WAL y hace fsync. Requiere self._lock y que
+        ningún otro hilo esté sincronizando; lo suelta durante la escritura
+        para que otras operaciones sigan encolando.
+        """
+        lineas, hasta = self._cola, self._confirmadas
+        self._cola = []
+        self._sincronizando = True
+        self._lock.release()
+        try:
+            if lineas:
+                self._wal.write(''.join(lineas))
+            self._wal.flush()
+            os.fsync(self._wal.fileno())
+        except BaseException:
+            self._lock.acquire()
+            self._cola[:0] = lineas
+            self._sincronizando = False
+            self._condicion.notify_all()
+            raise
+        self._lock.acquire()
+        self._sincronizando = False
+        self._entradas_wal += len(lineas)
+        self._durables = max(self._durables, hasta)
+        self._condicion.notify_all()
+
+    def guardar_snapshot(self, sistema):
+        """Escribe el estado completo en SQLite y trunca el WAL (con el lock del sistema)."""
+        with self._condicion:
+            while self._sincronizando:
+                self._condicion.wait()
+            self._sincronizar()
+            self._sincronizando = True
+        try:
+            estado = sistema.exportar_estado()
+            with self._conexion:
+                for tabla in TABLAS:
+                    self._conexion.execute(f"DELETE FROM {tabla}")
+                    self._conexion.executemany(
+                        f"INSERT INTO {tabla} (clave, datos) VALUES (?, ?)",
+                        ((clave, serializar(registro)) for clave, registro in estado[tabla].items()))
+            self._wal.truncate(0)
+            self._wal.seek(0)
+            with self._lock:
+                self._entradas_wal = len(self._cola)
+            self._contar_anexados(estado)
+        finally:
+            with self._condicion:
+                self._sincronizando = False
+                self._condicion.notify_all()
+
+    def cerrar(self):
+        with self._condicion:
+            while self._sincronizando:
+                self._condicion.wait()
+            self._sincronizar()
+        self._wal.close()
+        self._conexion.close()
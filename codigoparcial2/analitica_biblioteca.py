@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Analítica de préstamos para SistemaBiblioteca.
+
+AnaliticaPrestamos se suscribe a los eventos del sistema y mantiene
+agregados por periodo (día, mes y año). Una consulta sobre una ventana de
+fechas se descompone en a lo sumo unos pocos años completos, meses
+completos y días sueltos en los bordes, así que su costo no depende de
+cuántos préstamos hay en el historial.
+
+Métricas por ventana [desde, hasta] (fechas inclusive):
+- mas_prestados(): títulos, autores, categorías o ISBN más prestados
+  (por fecha de préstamo)
+- resumen(): préstamos, devoluciones, duración promedio, tasa de
+  devoluciones vencidas y total de multas (por fecha de devolución)
+"""
+
+from collections import Counter
+from datetime import date, timedelta
+
+DIMENSIONES = ('isbn', 'titulo', 'autor', 'categoria')
+
+
+def _nuevo_agregado():
+    return {
+        'prestamos': 0,
+        'por_dimension': {dimension: Counter() for dimension in DIMENSIONES},
+        'devoluciones': 0,
+        'devoluciones_vencidas': 0,
+        'segundos_prestamo': 0.0,
+        'multas': 0.0
+    }
+
+
+def _claves_periodo(dia):
+    """Claves de los tres agregados que contienen a `dia`."""
+    return (('d', dia), ('m', dia.year, dia.month), ('a', dia.year))
+
+
+def _siguiente_mes(anio, mes):
+    return (anio + 1, 1) if mes == 12 else (anio, mes + 1)
+
+
+def descomponer_ventana(desde, hasta):
+    """
+    Cubre [desde, hasta] con la menor cantidad de periodos completos:
+    días sueltos en los bordes, meses completos y años completos.
+    """
+    claves = []
+    dia = desde
+    while dia <= hasta:
+        if dia.month == 1 and dia.day == 1 and date(dia.year, 12, 31) <= hasta:
+            claves.append(('a', dia.year))
+            dia = date(dia.year + 1, 1, 1)
+            continue
+        if dia.day == 1:
+            anio, mes = _siguiente_mes(dia.year, dia.month)
+            fin_mes = date(anio, mes, 1) - timedelta(days=1)
+            if fin_mes <= hasta:
+                claves.append(('m', dia.year, dia.month))
+                dia = fin_mes + timedelta(days=1)
+                continue
+        claves.append(('d', dia))
+        dia += timedelta(days=1)
+    return claves
+
+
+class AnaliticaPrestamos:
+    """
+    Agregados de préstamos mantenidos en forma incremental.
+    - sistema: SistemaBiblioteca a observar; los préstamos ya existentes se
+      cargan una sola vez al crear el objeto.
+    """
+
+    def __init__(self, sistema):
+        self.sistema = sistema
+        self._agregados = {}
+        for id_prestamo, p in list(sistema.prestamos.items()):
+            self._registrar_prestamo(id_prestamo)
+            if p['fecha_devolucion'] is not None:
+                self._registrar_devolucion(id_prestamo)
+        sistema.suscribir(self._on_evento)
+
+    def cerrar(self):
+        """Deja de observar el sistema."""
+        self.sistema.desuscribir(self._on_evento)
+
+    def _on_evento(self, evento, id_prestamo):
+        if evento == 'prestamo':
+            self._registrar_prestamo(id_prestamo)
+        elif evento == 'devolucion':
+            self._registrar_devolucion(id_prestamo)
+
+    def _agregados_de(self, dia):
+        for clave in _claves_periodo(dia):
+            agregado = self._agregados.get(clave)
+            if agregado is None:
+                agregado = self._agregados[clave] = _nuevo_agregado()
+            yield agregado
+
+    def _registrar_prestamo(self, id_prestamo):
+        p = self.sistema.prestamos[id_prestamo]
+        libro = self.sistema.catalogo[p['isbn']]
+        valores = {'isbn': p['isbn'], 'titulo': libro['titulo'],
+                   'autor': libro['autor'], 'categoria': libro['categoria']}
+        for agregado in self._agregados_de(p['fecha_prestamo'].date()):
+            agregado['prestamos'] += 1
+            for dimension, valor in valores.items():
+                agregado['por_dimension'][dimension][valor] += 1
+
+    def _registrar_devolucion(self, id_prestamo):
+        p = self.sistema.prestamos[id_prestamo]
+        duracion = (p['fecha_devolucion'] - p['fecha_prestamo']).total_seconds()
+        vencida = p['fecha_devolucion'] > p['fecha_vencimiento']
+        for agregado in self._agregados_de(p['fecha_devolucion'].date()):
+            agregado['devoluciones'] += 1
+            agregado['devoluciones_vencidas'] += vencida
+            agregado['segundos_prestamo'] += duracion
+            agregado['multas'] += p['multa']
+
+    def _en_ventana(self, desde, hasta):
+        if hasta < desde:
+            raise ValueError("La fecha final es anterior a la inicial.")
+        for clave in descomponer_ventana(desde, hasta):
+            agregado = self._agregados.get(clave)
+            if agregado is not None:
+                yield agregado
+
+    # ---------------------------
+    # CONSULTAS
+    # ---------------------------
+
+    def mas_prestados(self, dimension='titulo', desde=None, hasta=None, n=10):
+        """
+        Retorna [(valor, cantidad)] de los n más prestados en la ventana.
+        desde/hasta son datetime.date (por defecto: hoy según el reloj del sistema).
+        """
+        if dimension not in DIMENSIONES:
+            raise ValueError(f"Dimensión inválida: {dimension}")
+        hasta = hasta or self.sistema.reloj().date()
+        desde = desde or hasta
+        total = Counter()
+        for agregado in self._en_ventana(desde, hasta):
+            total.update(agregado['por_dimension'][dimension])
+        return total.most_common(n)
+
+    def resumen(self, desde=None, hasta=None):
+        hasta = hasta or self.sistema.reloj().date()
+        desde = desde or hasta
+        prestamos = devoluciones = vencidas = 0
+        segundos = multas = 0.0
+        for agregado in self._en_ventana(desde, hasta):
+            prestamos += agregado['prestamos']
+            devoluciones += agregado['devoluciones']
+            vencidas += agregado['devoluciones_vencidas']
+            segundos += agregado['segundos_prestamo']
+            multas += agregado['multas']
+        return {
+            'desde': desde.isoformat(),
+            'hasta': hasta.isoformat(),
+            'prestamos': prestamos,
+            'devoluciones': devoluciones,
+            'duracion_promedio_dias': round(segundos / devoluciones / 86400, 2) if devoluciones else 0.0,
+            'tasa_vencidos': round(vencidas / devoluciones, 4) if devoluciones else 0.0,
+            'total_multas': round(multas, 2)
+        }
+
+
+if __name__ == "__main__":
+    from sistema_biblioteca import SistemaBiblioteca
+
+    biblioteca = SistemaBiblioteca(limite_prestamos=10)
+    biblioteca.agregar_libro("9781234567897", "Cien años de soledad", "Gabriel Garcia Marquez", 1967, "Novela", 5)
+    biblioteca.agregar_libro("9781234567898", "El Principito", "Antoine de Saint-Exupéry", 1943, "Infantil", 5)
+    biblioteca.registrar_usuario("u1", "Ana Perez", "ana@example.com")
+    analitica = AnaliticaPrestamos(biblioteca)
+
+    ids = [biblioteca.prestar_libro("9781234567897", "u1") for _ in range(3)]
+    ids.append(biblioteca.prestar_libro("9781234567898", "u1"))
+    for id_prestamo in ids[:2]:
+        biblioteca.devolver_libro(id_prestamo)
+
+    print("Más prestados (título):", analitica.mas_prestados('titulo'))
+    print("Más prestados (categoría):", analitica.mas_prestados('categoria'))
+    print("Resumen del año:", analitica.resumen(date(date.today().year, 1, 1), date.today()))
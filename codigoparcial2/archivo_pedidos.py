@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Archivo en disco de pedidos pagados para SistemaRestaurante.
+
+SistemaRestaurante.conectar_archivo(ArchivoPedidos(directorio)) hace que
+los pedidos pagados salgan de `pedidos` (y sus ventas de `ventas`) y se
+guarden aquí en segmentos: la memoria queda proporcional a los pedidos
+abiertos. Los reportes no se pierden porque usan los totales acumulados
+(ventas_por_dia, ingresos por categoría, ranking).
+
+Cada llamada a guardar() escribe un segmento nuevo, ordenado por número
+de pedido, con un pedido por línea (JSON compacto). Junto a cada segmento
+se guarda su índice disperso: el número y la posición en bytes de uno de
+cada `cada` pedidos. buscar() descarta los segmentos por rango de números,
+hace bisect en el índice y lee como mucho `cada` líneas.
+
+Con `max_segmentos` los segmentos rotan: se borran los más antiguos.
+"""
+
+from bisect import bisect_right
+from datetime import datetime
+import glob
+import json
+import os
+
+PREFIJO = 'pedidos_'
+EXTENSION = '.seg'
+
+
+def numero_pedido(id_pedido):
+    """'P00042' -> 42 (los ids se generan en orden creciente)."""
+    return int(id_pedido[1:])
+
+
+# ===========================================================================
+# CODIFICACIÓN DE UN PEDIDO
+# ===========================================================================
+
+def _codificar(id_pedido, pedido):
+    lineas = [[codigo, cantidad, pedido['lineas'][codigo]['precio'], pedido['lineas'][codigo]['categoria']]
+              for codigo, cantidad in pedido['items'].items()]
+    return json.dumps([id_pedido, pedido['numero_mesa'], pedido['fecha'].isoformat(),
+                       pedido['fecha_pago'].isoformat(), pedido['subtotal'], pedido['impuesto'],
+                       pedido['propina'], pedido['total'], lineas],
+                      ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+def _decodificar(linea):
+    id_pedido, mesa, fecha, fecha_pago, subtotal, impuesto, propina, total, lineas = json.loads(linea)
+    pedido = {
+        'numero_mesa': mesa,
+        'items': {codigo: cantidad for codigo, cantidad, _, _ in lineas},
+        'lineas': {codigo: {'precio': precio, 'categoria': categoria} for codigo, _, precio, categoria in lineas},
+        'acumulado': subtotal,
+        'estado': 'pagado',
+        'fecha': datetime.fromisoformat(fecha),
+        'fecha_pago': datetime.fromisoformat(fecha_pago),
+        'subtotal': subtotal,
+        'impuesto': impuesto,
+        'propina': propina,
+        'total': total,
+        'pagado': True
+    }
+    return id_pedido, pedido
+
+
+# ===========================================================================
+# ARCHIVO DE SEGMENTOS
+# ===========================================================================
+
+class ArchivoPedidos:
+    """
+    Segmentos de pedidos pagados en `directorio`.
+    - pedidos_por_segmento: cuántos pedidos pagados se acumulan en memoria
+      antes de que SistemaRestaurante escriba un segmento
+    - cada: un pedido de cada `cada` entra en el índice disperso
+    - max_segmentos: si se indica, se conservan solo los más recientes
+    """
+
+    def __init__(self, directorio, pedidos_por_segmento=10000, cada=64, max_segmentos=None):
+        self.directorio = directorio
+        self.pedidos_por_segmento = int(pedidos_por_segmento)
+        self.cada = int(cada)
+        self.max_segmentos = max_segmentos
+        os.makedirs(directorio, exist_ok=True)
+        # [{'ruta', 'minimo', 'maximo', 'cantidad', 'cada', 'claves', 'posiciones'}] del más antiguo al más nuevo
+        self.segmentos = []
+        for ruta in sorted(glob.glob(os.path.join(directorio, PREFIJO + '*' + EXTENSION))):
+            indice = ruta[:-len(EXTENSION)] + '.idx'
+            if os.path.exists(indice):
+                with open(indice, 'r', encoding='utf-8') as f:
+                    self.segmentos.append(dict(json.load(f), ruta=ruta))
+        self._siguiente = 1 + max((int(os.path.basename(s['ruta'])[len(PREFIJO):-len(EXTENSION)])
+                                   for s in self.segmentos), default=0)
+
+    def __len__(self):
+        return sum(s['cantidad'] for s in self.segmentos)
+
+    def guardar(self, pedidos):
+        """Escribe [(id_pedido, pedido)] pagados en un segmento nuevo."""
+        if not pedidos:
+            return None
+        pedidos = sorted(pedidos, key=lambda par: numero_pedido(par[0]))
+        ruta = os.path.join(self.directorio, f"{PREFIJO}{self._siguiente:06d}{EXTENSION}")
+        self._siguiente += 1
+        claves = []
+        posiciones = []
+        posicion = 0
+        with open(ruta, 'wb') as f:
+            for k, (id_pedido, pedido) in enumerate(pedidos):
+                if k % self.cada == 0:
+                    claves.append(numero_pedido(id_pedido))
+                    posiciones.append(posicion)
+                datos = _codificar(id_pedido, pedido)
+                f.write(datos)
+                posicion += len(datos)
+        segmento = {'minimo': numero_pedido(pedidos[0][0]), 'maximo': numero_pedido(pedidos[-1][0]),
+                    'cantidad': len(pedidos), 'cada': self.cada, 'claves': claves, 'posiciones': posiciones}
+        # el índice se escribe después de los datos: un segmento sin índice no se carga
+        with open(ruta[:-len(EXTENSION)] + '.idx', 'w', encoding='utf-8') as f:
+            json.dump(segmento, f, separators=(',', ':'))
+        segmento['ruta'] = ruta
+        self.segmentos.append(segmento)
+        self._rotar()
+        return ruta
+
+    def _rotar(self):
+        if self.max_segmentos is None:
+            return
+        while len(self.segmentos) > self.max_segmentos:
+            ruta = self.segmentos.pop(0)['ruta']
+            os.remove(ruta[:-len(EXTENSION)] + '.idx')
+            os.remove(ruta)
+
+    def buscar(self, id_pedido):
+        """Retorna el pedido archivado o None."""
+        numero = numero_pedido(id_pedido)
+        for segmento in reversed(self.segmentos):
+            if not segmento['minimo'] <= numero <= segmento['maximo']:
+                continue
+            bloque = bisect_right(segmento['claves'], numero) - 1
+            with open(segmento['ruta'], 'rb') as f:
+                f.seek(segmento['posiciones'][bloque])
+                for _ in range(segmento['cada']):
+                    linea = f.readline()
+                    if not linea:
+                        break
+                    id_leido, pedido = _decodificar(linea)
+                    if id_leido == id_pedido:
+                        return pedido
+                    if numero_pedido(id_leido) > numero:
+                        break
+        return None
+
+    def recorrer(self):
+        """Itera (id_pedido, pedido) de todos los segmentos, del más antiguo al más nuevo."""
+        for segmento in list(self.segmentos):
+            with open(segmento['ruta'], 'rb') as f:
+                for linea in f:
+                    yield _decodificar(linea)
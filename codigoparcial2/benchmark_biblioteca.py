@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Benchmarks del sistema de biblioteca (en proceso, sin persistencia).
+
+Uso: python benchmark_biblioteca.py
+"""
+
+import os
+import random
+import time
+import tracemalloc
+
+from catalogo_compacto import CatalogoCompacto
+from red_bibliotecas import RedBibliotecas
+from sistema_biblioteca import SistemaBiblioteca
+
+
+def _isbn(i):
+    return f"978{i:010d}"
+
+
+def _sistema_con_datos(num_libros, num_usuarios, copias=10, limite_prestamos=1000):
+    sistema = SistemaBiblioteca(limite_prestamos=limite_prestamos)
+    for i in range(num_libros):
+        sistema.agregar_libro(_isbn(i), f"Libro {i}", f"Autor {i % 500}", 2000, "General", copias)
+    for i in range(num_usuarios):
+        sistema.registrar_usuario(f"u{i}", f"Usuario {i}", f"u{i}@example.com")
+    return sistema
+
+
+# ===========================================================================
+# PRÉSTAMOS Y DEVOLUCIONES EN LOTE
+# ===========================================================================
+
+def benchmark_lotes(num_operaciones=100000, tamanio_lote=1000):
+    """Compara prestar_libro/devolver_libro individuales contra los lotes."""
+    num_libros = num_operaciones // 10
+    operaciones = [(_isbn(i % num_libros), f"u{i % 1000}") for i in range(num_operaciones)]
+
+    sistema = _sistema_con_datos(num_libros, 1000, limite_prestamos=num_operaciones)
+    inicio = time.perf_counter()
+    ids = [sistema.prestar_libro(isbn, id_usuario) for isbn, id_usuario in operaciones]
+    t_prestar = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    for id_prestamo in ids:
+        sistema.devolver_libro(id_prestamo)
+    t_devolver = time.perf_counter() - inicio
+
+    sistema = _sistema_con_datos(num_libros, 1000, limite_prestamos=num_operaciones)
+    inicio = time.perf_counter()
+    ids = []
+    for k in range(0, num_operaciones, tamanio_lote):
+        ids.extend(sistema.prestar_lote(operaciones[k:k + tamanio_lote]))
+    t_prestar_lote = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    for k in range(0, num_operaciones, tamanio_lote):
+        sistema.devolver_lote(ids[k:k + tamanio_lote])
+    t_devolver_lote = time.perf_counter() - inicio
+
+    print(f"--- Lotes ({num_operaciones} operaciones, lotes de {tamanio_lote}) ---")
+    for nombre, t in (("prestar_libro", t_prestar), ("devolver_libro", t_devolver),
+                      ("prestar_lote", t_prestar_lote), ("devolver_lote", t_devolver_lote)):
+        print(f"  {nombre:<15} {num_operaciones / t:>12,.0f} ops/s")
+
+
+# ===========================================================================
+# MEMORIA DEL CATÁLOGO
+# ===========================================================================
+
+def _registro(i):
+    return {
+        'titulo': f"Libro número {i}",
+        'autor': f"Autor {i % 5000}",
+        'anio': 1900 + i % 120,
+        'categoria': f"Categoría {i % 40}",
+        'copias_total': 3,
+        'copias_disponibles': 3,
+        'prestamos': 0
+    }
+
+
+def _bytes_por_libro(crear_catalogo, num_libros):
+    tracemalloc.start()
+    catalogo = crear_catalogo()
+    for i in range(num_libros):
+        catalogo[_isbn(i)] = _registro(i)
+    usados, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return usados / num_libros
+
+
+def benchmark_memoria(num_libros=200000):
+    """Bytes por libro del catálogo: dict por libro contra columnas."""
+    b_dict = _bytes_por_libro(dict, num_libros)
+    b_compacto = _bytes_por_libro(CatalogoCompacto, num_libros)
+    print(f"--- Memoria del catálogo ({num_libros} libros) ---")
+    print(f"  dict por libro      {b_dict:>8.1f} bytes/libro")
+    print(f"  CatalogoCompacto    {b_compacto:>8.1f} bytes/libro ({b_dict / b_compacto:.1f}x menos)")
+
+
+# ===========================================================================
+# BÚSQUEDA CON RANKING
+# ===========================================================================
+
+def benchmark_ranking(num_libros=300000, num_consultas=50):
+    """Milisegundos por consulta de buscar_ranking con un error de tipeo por consulta."""
+    azar = random.Random(3)
+    silabas = [c + v for c in "bcdfglmnprstv" for v in "aeiou"]
+    vocabulario = ["".join(azar.choice(silabas) for _ in range(azar.randint(2, 4))) for _ in range(50000)]
+    autores = [f"{azar.choice(vocabulario).title()} {azar.choice(vocabulario).title()}" for _ in range(20000)]
+    libros = [(_isbn(i), " ".join(azar.choice(vocabulario) for _ in range(azar.randint(2, 5))),
+               azar.choice(autores), 2000, "General", 1) for i in range(num_libros)]
+    sistema = SistemaBiblioteca()
+    sistema.importar_libros(libros)
+
+    consultas = []
+    for libro in azar.sample(libros, num_consultas):
+        titulo = libro[1]
+        i = azar.randrange(len(titulo))
+        consultas.append((libro[0], f"{titulo[:i]}x{titulo[i + 1:]} {libro[2].split()[0]}"))
+    inicio = time.perf_counter()
+    aciertos = sum(any(r['isbn'] == isbn for r in sistema.buscar_ranking(consulta, n=10))
+                   for isbn, consulta in consultas)
+    ms = (time.perf_counter() - inicio) / num_consultas * 1000
+    print(f"--- Búsqueda con ranking ({num_libros} libros) ---")
+    print(f"  {ms:.1f} ms/consulta, libro buscado en el top 10: {aciertos}/{num_consultas}")
+
+
+# ===========================================================================
+# RED DE SUCURSALES EN PROCESOS
+# ===========================================================================
+
+def _prestamos_por_segundo_red(num_procesos, num_operaciones, tamanio_lote):
+    num_libros = num_operaciones // 10
+    red = RedBibliotecas(num_sucursales=num_procesos, procesos=True, limite_prestamos=num_operaciones)
+    try:
+        red.agregar_libros([(_isbn(i), f"Libro {i}", f"Autor {i % 500}", 2000, "General", 10)
+                            for i in range(num_libros)])
+        red.registrar_usuarios([(f"u{i}", f"Usuario {i}", f"u{i}@example.com") for i in range(1000)])
+        operaciones = [(_isbn(i % num_libros), f"u{i % 1000}") for i in range(num_operaciones)]
+        inicio = time.perf_counter()
+        for k in range(0, num_operaciones, tamanio_lote):
+            red.prestar_lote(operaciones[k:k + tamanio_lote])
+        return num_operaciones / (time.perf_counter() - inicio)
+    finally:
+        red.cerrar()
+
+
+def benchmark_red(num_operaciones=200000, tamanio_lote=5000, max_procesos=None):
+    """Préstamos por segundo de RedBibliotecas según la cantidad de procesos."""
+    max_procesos = max_procesos or os.cpu_count() or 1
+    print(f"--- Red de sucursales ({num_operaciones} préstamos, lotes de {tamanio_lote}, "
+          f"{os.cpu_count()} CPU) ---")
+    base = None
+    num_procesos = 1
+    while num_procesos <= max_procesos:
+        tasa = _prestamos_por_segundo_red(num_procesos, num_operaciones, tamanio_lote)
+        base = base or tasa
+        print(f"  {num_procesos:>2} procesos   {tasa:>12,.0f} ops/s  ({tasa / base:.2f}x)")
+        num_procesos *= 2
+
+
+if __name__ == "__main__":
+    benchmark_lotes()
+    benchmark_memoria()
+    benchmark_ranking()
+    benchmark_red()
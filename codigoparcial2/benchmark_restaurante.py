@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Benchmarks del sistema de restaurante (en proceso, sin persistencia).
+
+Uso: python benchmark_restaurante.py
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+import heapq
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from archivo_pedidos import ArchivoPedidos
+from cocina_restaurante import Cocina
+from menu_binario import exportar_menu_binario, importar_menu_binario
+from sistema_restaurante import SinMesasDisponibles, SistemaRestaurante
+
+# capacidades del salón y su proporción
+CAPACIDADES = ((2, 0.40), (4, 0.35), (6, 0.15), (8, 0.07), (12, 0.03))
+# (hora de inicio, grupos por minuto) de un viernes por la noche
+LLEGADAS = ((18.0, 1.5), (19.0, 3.0), (20.0, 5.0), (21.5, 3.5), (22.5, 1.5), (23.5, 0.0))
+TAMANIOS_GRUPO = ((1, 8), (2, 35), (3, 15), (4, 22), (5, 7), (6, 6), (7, 3), (8, 2), (10, 1), (12, 1))
+
+
+# ===========================================================================
+# ASIGNACIÓN DE MESAS EN UN VIERNES POR LA NOCHE
+# ===========================================================================
+
+def _llegadas_viernes(azar, fecha):
+    """[(instante, comensales, minutos en la mesa)] ordenado por instante."""
+    grupos = []
+    tamanios = [t for t, _ in TAMANIOS_GRUPO]
+    pesos = [p for _, p in TAMANIOS_GRUPO]
+    for (desde, tasa), (hasta, _) in zip(LLEGADAS, LLEGADAS[1:]):
+        minuto = desde * 60
+        while tasa:
+            minuto += azar.expovariate(tasa)
+            if minuto >= hasta * 60:
+                break
+            comensales = azar.choices(tamanios, pesos)[0]
+            estancia = azar.lognormvariate(4.2, 0.3) + 8 * comensales
+            grupos.append((fecha + timedelta(minutes=minuto), comensales, estancia))
+    return grupos
+
+
+def _sistema_salon(num_mesas, azar, reloj):
+    sistema = SistemaRestaurante(num_mesas=num_mesas, reloj=reloj)
+    capacidades = [c for c, _ in CAPACIDADES]
+    pesos = [p for _, p in CAPACIDADES]
+    for numero in range(1, num_mesas + 1):
+        sistema.configurar_mesa(numero, azar.choices(capacidades, pesos)[0])
+    sistema.agregar_plato("M001", "Menú del día", "Principal", 18.0)
+    return sistema
+
+
+def _asignar_recorriendo(sistema, comensales):
+    """Lo que haría un llamador sin índice: recorrer todas las mesas."""
+    mejor = None
+    for numero, info in sistema.mesas.items():
+        if not info['ocupada'] and info['capacidad'] >= comensales:
+            if mejor is None or (info['capacidad'], numero) < mejor:
+                mejor = (info['capacidad'], numero)
+    if mejor is None:
+        raise SinMesasDisponibles(comensales)
+    return mejor[1], sistema.reservar_mesa(mejor[1], comensales)
+
+
+def _noche(num_mesas, noches, semilla, asignar):
+    azar = random.Random(semilla)
+    instante = [datetime(2025, 1, 3)]
+    sistema = _sistema_salon(num_mesas, azar, lambda: instante[0])
+    asignaciones = []
+    rechazos = 0
+    ocupacion_maxima = 0
+    segundos = 0.0
+    for noche in range(noches):
+        fecha = datetime(2025, 1, 3) + timedelta(weeks=noche)
+        salidas = []    # heap de (instante, id_pedido)
+        for llegada, comensales, estancia in _llegadas_viernes(azar, fecha):
+            while salidas and salidas[0][0] <= llegada:
+                instante[0], pedido_id = heapq.heappop(salidas)
+                sistema.pagar_pedido(pedido_id)
+            instante[0] = llegada
+            inicio = time.perf_counter()
+            try:
+                numero, pedido_id = asignar(sistema, comensales)
+            except SinMesasDisponibles:
+                segundos += time.perf_counter() - inicio
+                rechazos += 1
+                asignaciones.append(None)
+                continue
+            segundos += time.perf_counter() - inicio
+            asignaciones.append(numero)
+            sistema.agregar_item(pedido_id, "M001", comensales)
+            heapq.heappush(salidas, (llegada + timedelta(minutes=estancia), pedido_id))
+            ocupacion_maxima = max(ocupacion_maxima, len(salidas))
+        while salidas:
+            instante[0], pedido_id = heapq.heappop(salidas)
+            sistema.pagar_pedido(pedido_id)
+    return asignaciones, rechazos, ocupacion_maxima, segundos
+
+
+def benchmark_mesas(num_mesas=400, noches=20, semilla=5):
+    """Microsegundos por asignación: asignar_mesa (bisect) contra recorrer las mesas."""
+    indice = _noche(num_mesas, noches, semilla, lambda sistema, comensales: sistema.asignar_mesa(comensales))
+    recorrido = _noche(num_mesas, noches, semilla, _asignar_recorriendo)
+    assert indice[0] == recorrido[0], "ambos métodos deben elegir las mismas mesas"
+    asignaciones, rechazos, ocupacion_maxima, _ = indice
+    print(f"--- Asignación de mesas ({num_mesas} mesas, {noches} viernes, "
+          f"{len(asignaciones)} grupos) ---")
+    print(f"  sentados {len(asignaciones) - rechazos}, sin mesa {rechazos}, "
+          f"mesas ocupadas a la vez (máx) {ocupacion_maxima}")
+    for nombre, segundos in (("asignar_mesa", indice[3]), ("recorrer mesas", recorrido[3])):
+        print(f"  {nombre:<15} {segundos / len(asignaciones) * 1e6:>8.1f} µs/asignación")
+
+
+# ===========================================================================
+# MEMORIA CON ARCHIVO DE PEDIDOS PAGADOS
+# ===========================================================================
+
+def _servicio(sistema, num_pedidos, abiertos_max=200):
+    """Crea y paga pedidos manteniendo unos `abiertos_max` abiertos a la vez."""
+    abiertos = []
+    for k in range(num_pedidos):
+        pedido_id = sistema.crear_pedido(1 + k % sistema.num_mesas)
+        sistema.agregar_item(pedido_id, "M001", 1 + k % 4)
+        abiertos.append(pedido_id)
+        if len(abiertos) > abiertos_max:
+            sistema.pagar_pedido(abiertos.pop(0))
+    return abiertos
+
+
+def benchmark_archivo(num_pedidos=200000, num_busquedas=1000):
+    """Memoria en uso tras `num_pedidos` pedidos, con y sin ArchivoPedidos."""
+    print(f"--- Archivo de pedidos pagados ({num_pedidos} pedidos, ~200 abiertos) ---")
+    for con_archivo in (False, True):
+        tracemalloc.start()
+        sistema = SistemaRestaurante(num_mesas=400)
+        sistema.agregar_plato("M001", "Menú del día", "Principal", 18.0)
+        if con_archivo:
+            sistema.conectar_archivo(ArchivoPedidos(tempfile.mkdtemp()))
+        _servicio(sistema, num_pedidos)
+        usados, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        nombre = "con archivo" if con_archivo else "sin archivo"
+        print(f"  {nombre:<12} {usados / 2 ** 20:>8.1f} MiB, pedidos en memoria {len(sistema.pedidos)}")
+
+    azar = random.Random(1)
+    ids = [f"P{azar.randrange(1, num_pedidos - 1000):05d}" for _ in range(num_busquedas)]
+    inicio = time.perf_counter()
+    for pedido_id in ids:
+        sistema.obtener_pedido(pedido_id)
+    ms = (time.perf_counter() - inicio) / num_busquedas * 1000
+    print(f"  obtener_pedido archivado: {ms:.3f} ms ({len(sistema.archivo.segmentos)} segmentos)")
+
+
+# ===========================================================================
+# COCINA EN HORA PICO
+# ===========================================================================
+
+# categoría -> (estación, cocineros, milisegundos de preparación por unidad)
+ESTACIONES = {
+    'Principal': ('parrilla', 4, 6.0),
+    'Acompañamiento': ('freidora', 2, 2.0),
+    'Entrante': ('fria', 2, 2.5),
+    'Postre': ('fria', 2, 2.5),
+    'Bebida': ('barra', 1, 0.8),
+}
+
+
+async def _hora_pico(num_pedidos, milisegundos_entre_pedidos, azar):
+    sistema = SistemaRestaurante(num_mesas=400)
+    platos = []
+    for categoria in ESTACIONES:
+        for k in range(5):
+            codigo = f"{categoria[:3].upper()}{k}"
+            sistema.agregar_plato(codigo, f"{categoria} {k}", categoria, 5.0 + k)
+            platos.append(codigo)
+    cocina = Cocina({categoria: estacion for categoria, (estacion, _, _) in ESTACIONES.items()})
+    sistema.conectar_cocina(cocina)
+    milisegundos = {estacion: ms for estacion, _, ms in ESTACIONES.values()}
+
+    async def preparar(ticket):
+        await asyncio.sleep(milisegundos[ticket['estacion']] * ticket['cantidad'] / 1000)
+
+    tareas = []
+    for estacion, cocineros, _ in set(ESTACIONES.values()):
+        tareas += cocina.atender_estacion(estacion, preparar, cocineros)
+    for k in range(num_pedidos):
+        pedido_id = sistema.crear_pedido(1 + k % 400)
+        for codigo in azar.sample(platos, azar.randint(2, 5)):
+            sistema.agregar_item(pedido_id, codigo, azar.randint(1, 3))
+        await asyncio.sleep(azar.expovariate(1000 / milisegundos_entre_pedidos))
+    await cocina.esperar_cocina()
+    for tarea in tareas:
+        tarea.cancel()
+    await asyncio.gather(*tareas, return_exceptions=True)
+    return cocina.metricas()
+
+
+def benchmark_cocina(num_pedidos=2000, milisegundos_entre_pedidos=2.0):
+    """Tiempos de ticket por estación con llegadas de hora pico (tiempos reales escalados a ms)."""
+    metricas = asyncio.run(_hora_pico(num_pedidos, milisegundos_entre_pedidos, random.Random(7)))
+    print(f"--- Cocina en hora pico ({num_pedidos} pedidos, uno cada ~{milisegundos_entre_pedidos} ms) ---")
+    for estacion, m in sorted(metricas.items()):
+        print(f"  {estacion:<9} {m['listos']:>6} tickets {m['tickets_por_minuto']:>9,.0f}/min  "
+              f"espera p50 {m['espera_p50'] * 1000:>7.1f} ms  total p90 {m['total_p90'] * 1000:>7.1f} ms  "
+              f"p99 {m['total_p99'] * 1000:>7.1f} ms")
+
+
+# ===========================================================================
+# MENÚ: TEXTO CONTRA BINARIO
+# ===========================================================================
+
+def _medir(funcion, *args):
+    inicio = time.perf_counter()
+    funcion(*args)
+    return time.perf_counter() - inicio
+
+
+def benchmark_menu(num_platos=80000, cambios=800):
+    """Exportar e importar el menú en texto y en binario, y un delta de `cambios` platos."""
+    sistema = SistemaRestaurante()
+    for i in range(num_platos):
+        sistema.agregar_plato(f"SKU{i:06d}", f"Plato número {i}", f"Categoría {i % 60}", 2.5 + i % 400 / 4)
+    directorio = tempfile.mkdtemp()
+    texto = os.path.join(directorio, 'menu.txt')
+    binario = os.path.join(directorio, 'menu.bin')
+    delta = os.path.join(directorio, 'delta.bin')
+
+    t_exp_texto = _medir(sistema.exportar_menu, texto)
+    t_imp_texto = _medir(SistemaRestaurante().importar_menu, texto)
+    version = exportar_menu_binario(sistema, binario)['version']
+    t_exp_binario = _medir(exportar_menu_binario, sistema, binario)
+    t_imp_binario = _medir(importar_menu_binario, SistemaRestaurante(), binario)
+
+    copia = SistemaRestaurante()
+    importar_menu_binario(copia, binario)
+    for i in random.Random(2).sample(range(num_platos), cambios):
+        sistema.cambiar_disponibilidad(f"SKU{i:06d}", False)
+    t_exp_delta = _medir(exportar_menu_binario, sistema, delta, version)
+    t_imp_delta = _medir(importar_menu_binario, copia, delta)
+
+    print(f"--- Menú ({num_platos} platos; delta de {cambios} cambios) ---")
+    for nombre, ruta, t_exp, t_imp in (("texto", texto, t_exp_texto, t_imp_texto),
+                                       ("binario", binario, t_exp_binario, t_imp_binario),
+                                       ("delta", delta, t_exp_delta, t_imp_delta)):
+        print(f"  {nombre:<8} {os.path.getsize(ruta) / 1024:>9,.0f} KiB  exportar {t_exp * 1000:>7.1f} ms  "
+              f"importar {t_imp * 1000:>7.1f} ms")
+
+
+# ===========================================================================
+# BÚSQUEDA EN EL MENÚ
+# ===========================================================================
+
+def _buscar_recorriendo(sistema, categoria=None, precio_max=None):
+    """buscar_platos sin índice: recorre y copia todo el menú."""
+    resultados = []
+    for codigo, info in sistema.menu.items():
+        if not info.get('disponible', True):
+            continue
+        if categoria and info['categoria'].lower() != str(categoria).lower():
+            continue
+        if precio_max is not None and info['precio'] > float(precio_max):
+            continue
+        resultados.append({'codigo': codigo, **info})
+    return resultados
+
+
+def benchmark_busqueda(num_platos=5000, num_consultas=2000):
+    """Microsegundos por consulta de categoría + precio máximo, con y sin índice."""
+    azar = random.Random(4)
+    sistema = SistemaRestaurante()
+    for i in range(num_platos):
+        sistema.agregar_plato(f"SKU{i:06d}", f"Plato número {i}", f"Categoría {i % 25}", 2.5 + azar.random() * 40)
+    consultas = [(f"categoría {azar.randrange(25)}", azar.choice((8, 15, 30))) for _ in range(num_consultas)]
+    print(f"--- Búsqueda en el menú ({num_platos} platos, categoría + precio máximo) ---")
+    for nombre, buscar in (("buscar_platos", sistema.buscar_platos),
+                           ("recorrer menú", lambda c, p: _buscar_recorriendo(sistema, c, p))):
+        inicio = time.perf_counter()
+        for categoria, precio_max in consultas:
+            buscar(categoria, precio_max)
+        print(f"  {nombre:<14} {(time.perf_counter() - inicio) / num_consultas * 1e6:>8.1f} µs/consulta")
+    inicio = time.perf_counter()
+    for k in range(num_consultas):
+        sistema.buscar_por_nombre(f"plato número {k % 500}", n=10)
+    print(f"  buscar_por_nombre {(time.perf_counter() - inicio) / num_consultas * 1e6:>5.1f} µs/consulta")
+
+
+if __name__ == "__main__":
+    benchmark_mesas()
+    benchmark_archivo()
+    benchmark_cocina()
+    benchmark_menu()
+    benchmark_busqueda()
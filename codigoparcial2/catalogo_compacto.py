@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Catálogo compacto (columnar) para SistemaBiblioteca.
+
+Guarda cada campo del libro en una columna en lugar de un dict de 7 claves
+por libro:
+- ISBN como enteros de 64 bits (array('q'))
+- año en array('H'); copias y préstamos en array('i')
+- autor y categoría codificados por diccionario (array('I') de códigos más
+  una tabla de valores únicos; las cadenas se internan)
+- título en una lista de str
+
+CatalogoCompacto se comporta como el dict {isbn: {campo: valor}} original:
+catalogo[isbn] retorna un RegistroLibro, una vista mutable sobre la fila.
+"""
+
+from array import array
+from collections.abc import Mapping, MutableMapping
+import sys
+
+CAMPOS_LIBRO = ('titulo', 'autor', 'anio', 'categoria', 'copias_total', 'copias_disponibles', 'prestamos')
+CAMPOS_NUMERICOS = {'anio': 'H', 'copias_total': 'i', 'copias_disponibles': 'i', 'prestamos': 'i'}
+CAMPOS_CODIFICADOS = ('autor', 'categoria')
+
+
+class _Diccionario:
+    """
+    Codificación por diccionario: valor <-> código entero. Las cadenas se
+    internan; otros valores (p. ej. None) ocupan su propio código.
+    """
+
+    __slots__ = ('valores', 'codigos')
+
+    def __init__(self):
+        self.valores = []
+        self.codigos = {}
+
+    def codificar(self, valor):
+        codigo = self.codigos.get(valor)
+        if codigo is None:
+            codigo = len(self.valores)
+            if isinstance(valor, str):
+                valor = sys.intern(valor)
+            self.valores.append(valor)
+            self.codigos[valor] = codigo
+        return codigo
+
+
+class RegistroLibro(MutableMapping):
+    """Vista de una fila del catálogo compacto con interfaz de dict."""
+
+    __slots__ = ('_catalogo', '_fila')
+
+    def __init__(self, catalogo, fila):
+        self._catalogo = catalogo
+        self._fila = fila
+
+    def __getitem__(self, campo):
+        return self._catalogo._leer(self._fila, campo)
+
+    def __setitem__(self, campo, valor):
+        self._catalogo._escribir(self._fila, campo, valor)
+
+    def __delitem__(self, campo):
+        raise TypeError("No se pueden eliminar campos de un libro")
+
+    def __iter__(self):
+        return iter(CAMPOS_LIBRO)
+
+    def __len__(self):
+        return len(CAMPOS_LIBRO)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class CatalogoCompacto(MutableMapping):
+    """Mapeo {isbn: RegistroLibro} respaldado por columnas."""
+
+    def __init__(self):
+        self._filas = {}            # isbn (int) -> fila
+        self._isbn = array('q')
+        self._titulo = []
+        self._numericos = {campo: array(tipo) for campo, tipo in CAMPOS_NUMERICOS.items()}
+        self._codigos = {campo: array('I') for campo in CAMPOS_CODIFICADOS}
+        self._diccionarios = {campo: _Diccionario() for campo in CAMPOS_CODIFICADOS}
+
+    @staticmethod
+    def _clave(isbn):
+        if not (isinstance(isbn, str) and len(isbn) == 13 and isbn.isdigit()):
+            raise KeyError(isbn)
+        return int(isbn)
+
+    def _leer(self, fila, campo):
+        if campo in self._numericos:
+            return self._numericos[campo][fila]
+        if campo in self._codigos:
+            return self._diccionarios[campo].valores[self._codigos[campo][fila]]
+        if campo == 'titulo':
+            return self._titulo[fila]
+        raise KeyError(campo)
+
+    def _escribir(self, fila, campo, valor):
+        if campo in self._numericos:
+            self._numericos[campo][fila] = valor
+        elif campo in self._codigos:
+            self._codigos[campo][fila] = self._diccionarios[campo].codificar(valor)
+        elif campo == 'titulo':
+            self._titulo[fila] = valor
+        else:
+            raise KeyError(f"Campo no soportado por el catálogo compacto: {campo}")
+
+    def __getitem__(self, isbn):
+        try:
+            return RegistroLibro(self, self._filas[self._clave(isbn)])
+        except KeyError:
+            raise KeyError(isbn) from None
+
+    def __setitem__(self, isbn, registro):
+        clave = self._clave(isbn)
+        if not isinstance(registro, Mapping) or set(registro) != set(CAMPOS_LIBRO):
+            raise ValueError(f"El registro debe tener exactamente los campos {CAMPOS_LIBRO}")
+        # un valor que una columna no admite no puede dejar la fila a medias:
+        # se codifica primero y los numéricos se deshacen si alguno falla
+        codigos = {campo: self._diccionarios[campo].codificar(registro[campo]) for campo in CAMPOS_CODIFICADOS}
+        fila = self._filas.get(clave)
+        if fila is None:
+            fila = len(self._isbn)
+            try:
+                for campo, columna in self._numericos.items():
+                    columna.append(registro[campo])
+            except (TypeError, OverflowError):
+                for columna in self._numericos.values():
+                    del columna[fila:]
+                raise
+            self._isbn.append(clave)
+            self._titulo.append(registro['titulo'])
+            for campo, columna in self._codigos.items():
+                columna.append(codigos[campo])
+            self._filas[clave] = fila
+            return
+        anteriores = {campo: columna[fila] for campo, columna in self._numericos.items()}
+        try:
+            for campo, columna in self._numericos.items():
+                columna[fila] = registro[campo]
+        except (TypeError, OverflowError):
+            for campo, columna in self._numericos.items():
+                columna[fila] = anteriores[campo]
+            raise
+        self._titulo[fila] = registro['titulo']
+        for campo, columna in self._codigos.items():
+            columna[fila] = codigos[campo]
+
+    def __delitem__(self, isbn):
+        # la fila queda huérfana; el espacio se recupera al reconstruir
+        del self._filas[self._clave(isbn)]
+
+    def __contains__(self, isbn):
+        return isinstance(isbn, str) and len(isbn) == 13 and isbn.isdigit() and int(isbn) in self._filas
+
+    def __iter__(self):
+        return (f"{clave:013d}" for clave in self._filas)
+
+    def __len__(self):
+        return len(self._filas)
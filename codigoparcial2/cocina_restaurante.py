@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Pantalla de cocina (tickets por estación) para SistemaRestaurante.
+
+Con SistemaRestaurante.conectar_cocina(Cocina(...)) cada agregar_item
+genera un ticket que va a la estación de la categoría del plato
+(`estaciones` traduce categoría -> estación; si falta, la estación se
+llama como la categoría). Cada estación tiene una cola de prioridad: sale
+primero el ticket del pedido más antiguo y, a igual antigüedad, el de la
+mesa de menor número.
+
+Estados de un ticket: 'pendiente' -> 'cocinando' -> 'listo' | 'fallido'.
+
+Consumo:
+- sincrónico: tomar_ticket(estacion) y marcar_listo(id_ticket)
+- asyncio: atender_estacion(estacion, preparar, cocineros) lanza
+  `cocineros` consumidores que esperan tickets sin sondeo y ejecutan la
+  corrutina preparar(ticket); esperar_cocina() espera a que todas las
+  colas queden vacías. Los tickets deben llegar desde el hilo del event loop.
+  Si preparar lanza una excepción el ticket queda 'fallido' y el cocinero
+  sigue con el próximo; si la tarea se cancela, el ticket vuelve a la cola.
+
+metricas() da, por estación, tickets por minuto y los percentiles de
+espera (creado -> cocinando) y de tiempo total (creado -> listo) sobre los
+últimos `muestras` tickets.
+"""
+
+import asyncio
+from bisect import bisect_left, insort
+from collections import deque
+from datetime import datetime, timedelta
+
+from estadisticas import percentil
+
+ESTADOS = ('pendiente', 'cocinando', 'listo', 'fallido')
+SEGUNDO = timedelta(seconds=1)
+
+
+class Cocina:
+    """
+    Tickets de cocina repartidos por estación.
+    - estaciones: {categoria: estacion}
+    - reloj: función sin argumentos que retorna el datetime actual
+    - listos_recientes: cuántos tickets listos (y fallidos) se conservan
+      para la pantalla
+    - muestras: cuántas esperas y tiempos totales recientes se conservan
+      por estación para los percentiles
+    """
+
+    def __init__(self, estaciones=None, reloj=None, listos_recientes=100, muestras=10000):
+        self.estaciones = dict(estaciones or {})
+        self.reloj = reloj or datetime.now
+        self.muestras = muestras
+        self.tickets = {}       # id_ticket -> ticket pendiente o cocinando
+        self.listos = deque(maxlen=listos_recientes)
+        self.fallidos = deque(maxlen=listos_recientes)
+        self._colas = {}        # estacion -> asyncio.PriorityQueue de (prioridad, id_ticket)
+        self._pendientes = {}   # estacion -> list ordenada de (prioridad, id_ticket) sin tomar
+        self._prioridades = {}  # id_ticket -> prioridad (para volver a encolarlo)
+        self._metricas = {}     # estacion -> contadores y tiempos recientes
+        self._secuencia = 0
+
+    def _estacion(self, estacion):
+        if estacion not in self._colas:
+            self._colas[estacion] = asyncio.PriorityQueue()
+            self._pendientes[estacion] = []
+            self._metricas[estacion] = {'recibidos': 0, 'cocinando': 0, 'listos': 0, 'fallidos': 0,
+                                        'primero': None, 'ultimo': None, 'total_max': 0.0,
+                                        'esperas': deque(maxlen=self.muestras),
+                                        'totales': deque(maxlen=self.muestras)}
+        return self._colas[estacion]
+
+    def _encolar(self, estacion, id_ticket):
+        entrada = (self._prioridades[id_ticket], id_ticket)
+        self._colas[estacion].put_nowait(entrada)
+        insort(self._pendientes[estacion], entrada)
+
+    # ---------------------------
+    # ENTRADA DE TICKETS
+    # ---------------------------
+
+    def recibir(self, id_pedido, pedido, codigo, cantidad, categoria):
+        """Crea el ticket de una línea del pedido y lo encola en su estación."""
+        estacion = self.estaciones.get(categoria, categoria)
+        cola = self._estacion(estacion)
+        self._secuencia += 1
+        ahora = self.reloj()
+        ticket = {
+            'id': f"T{self._secuencia:06d}",
+            'id_pedido': id_pedido,
+            'numero_mesa': pedido['numero_mesa'],
+            'codigo': codigo,
+            'cantidad': cantidad,
+            'estacion': estacion,
+            'estado': 'pendiente',
+            'creado': ahora,
+            'inicio': None,
+            'listo': None
+        }
+        self.tickets[ticket['id']] = ticket
+        self._prioridades[ticket['id']] = (pedido['fecha'], pedido['numero_mesa'], self._secuencia)
+        self._encolar(estacion, ticket['id'])
+        metricas = self._metricas[estacion]
+        metricas['recibidos'] += 1
+        if metricas['primero'] is None:
+            metricas['primero'] = ahora
+        return ticket
+
+    # ---------------------------
+    # TRANSICIONES
+    # ---------------------------
+
+    def _empezar(self, id_ticket):
+        ticket = self.tickets[id_ticket]
+        pendientes = self._pendientes[ticket['estacion']]
+        del pendientes[bisect_left(pendientes, (self._prioridades[id_ticket], id_ticket))]
+        ticket['estado'] = 'cocinando'
+        ticket['inicio'] = self.reloj()
+        metricas = self._metricas[ticket['estacion']]
+        metricas['cocinando'] += 1
+        metricas['esperas'].append((ticket['inicio'] - ticket['creado']) / SEGUNDO)
+        return ticket
+
+    def tomar_ticket(self, estacion):
+        """Pasa a 'cocinando' el próximo ticket de la estación; None si no hay."""
+        cola = self._colas.get(estacion)
+        if cola is None or cola.empty():
+            return None
+        _, id_ticket = cola.get_nowait()
+        cola.task_done()
+        return self._empezar(id_ticket)
+
+    def _terminar(self, id_ticket):
+        """Quita de la cocina un ticket que se estaba cocinando."""
+        ticket = self.tickets.get(id_ticket)
+        if ticket is None or ticket['estado'] != 'cocinando':
+            raise ValueError(f"El ticket {id_ticket} no se está cocinando")
+        del self.tickets[id_ticket]
+        del self._prioridades[id_ticket]
+        self._metricas[ticket['estacion']]['cocinando'] -= 1
+        return ticket
+
+    def marcar_listo(self, id_ticket):
+        ticket = self._terminar(id_ticket)
+        ticket['estado'] = 'listo'
+        ticket['listo'] = self.reloj()
+        self.listos.append(ticket)
+        metricas = self._metricas[ticket['estacion']]
+        metricas['listos'] += 1
+        metricas['ultimo'] = ticket['listo']
+        total = (ticket['listo'] - ticket['creado']) / SEGUNDO
+        metricas['totales'].append(total)
+        metricas['total_max'] = max(metricas['total_max'], total)
+        return ticket
+
+    def marcar_fallido(self, id_ticket, error=None):
+        """El ticket no se pudo preparar: sale de la cocina con su error."""
+        ticket = self._terminar(id_ticket)
+        ticket['estado'] = 'fallido'
+        ticket['error'] = None if error is None else repr(error)
+        self.fallidos.append(ticket)
+        self._metricas[ticket['estacion']]['fallidos'] += 1
+        return ticket
+
+    def _devolver(self, id_ticket):
+        """Vuelve a poner en la cola un ticket que se estaba cocinando."""
+        ticket = self.tickets[id_ticket]
+        ticket['estado'] = 'pendiente'
+        ticket['inicio'] = None
+        self._metricas[ticket['estacion']]['cocinando'] -= 1
+        self._encolar(ticket['estacion'], id_ticket)
+
+    # ---------------------------
+    # CONSUMIDORES ASYNCIO
+    # ---------------------------
+
+    async def _cocinero(self, estacion, preparar):
+        cola = self._estacion(estacion)
+        while True:
+            _, id_ticket = await cola.get()
+            try:
+                ticket = self._empezar(id_ticket)
+                try:
+                    await preparar(ticket)
+                except asyncio.CancelledError:
+                    # otro cocinero de la estación lo retoma
+                    self._devolver(id_ticket)
+                    raise
+                except Exception as e:
+                    self.marcar_fallido(id_ticket, e)
+                else:
+                    self.marcar_listo(id_ticket)
+            finally:
+                cola.task_done()
+
+    def atender_estacion(self, estacion, preparar, cocineros=1):
+        """
+        Lanza `cocineros` tareas que toman tickets de la estación y esperan
+        la corrutina preparar(ticket). Retorna las tareas (cancelarlas para
+        detener la estación).
+        """
+        return [asyncio.ensure_future(self._cocinero(estacion, preparar)) for _ in range(cocineros)]
+
+    async def esperar_cocina(self):
+        """Espera a que se terminen todos los tickets encolados."""
+        await asyncio.gather(*(cola.join() for cola in self._colas.values()))
+
+    # ---------------------------
+    # CONSULTAS
+    # ---------------------------
+
+    def pantalla(self, estacion):
+        """Tickets de la estación: pendientes en orden de salida y los que se cocinan."""
+        return {
+            'pendientes': [self.tickets[id_ticket] for _, id_ticket in self._pendientes.get(estacion, ())],
+            'cocinando': [t for t in self.tickets.values()
+                          if t['estacion'] == estacion and t['estado'] == 'cocinando']
+        }
+
+    def metricas(self):
+        reporte = {}
+        for estacion, m in self._metricas.items():
+            esperas = sorted(m['esperas'])
+            totales = sorted(m['totales'])
+            minutos = (m['ultimo'] - m['primero']) / SEGUNDO / 60 if m['ultimo'] else 0.0
+            reporte[estacion] = {
+                'recibidos': m['recibidos'],
+                'pendientes': self._colas[estacion].qsize(),
+                'cocinando': m['cocinando'],
+                'listos': m['listos'],
+                'fallidos': m['fallidos'],
+                'tickets_por_minuto': round(m['listos'] / minutos, 2) if minutos else 0.0,
+                'espera_p50': round(percentil(esperas, 50), 3),
+                'espera_p90': round(percentil(esperas, 90), 3),
+                'total_p50': round(percentil(totales, 50), 3),
+                'total_p90': round(percentil(totales, 90), 3),
+                'total_p99': round(percentil(totales, 99), 3),
+                'total_max': round(m['total_max'], 3)
+            }
+        return reporte
@@ -0,0 +1,46 @@
+"""
+Ayudas compartidas por las pruebas: reloj manual y restaurante de ejemplo.
+"""
+
+from datetime import timedelta
+
+import pytest
+
+from sistema_restaurante import SistemaRestaurante
+
+
+class Reloj:
+    """Reloj manual para las pruebas: SistemaBiblioteca(reloj=reloj), SistemaRestaurante(reloj=reloj)."""
+
+    def __init__(self, inicio):
+        self.ahora = inicio
+
+    def __call__(self):
+        return self.ahora
+
+    def avanzar(self, **delta):
+        self.ahora += timedelta(**delta)
+
+
+@pytest.fixture
+def reloj(request):
+    """Reloj manual que arranca en el INICIO del módulo de pruebas."""
+    return Reloj(request.module.INICIO)
+
+
+@pytest.fixture
+def restaurante(reloj):
+    """
+    Fábrica restaurante(**opciones): SistemaRestaurante con el reloj de la
+    prueba, impuesto 10%, propina 0 y cuatro platos (P001 Hamburguesa 10.0,
+    P002 Papas Fritas 4.0, P003 Ensalada 6.0, P004 Refresco 2.0).
+    """
+    def crear(tasa_impuesto=0.10, propina_sugerida=0.0, **opciones):
+        sistema = SistemaRestaurante(tasa_impuesto=tasa_impuesto, propina_sugerida=propina_sugerida,
+                                     reloj=reloj, **opciones)
+        sistema.agregar_plato("P001", "Hamburguesa", "Principal", 10.0)
+        sistema.agregar_plato("P002", "Papas Fritas", "Acompañamiento", 4.0)
+        sistema.agregar_plato("P003", "Ensalada", "Entrante", 6.0)
+        sistema.agregar_plato("P004", "Refresco", "Bebida", 2.0)
+        return sistema
+    return crear
@@ -0,0 +1,13 @@
+#!/usr/bin/env python3
+"""
+Utilidades estadísticas compartidas por los sistemas (biblioteca y
+restaurante): percentiles de latencias y tiempos de espera.
+"""
+
+
+def percentil(valores_ordenados, p):
+    """Percentil `p` (0-100) por el rango más cercano; 0.0 si no hay valores."""
+    if not valores_ordenados:
+        return 0.0
+    indice = min(len(valores_ordenados) - 1, int(round(p / 100 * (len(valores_ordenados) - 1))))
+    return valores_ordenados[indice]
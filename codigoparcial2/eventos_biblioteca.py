@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Registro binario de operaciones (event sourcing) para SistemaBiblioteca.
+
+RegistroEventos anota cada llamada registrable (agregar_libro,
+registrar_usuario, prestar_libro, devolver_libro, renovar_prestamo,
+reservas, multas, ...) con el instante en que ocurrió, en un archivo
+binario compacto. Cada `checkpoint_cada` eventos guarda además una
+instantánea del estado completo en un archivo aparte.
+
+reproducir() reconstruye un sistema desde el registro (partiendo del
+último checkpoint útil) y sirve para réplicas de lectura, para medir
+backends nuevos con tráfico real y para consultas en el pasado
+("¿qué había disponible el día X?").
+
+Formato:
+- cabecera: MAGICO, uint32 largo + JSON con la configuración del sistema
+- evento:   uint32 largo del cuerpo, uint8 operación, int64 microsegundos
+            desde 1970-01-01 (hora local), args y kwargs codificados
+- valores:  un byte de tipo ('N' None, 'T'/'F' bool, 'i' int64, 'f' float64,
+            's' str utf-8, 'd' datetime, 'l' lista) seguido del dato
+"""
+
+from datetime import datetime, timedelta
+import glob
+import json
+import os
+import struct
+
+from almacenamiento_biblioteca import AlmacenamientoMemoria, deserializar, serializar
+from sistema_biblioteca import SistemaBiblioteca
+
+MAGICO = b'BIBEVT1\n'
+OPERACIONES = ('agregar_libro', 'registrar_usuario', 'prestar_libro', 'devolver_libro',
+               'renovar_prestamo', 'prestar_lote', 'devolver_lote', 'reservar_libro',
+               'cancelar_reserva', 'vencer_reservas', 'actualizar_multas', 'pagar_multa',
+               'condonar_multa', 'importar_libros')
+CODIGOS = {nombre: codigo for codigo, nombre in enumerate(OPERACIONES)}
+# argumentos que la reproducción vuelve a calcular; no se guardan
+DERIVADOS = {'indices'}
+CONFIGURACION = ('dias_prestamo', 'multa_por_dia', 'limite_prestamos', 'dias_reserva')
+
+EPOCA = datetime(1970, 1, 1)
+MICROSEGUNDO = timedelta(microseconds=1)
+EVENTO = struct.Struct('<IBq')
+U32 = struct.Struct('<I')
+I64 = struct.Struct('<q')
+F64 = struct.Struct('<d')
+
+
+# ===========================================================================
+# CODIFICACIÓN DE VALORES
+# ===========================================================================
+
+def _a_micro(fecha):
+    return (fecha - EPOCA) // MICROSEGUNDO
+
+
+def _de_micro(micro):
+    return EPOCA + timedelta(microseconds=micro)
+
+
+def _codificar(valor, salida):
+    if valor is None:
+        salida += b'N'
+    elif valor is True:
+        salida += b'T'
+    elif valor is False:
+        salida += b'F'
+    elif isinstance(valor, int):
+        salida += b'i' + I64.pack(valor)
+    elif isinstance(valor, float):
+        salida += b'f' + F64.pack(valor)
+    elif isinstance(valor, str):
+        datos = valor.encode('utf-8')
+        salida += b's' + U32.pack(len(datos)) + datos
+    elif isinstance(valor, datetime):
+        salida += b'd' + I64.pack(_a_micro(valor))
+    elif isinstance(valor, (list, tuple)):
+        salida += b'l' + U32.pack(len(valor))
+        for elemento in valor:
+            _codificar(elemento, salida)
+    else:
+        raise TypeError(f"Tipo no soportado en el registro de eventos: {type(valor).__name__}")
+
+
+def _decodificar(datos, pos):
+    tipo = datos[pos:pos + 1]
+    pos += 1
+    if tipo == b'N':
+        return None, pos
+    if tipo == b'T':
+        return True, pos
+    if tipo == b'F':
+        return False, pos
+    if tipo == b'i':
+        return I64.unpack_from(datos, pos)[0], pos + 8
+    if tipo == b'f':
+        return F64.unpack_from(datos, pos)[0], pos + 8
+    if tipo == b's':
+        largo = U32.unpack_from(datos, pos)[0]
+        pos += 4
+        return str(datos[pos:pos + largo], 'utf-8'), pos + largo
+    if tipo == b'd':
+        return _de_micro(I64.unpack_from(datos, pos)[0]), pos + 8
+    if tipo == b'l':
+        cantidad = U32.unpack_from(datos, pos)[0]
+        pos += 4
+        lista = []
+        for _ in range(cantidad):
+            valor, pos = _decodificar(datos, pos)
+            lista.append(valor)
+        return lista, pos
+    raise ValueError(f"Tipo desconocido en el registro de eventos: {tipo!r}")
+
+
+# ===========================================================================
+# ESCRITURA
+# ===========================================================================
+
+class RegistroEventos:
+    """
+    Registro de operaciones de un SistemaBiblioteca; se conecta al crearlo.
+
+    Mientras está conectado, las operaciones que modifican estado se
+    ejecutan en serie para que el orden del registro sea exactamente el
+    orden en que se aplicaron.
+
+    Durabilidad: cada `flush_cada` eventos el búfer se vuelca al sistema
+    operativo. Con el valor por defecto (1) un evento está en el archivo
+    cuando su operación retorna y sobrevive a una caída del proceso; con
+    valores mayores una caída pierde a lo sumo los últimos flush_cada - 1
+    eventos. Con fsync=True además se sincroniza el disco en cada volcado,
+    para sobrevivir también a un corte de energía.
+    """
+
+    def __init__(self, ruta, sistema, checkpoint_cada=100000, flush_cada=1, fsync=False):
+        if flush_cada < 1:
+            raise ValueError("flush_cada debe ser >= 1")
+        self.ruta = ruta
+        self.sistema = sistema
+        self.checkpoint_cada = checkpoint_cada
+        self.flush_cada = flush_cada
+        self.fsync = fsync
+        self._sin_volcar = 0
+        nuevo = not os.path.exists(ruta) or os.path.getsize(ruta) == 0
+        config = {campo: getattr(sistema, campo) for campo in CONFIGURACION}
+        if not nuevo:
+            # reproducir() usa la configuración de la cabecera: los eventos
+            # anotados con otra darían un estado distinto al reproducirlos
+            guardada = leer_configuracion(ruta)
+            if guardada != config:
+                raise ValueError(f"El registro {ruta} fue creado con otra configuración: "
+                                 f"{guardada} (sistema: {config})")
+        self._archivo = open(ruta, 'ab')
+        if nuevo:
+            datos = json.dumps(config).encode('utf-8')
+            self._archivo.write(MAGICO + U32.pack(len(datos)) + datos)
+        self._eventos = sum(1 for _ in leer_eventos(ruta)) if not nuevo else 0
+        sistema.conectar_registro_eventos(self)
+        if nuevo and (sistema.catalogo or sistema.usuarios):
+            # el registro empieza con un sistema que ya tiene datos
+            self.guardar_checkpoint(None)
+
+    def codificar(self, nombre, fecha, args, kwargs):
+        """
+        Bytes del evento, sin escribirlo. Lanza TypeError si algún valor no
+        se puede codificar; se llama antes de ejecutar la operación para que
+        un fallo no deje el estado cambiado sin su evento.
+        """
+        cuerpo = bytearray()
+        _codificar(list(args), cuerpo)
+        _codificar([[clave, valor] for clave, valor in kwargs.items() if clave not in DERIVADOS], cuerpo)
+        return EVENTO.pack(len(cuerpo), CODIGOS[nombre], _a_micro(fecha)) + cuerpo
+
+    def escribir(self, evento, fecha):
+        """Agrega al registro un evento de codificar() ya aplicado al sistema."""
+        self._archivo.write(evento)
+        self._eventos += 1
+        self._sin_volcar += 1
+        if self._sin_volcar >= self.flush_cada:
+            self.flush()
+        if self._eventos % self.checkpoint_cada == 0:
+            self.guardar_checkpoint(fecha)
+
+    def guardar_checkpoint(self, fecha):
+        """Guarda el estado actual junto con la posición del registro."""
+        self.flush()
+        cabecera = {'eventos': self._eventos, 'posicion': self._archivo.tell(),
+                    'fecha': fecha.isoformat() if fecha else None}
+        ruta = f"{self.ruta}.ckpt{self._eventos:012d}"
+        with open(ruta + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(json.dumps(cabecera) + "\n")
+            f.write(serializar(self.sistema.exportar_estado()))
+        os.replace(ruta + '.tmp', ruta)
+
+    def flush(self):
+        """Vuelca los eventos del búfer al archivo (y a disco si fsync=True)."""
+        self._archivo.flush()
+        if self.fsync:
+            os.fsync(self._archivo.fileno())
+        self._sin_volcar = 0
+
+    def cerrar(self):
+        self.sistema.desconectar_registro_eventos()
+        self.flush()
+        self._archivo.close()
+
+
+# ===========================================================================
+# LECTURA Y REPRODUCCIÓN
+# ===========================================================================
+
+def _leer_cabecera(f):
+    if f.read(len(MAGICO)) != MAGICO:
+        raise ValueError("No es un registro de eventos de biblioteca")
+    largo = U32.unpack(f.read(4))[0]
+    return json.loads(f.read(largo))
+
+
+def leer_configuracion(ruta):
+    with open(ruta, 'rb') as f:
+        return _leer_cabecera(f)
+
+
+def leer_eventos(ruta, posicion=None):
+    """Genera (nombre, fecha, args, kwargs) desde `posicion` (por defecto, el inicio)."""
+    with open(ruta, 'rb') as f:
+        _leer_cabecera(f)
+        if posicion is not None:
+            f.seek(posicion)
+        while True:
+            cabecera = f.read(EVENTO.size)
+            if len(cabecera) < EVENTO.size:
+                return
+            largo, codigo, micro = EVENTO.unpack(cabecera)
+            cuerpo = f.read(largo)
+            if len(cuerpo) < largo:
+                # evento truncado por una caída: se ignora
+                return
+            args, pos = _decodificar(cuerpo, 0)
+            pares, _ = _decodificar(cuerpo, pos)
+            yield OPERACIONES[codigo], _de_micro(micro), args, dict(pares)
+
+
+def _checkpoints(ruta):
+    """Lista de (cabecera, ruta_checkpoint) ordenada por número de eventos."""
+    resultado = []
+    for ruta_ckpt in sorted(glob.glob(glob.escape(ruta) + '.ckpt*')):
+        if ruta_ckpt.endswith('.tmp'):
+            continue
+        with open(ruta_ckpt, 'r', encoding='utf-8') as f:
+            resultado.append((json.loads(f.readline()), ruta_ckpt))
+    return resultado
+
+
+class _EstadoCargado(AlmacenamientoMemoria):
+    """Backend en memoria que arranca con un estado dado (el de un checkpoint)."""
+
+    def __init__(self, estado):
+        self._estado = estado
+
+    def cargar(self):
+        return self._estado
+
+
+def reproducir(ruta, hasta=None, fabrica=SistemaBiblioteca, usar_checkpoints=True):
+    """
+    Reconstruye el sistema aplicando el registro de `ruta`.
+    - hasta: datetime; solo se aplican eventos hasta ese instante.
+    - fabrica: callable(**configuración) que crea el sistema vacío (p. ej.
+      para reproducir sobre otro backend de catálogo).
+    - usar_checkpoints: parte del último checkpoint anterior a `hasta`.
+    """
+    config = leer_configuracion(ruta)
+    sistema = None
+    posicion = None
+    if usar_checkpoints:
+        utiles = [(cab, r) for cab, r in _checkpoints(ruta)
+                  if hasta is None or cab['fecha'] is None or datetime.fromisoformat(cab['fecha']) <= hasta]
+        if utiles:
+            cabecera, ruta_ckpt = utiles[-1]
+            with open(ruta_ckpt, 'r', encoding='utf-8') as f:
+                f.readline()
+                estado = deserializar(f.read())
+            sistema = fabrica(**config, almacenamiento=_EstadoCargado(estado))
+            posicion = cabecera['posicion']
+    if sistema is None:
+        sistema = fabrica(**config)
+    for nombre, fecha, args, kwargs in leer_eventos(ruta, posicion):
+        if hasta is not None and fecha > hasta:
+            break
+        sistema.reproducir_operacion(nombre, fecha, args, kwargs)
+    return sistema
+
+
+def disponibles_en(ruta, fecha, isbn):
+    """Copias disponibles de `isbn` en el instante `fecha`."""
+    return reproducir(ruta, hasta=fecha).catalogo[isbn]['copias_disponibles']
+
+
+if __name__ == "__main__":
+    import random
+    import tempfile
+    import time
+
+    directorio = tempfile.mkdtemp()
+    ruta = os.path.join(directorio, 'biblioteca.evt')
+
+    reloj = [datetime(2025, 1, 1)]
+    sistema = SistemaBiblioteca(limite_prestamos=5, reloj=lambda: reloj[0])
+    registro = RegistroEventos(ruta, sistema, checkpoint_cada=5000)
+    for i in range(2000):
+        sistema.agregar_libro(f"978{i:010d}", f"Libro {i}", f"Autor {i % 100}", 2000, "General", 3)
+    for i in range(300):
+        sistema.registrar_usuario(f"u{i}", f"Usuario {i}", f"u{i}@example.com")
+
+    random.seed(7)
+    activos = []
+    for _ in range(20000):
+        reloj[0] += timedelta(minutes=random.randint(1, 30))
+        if activos and random.random() < 0.45:
+            sistema.devolver_libro(activos.pop(random.randrange(len(activos))))
+            continue
+        try:
+            activos.append(sistema.prestar_libro(f"978{random.randrange(2000):010d}", f"u{random.randrange(300)}"))
+        except Exception:
+            pass
+    registro.cerrar()
+    print("Eventos:", sum(1 for _ in leer_eventos(ruta)), "| tamaño:", os.path.getsize(ruta), "bytes")
+
+    for nombre, fabrica in (("dict", SistemaBiblioteca),
+                            ("compacto", lambda **c: SistemaBiblioteca(catalogo_compacto=True, **c))):
+        inicio = time.perf_counter()
+        replica = reproducir(ruta, fabrica=fabrica, usar_checkpoints=False)
+        print(f"Reproducción completa ({nombre}): {time.perf_counter() - inicio:.2f} s,",
+              "idéntica:", replica.prestamos == sistema.prestamos)
+
+    inicio = time.perf_counter()
+    replica = reproducir(ruta)
+    print(f"Reproducción desde checkpoint: {time.perf_counter() - inicio:.2f} s,",
+          "idéntica:", replica.prestamos == sistema.prestamos)
+
+    fecha = datetime(2025, 3, 1)
+    print(f"Copias de 9780000000007 disponibles el {fecha.date()}:", disponibles_en(ruta, fecha, "9780000000007"))
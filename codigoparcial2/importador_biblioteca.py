@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Importación masiva del catálogo para SistemaBiblioteca.
+
+importar_catalogo() lee el archivo por bloques de líneas, así que la
+memoria no depende del tamaño del archivo. Cada bloque se procesa (en
+otro proceso si hay varios núcleos): se separan los campos, se convierten
+año y copias, y se calculan los textos normalizados y los n-gramas con
+preparar_indices(). El proceso principal solo aplica cada bloque con
+SistemaBiblioteca.importar_libros, que valida con límites precalculados,
+descarta duplicados y fusiona los n-gramas del bloque en los índices.
+
+Los errores se informan por línea sin detener la importación.
+
+Formatos (según la extensión, o con `formato`):
+- csv:   encabezado isbn,titulo,autor,anio,categoria,copias (cualquier orden)
+- jsonl: un objeto JSON por línea con esas mismas claves
+- txt:   isbn|titulo|autor|anio|categoria|copias, sin encabezado
+         (el formato de catalogo_inicial.txt)
+Los campos CSV no pueden contener saltos de línea: cada bloque se procesa
+por separado.
+"""
+
+from collections import deque
+import csv
+import gc
+import json
+import multiprocessing
+import os
+import time
+
+from sistema_biblioteca import preparar_indices
+
+COLUMNAS = ('isbn', 'titulo', 'autor', 'anio', 'categoria', 'copias')
+FORMATOS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.txt': 'txt'}
+
+
+# ===========================================================================
+# PROCESAMIENTO DE UN BLOQUE (se puede ejecutar en otro proceso)
+# ===========================================================================
+
+def _filas(lineas, formato, columnas):
+    if formato == 'jsonl':
+        for linea in lineas:
+            try:
+                datos = json.loads(linea)
+            except ValueError:
+                yield None
+                continue
+            yield [datos.get(c) for c in COLUMNAS] if isinstance(datos, dict) else None
+    else:
+        lector = csv.reader(lineas, delimiter='|' if formato == 'txt' else ',')
+        for campos in lector:
+            if len(campos) != len(columnas):
+                yield None
+                continue
+            fila = dict(zip(columnas, campos))
+            yield [fila[c].strip() for c in COLUMNAS]
+
+
+def procesar_bloque(bloque):
+    """
+    bloque: (número de la primera línea, [líneas], formato, columnas).
+    Retorna (libros, números de línea de cada libro, errores [(línea, mensaje)], índices).
+    """
+    primera, lineas, formato, columnas = bloque
+    libros = []
+    numeros = []
+    errores = []
+    for numero, (linea, fila) in enumerate(zip(lineas, _filas(lineas, formato, columnas)), primera):
+        if not linea.strip():
+            continue
+        if fila is None:
+            errores.append((numero, "Fila mal formada."))
+            continue
+        isbn, titulo, autor, anio, categoria, copias = fila
+        try:
+            anio = int(anio)
+            copias = int(copias)
+        except (TypeError, ValueError):
+            errores.append((numero, "Año y copias deben ser números enteros."))
+            continue
+        libros.append((isbn, titulo, autor, anio, categoria, copias))
+        numeros.append(numero)
+    return libros, numeros, errores, preparar_indices(libros)
+
+
+# ===========================================================================
+# LECTURA POR BLOQUES
+# ===========================================================================
+
+def _bloques(archivo, formato, columnas, primera, tamanio_bloque):
+    lineas = []
+    for linea in archivo:
+        lineas.append(linea)
+        if len(lineas) == tamanio_bloque:
+            yield (primera, lineas, formato, columnas)
+            primera += len(lineas)
+            lineas = []
+    if lineas:
+        yield (primera, lineas, formato, columnas)
+
+
+def _detectar_formato(ruta, formato):
+    formato = formato or FORMATOS.get(os.path.splitext(ruta)[1].lower())
+    if formato not in FORMATOS.values():
+        raise ValueError(f"Formato no soportado: {formato or ruta}")
+    return formato
+
+
+def importar_catalogo(sistema, ruta, formato=None, tamanio_bloque=50000, procesos=None):
+    """
+    Importa el catálogo de `ruta` en `sistema`.
+    - procesos: procesos que preparan los bloques (por defecto, uno por
+      núcleo; con 1 todo ocurre en este proceso).
+    Retorna {'lineas', 'importados', 'errores': [(línea, mensaje)], 'segundos'}.
+    """
+    formato = _detectar_formato(ruta, formato)
+    procesos = procesos or os.cpu_count() or 1
+    # el recolector de ciclos recorrería millones de objetos nuevos (libros e
+    # índices) una y otra vez sin encontrar nada que liberar
+    gc_activo = gc.isenabled()
+    gc.disable()
+    try:
+        return _importar(sistema, ruta, formato, tamanio_bloque, procesos)
+    finally:
+        if gc_activo:
+            gc.enable()
+
+
+def _importar(sistema, ruta, formato, tamanio_bloque, procesos):
+    inicio = time.perf_counter()
+    importados = 0
+    lineas = 0
+    errores = []
+
+    with open(ruta, 'r', encoding='utf-8', newline='') as archivo:
+        columnas = COLUMNAS
+        primera = 1
+        if formato == 'csv':
+            encabezado = next(csv.reader([archivo.readline()]), [])
+            columnas = tuple(c.strip().lower() for c in encabezado)
+            faltantes = set(COLUMNAS) - set(columnas)
+            if faltantes:
+                raise ValueError(f"Faltan columnas en el encabezado: {', '.join(sorted(faltantes))}")
+            primera = 2
+
+        def aplicar(resultado):
+            nonlocal importados, lineas
+            libros, numeros, errores_bloque, indices = resultado
+            errores.extend(errores_bloque)
+            rechazados = sistema.importar_libros(libros, indices=indices)
+            errores.extend((numeros[posicion], mensaje) for posicion, mensaje in rechazados)
+            importados += len(libros) - len(rechazados)
+            lineas += len(libros) + len(errores_bloque)
+
+        bloques = _bloques(archivo, formato, columnas, primera, tamanio_bloque)
+        if procesos == 1:
+            for bloque in bloques:
+                aplicar(procesar_bloque(bloque))
+        else:
+            with multiprocessing.get_context().Pool(procesos) as pool:
+                # a lo sumo dos bloques por proceso en vuelo: memoria acotada
+                en_vuelo = deque()
+                for bloque in bloques:
+                    en_vuelo.append(pool.apply_async(procesar_bloque, (bloque,)))
+                    if len(en_vuelo) >= 2 * procesos:
+                        aplicar(en_vuelo.popleft().get())
+                while en_vuelo:
+                    aplicar(en_vuelo.popleft().get())
+
+    errores.sort()
+    return {'lineas': lineas, 'importados': importados, 'errores': errores,
+            'segundos': round(time.perf_counter() - inicio, 2)}
+
+
+if __name__ == "__main__":
+    import sys
+    import tempfile
+
+    from sistema_biblioteca import SistemaBiblioteca
+
+    num_libros = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    ruta = os.path.join(tempfile.mkdtemp(), 'catalogo.csv')
+    with open(ruta, 'w', encoding='utf-8', newline='') as f:
+        escritor = csv.writer(f)
+        escritor.writerow(COLUMNAS)
+        for i in range(num_libros):
+            escritor.writerow((f"978{i:010d}", f"Libro número {i}", f"Autor {i % 20000}",
+                               1900 + i % 120, f"Categoría {i % 40}", 1 + i % 5))
+        escritor.writerow(("978000000000X", "ISBN inválido", "Autor", 2000, "General", 1))
+        escritor.writerow(("9780000000001", "Duplicado", "Autor", 2000, "General", 1))
+
+    sistema = SistemaBiblioteca()
+    resultado = importar_catalogo(sistema, ruta)
+    print(f"{resultado['importados']} libros importados en {resultado['segundos']} s "
+          f"({os.cpu_count()} CPU); errores: {resultado['errores']}")
+    print("Búsqueda 'número 4242':", [l['isbn'] for l in sistema.buscar_libros('titulo', 'número 424242')][:3])
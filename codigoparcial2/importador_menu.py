@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Importación paralela y reanudable del menú de texto de SistemaRestaurante.
+
+Mismo formato y mismas reglas que SistemaRestaurante.importar_menu
+(codigo|nombre|categoria|precio|disponible, un plato por línea), pensado
+para archivos grandes:
+
+- El archivo se divide en trozos de `tamanio_trozo` bytes alineados a fin
+  de línea. Cada trozo se lee y convierte en otro proceso (procesar_trozo).
+- El proceso principal aplica los trozos en el orden del archivo, así que
+  los duplicados se resuelven siempre igual: gana la primera aparición y
+  los códigos que ya estaban en el menú se informan como duplicados.
+- Los errores no se acumulan en memoria: se escriben en un archivo aparte
+  ("línea<TAB>mensaje", por defecto `ruta + '.errores'`).
+- Después de aplicar cada trozo se guarda un checkpoint (por defecto
+  `ruta + '.checkpoint'`). Si la importación se interrumpe, volver a
+  llamarla con el mismo sistema (o uno con el menú restaurado) continúa
+  desde el siguiente trozo. Al terminar, el checkpoint se borra.
+- Antes de aplicar un trozo se anotan en el checkpoint los códigos que va
+  a agregar. Si la interrupción llega entre el cambio del menú y el
+  checkpoint, al reanudar esos códigos cuentan como importados y no como
+  duplicados.
+"""
+
+from collections import deque
+import json
+import multiprocessing
+import os
+import time
+
+
+# ===========================================================================
+# PROCESAMIENTO DE UN TROZO (se puede ejecutar en otro proceso)
+# ===========================================================================
+
+def procesar_trozo(trozo):
+    """
+    trozo: (ruta, byte inicial, byte final).
+    Retorna (líneas del trozo, [(línea relativa, codigo, nombre, categoria, precio, disponible, error)]).
+    """
+    ruta, inicio, fin = trozo
+    with open(ruta, 'rb') as f:
+        f.seek(inicio)
+        lineas = f.read(fin - inicio).decode('utf-8').split('\n')
+    if lineas[-1] == '':
+        lineas.pop()
+    filas = []
+    for numero, linea in enumerate(lineas, start=1):
+        linea = linea.strip()
+        if not linea:
+            continue
+        partes = linea.split("|")
+        if len(partes) != 5:
+            filas.append((numero, None, None, None, None, None, 'Formato incorrecto'))
+            continue
+        codigo, nombre, categoria, precio_s, disponible_s = partes
+        try:
+            filas.append((numero, codigo, nombre, categoria, float(precio_s), bool(int(disponible_s)), None))
+        except Exception as e:
+            filas.append((numero, codigo, nombre, categoria, None, None, str(e)))
+    return len(lineas), filas
+
+
+# ===========================================================================
+# TROZOS Y CHECKPOINT
+# ===========================================================================
+
+def _trozos(ruta, inicio, tamanio_trozo):
+    """Genera (ruta, inicio, fin) alineados a fin de línea desde el byte `inicio`."""
+    total = os.path.getsize(ruta)
+    with open(ruta, 'rb') as f:
+        while inicio < total:
+            f.seek(min(inicio + tamanio_trozo, total))
+            f.readline()
+            fin = min(f.tell(), total)
+            yield (ruta, inicio, fin)
+            inicio = fin
+
+
+def _firma(ruta):
+    estado = os.stat(ruta)
+    return {'tamanio': estado.st_size, 'modificado': estado.st_mtime_ns}
+
+
+def _leer_checkpoint(ruta_checkpoint, ruta):
+    if not os.path.exists(ruta_checkpoint):
+        return None
+    with open(ruta_checkpoint, 'r', encoding='utf-8') as f:
+        checkpoint = json.load(f)
+    # si el archivo cambió desde la interrupción, se empieza de cero
+    return checkpoint if checkpoint['archivo'] == _firma(ruta) else None
+
+
+def _codigos_nuevos(menu, filas):
+    """Códigos que _importar_filas_menu agregará al menú con estas filas."""
+    nuevos = []
+    vistos = set()
+    for _, codigo, _, _, _, _, error in filas:
+        if error is None and codigo not in menu and codigo not in vistos:
+            vistos.add(codigo)
+            nuevos.append(codigo)
+    return nuevos
+
+
+def _guardar_checkpoint(ruta_checkpoint, checkpoint):
+    temporal = ruta_checkpoint + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+    os.replace(temporal, ruta_checkpoint)
+
+
+# ===========================================================================
+# IMPORTACIÓN
+# ===========================================================================
+
+def importar_menu_paralelo(sistema, ruta, procesos=None, tamanio_trozo=4 * 2 ** 20,
+                           ruta_errores=None, ruta_checkpoint=None):
+    """
+    Importa el menú de texto `ruta` en `sistema`.
+    - procesos: procesos que convierten los trozos (por defecto, uno por
+      núcleo; con 1 todo ocurre en este proceso)
+    Retorna {'lineas', 'exitosos', 'errores' (cantidad), 'archivo_errores',
+    'reanudado', 'segundos'}.
+    """
+    ruta_errores = ruta_errores or ruta + '.errores'
+    ruta_checkpoint = ruta_checkpoint or ruta + '.checkpoint'
+    procesos = procesos or os.cpu_count() or 1
+    inicio = time.perf_counter()
+
+    checkpoint = _leer_checkpoint(ruta_checkpoint, ruta)
+    reanudado = checkpoint is not None
+    if checkpoint is None:
+        checkpoint = {'archivo': _firma(ruta), 'byte': 0, 'lineas': 0, 'exitosos': 0,
+                      'errores': 0, 'bytes_errores': 0}
+
+    with open(ruta_errores, 'a+b') as archivo_errores:
+        # descartar errores escritos después del último checkpoint
+        archivo_errores.truncate(checkpoint['bytes_errores'])
+        archivo_errores.seek(checkpoint['bytes_errores'])
+
+        # códigos que agregó un trozo interrumpido antes de su checkpoint
+        recuperados = set(checkpoint.pop('en_curso', ()))
+
+        def aplicar(trozo, resultado):
+            num_lineas, filas = resultado
+            primera = checkpoint['lineas']
+            checkpoint['en_curso'] = _codigos_nuevos(sistema.menu, filas) + list(recuperados)
+            _guardar_checkpoint(ruta_checkpoint, checkpoint)
+            exitosos, errores = sistema._importar_filas_menu(filas, recuperados)
+            archivo_errores.write(''.join(f"{primera + posicion}\t{mensaje}\n"
+                                          for posicion, mensaje in errores).encode('utf-8'))
+            archivo_errores.flush()
+            del checkpoint['en_curso']
+            checkpoint['byte'] = trozo[2]
+            checkpoint['lineas'] += num_lineas
+            checkpoint['exitosos'] += exitosos
+            checkpoint['errores'] += len(errores)
+            checkpoint['bytes_errores'] = archivo_errores.tell()
+            _guardar_checkpoint(ruta_checkpoint, checkpoint)
+
+        trozos = _trozos(ruta, checkpoint['byte'], tamanio_trozo)
+        if procesos == 1:
+            for trozo in trozos:
+                aplicar(trozo, procesar_trozo(trozo))
+        else:
+            with multiprocessing.get_context().Pool(procesos) as pool:
+                # a lo sumo dos trozos por proceso en vuelo: memoria acotada
+                en_vuelo = deque()
+                for trozo in trozos:
+                    en_vuelo.append((trozo, pool.apply_async(procesar_trozo, (trozo,))))
+                    if len(en_vuelo) >= 2 * procesos:
+                        trozo_listo, resultado = en_vuelo.popleft()
+                        aplicar(trozo_listo, resultado.get())
+                while en_vuelo:
+                    trozo_listo, resultado = en_vuelo.popleft()
+                    aplicar(trozo_listo, resultado.get())
+
+    if os.path.exists(ruta_checkpoint):
+        os.remove(ruta_checkpoint)
+    return {'lineas': checkpoint['lineas'], 'exitosos': checkpoint['exitosos'],
+            'errores': checkpoint['errores'], 'archivo_errores': ruta_errores,
+            'reanudado': reanudado, 'segundos': round(time.perf_counter() - inicio, 2)}
+
+
+if __name__ == "__main__":
+    import sys
+    import tempfile
+
+    from sistema_restaurante import SistemaRestaurante
+
+    num_platos = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    ruta = os.path.join(tempfile.mkdtemp(), 'menu.txt')
+    with open(ruta, 'w', encoding='utf-8') as f:
+        for i in range(num_platos):
+            f.write(f"SKU{i:07d}|Plato número {i}|Categoría {i % 60}|{2.5 + i % 400 / 4}|{i % 7 != 0:d}\n")
+        f.write("SKU0000001|Duplicado|General|3.0|1\n")
+        f.write("línea sin formato\n")
+
+    inicio = time.perf_counter()
+    serial = SistemaRestaurante().importar_menu(ruta)
+    print(f"importar_menu:          {serial['exitosos']} platos en {time.perf_counter() - inicio:.2f} s")
+    resultado = importar_menu_paralelo(SistemaRestaurante(), ruta)
+    print(f"importar_menu_paralelo: {resultado['exitosos']} platos en {resultado['segundos']} s "
+          f"({os.cpu_count()} CPU); errores: {resultado['errores']} en {resultado['archivo_errores']}")
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Formato binario versionado del menú de SistemaRestaurante.
+
+Pensado para sincronizar menús grandes entre locales: exportar_menu_binario()
+escribe el menú completo o solo los platos que cambiaron después de una
+versión (SistemaRestaurante.cambios_menu), e importar_menu_binario() lo
+aplica con sincronizar_platos leyendo un bloque a la vez, así que la
+memoria no depende del tamaño del archivo.
+
+Archivo:
+- cabecera: MAGICO, formato, tipo (completo/delta), versión desde, versión
+  hasta, cantidad de registros y CRC32 de la cabecera
+- bloques: cabecera del bloque (registros, bytes de datos, CRC32 de los
+  datos) y los datos por columnas: precios (float64), versiones (uint32),
+  largos de código y de nombre e índice de categoría (uint16),
+  disponibilidad (uint8), la tabla de categorías del bloque (cantidad y
+  largos) y al final todos los textos en UTF-8. Los largos se cuentan en
+  caracteres: cada bloque decodifica su texto una sola vez y lo corta.
+- fin: un bloque de 0 registros
+
+Un bloque con CRC incorrecto detiene la importación con ValueError; los
+bloques anteriores ya quedaron aplicados. La sincronización es idempotente:
+basta repetir la importación con un archivo sano. La exportación escribe
+en `ruta + '.tmp'` y lo renombra al terminar: un error no pisa el archivo
+anterior.
+
+Rendimiento (benchmark_restaurante.benchmark_menu): el archivo completo
+ocupa ~8% menos que el texto de exportar_menu, pero importarlo completo no
+es mucho más rápido que importar el texto: el costo lo domina crear el
+dict de cada plato y las estructuras del sistema (ranking, versiones), no
+la lectura. Un menú completo sobre un menú vacío se carga en bloque y queda
+entre un 10% y un 20% por debajo del texto; la ganancia a escala está en los
+deltas, que solo llevan los platos que cambiaron.
+"""
+
+from itertools import accumulate
+import os
+import struct
+import zlib
+
+MAGICO = b'MENUBIN1'
+FORMATO = 1
+COMPLETO, DELTA = 0, 1
+
+# magico, formato, tipo, version_desde, version_hasta, num_registros
+CABECERA = struct.Struct('<8sBBQQI')
+CRC = struct.Struct('<I')
+# num_registros, bytes_datos, crc32 de los datos
+BLOQUE = struct.Struct('<III')
+MAX_LARGO = 0xFFFF
+
+
+# ===========================================================================
+# EXPORTADOR
+# ===========================================================================
+
+def _escribir_bloque(f, filas):
+    categorias = {}
+    precios = []
+    versiones = []
+    largos_codigo = []
+    largos_nombre = []
+    indices_categoria = []
+    disponibles = []
+    textos = []
+    for codigo, info, version in filas:
+        if len(codigo) > MAX_LARGO or len(info['nombre']) > MAX_LARGO or len(info['categoria']) > MAX_LARGO:
+            raise ValueError(f"Plato {codigo}: código, nombre o categoría demasiado largo")
+        precios.append(info['precio'])
+        versiones.append(version)
+        largos_codigo.append(len(codigo))
+        largos_nombre.append(len(info['nombre']))
+        indices_categoria.append(categorias.setdefault(info['categoria'], len(categorias)))
+        disponibles.append(info['disponible'])
+        textos.append(codigo)
+        textos.append(info['nombre'])
+    n = len(filas)
+    datos = b''.join((
+        struct.pack(f'<{n}d', *precios),
+        struct.pack(f'<{n}I', *versiones),
+        struct.pack(f'<{n}H', *largos_codigo),
+        struct.pack(f'<{n}H', *largos_nombre),
+        struct.pack(f'<{n}H', *indices_categoria),
+        struct.pack(f'<{n}B', *disponibles),
+        struct.pack(f'<H{len(categorias)}H', len(categorias), *map(len, categorias)),
+        ''.join(categorias).encode('utf-8'),
+        ''.join(textos).encode('utf-8')
+    ))
+    f.write(BLOQUE.pack(n, len(datos), zlib.crc32(datos)))
+    f.write(datos)
+
+
+def exportar_menu_binario(sistema, ruta, desde_version=None, registros_por_bloque=4096):
+    """
+    Escribe el menú de `sistema` en `ruta`. Con desde_version escribe solo
+    los platos que cambiaron después de esa versión (delta).
+    Retorna {'tipo', 'registros', 'version'}: guardar 'version' para pedir el próximo delta.
+    """
+    if not 1 <= registros_por_bloque <= MAX_LARGO:
+        raise ValueError(f"registros_por_bloque debe estar entre 1 y {MAX_LARGO}")
+    if desde_version is None:
+        tipo, desde_version, codigos = COMPLETO, 0, list(sistema.menu)
+    else:
+        tipo, codigos = DELTA, sistema.cambios_menu(desde_version)
+    version = sistema.version_menu
+    cabecera = CABECERA.pack(MAGICO, FORMATO, tipo, desde_version, version, len(codigos))
+    temporal = ruta + '.tmp'
+    try:
+        with open(temporal, 'wb') as f:
+            f.write(cabecera)
+            f.write(CRC.pack(zlib.crc32(cabecera)))
+            for k in range(0, len(codigos), registros_por_bloque):
+                _escribir_bloque(f, [(codigo, sistema.menu[codigo], sistema.versiones_plato[codigo])
+                                     for codigo in codigos[k:k + registros_por_bloque]])
+            f.write(BLOQUE.pack(0, 0, 0))
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+    return {'tipo': 'completo' if tipo == COMPLETO else 'delta', 'registros': len(codigos), 'version': version}
+
+
+# ===========================================================================
+# LECTOR
+# ===========================================================================
+
+def _leer(f, cantidad):
+    datos = f.read(cantidad)
+    if len(datos) != cantidad:
+        raise ValueError("Archivo de menú truncado")
+    return datos
+
+
+def leer_cabecera(f):
+    datos = _leer(f, CABECERA.size)
+    if zlib.crc32(datos) != CRC.unpack(_leer(f, CRC.size))[0]:
+        raise ValueError("Cabecera del menú corrupta (CRC)")
+    magico, formato, tipo, desde, hasta, registros = CABECERA.unpack(datos)
+    if magico != MAGICO or formato != FORMATO:
+        raise ValueError("No es un menú binario compatible")
+    return {'tipo': 'completo' if tipo == COMPLETO else 'delta', 'version_desde': desde,
+            'version_hasta': hasta, 'registros': registros}
+
+
+def _cortar(texto, inicio, largos):
+    fines = list(accumulate(largos, initial=inicio))
+    return [texto[i:j] for i, j in zip(fines, fines[1:])], fines[-1]
+
+
+def leer_bloques(f):
+    """Itera los bloques como listas de (codigo, nombre, categoria, precio, disponible, version)."""
+    numero = 0
+    while True:
+        n, largo, crc = BLOQUE.unpack(_leer(f, BLOQUE.size))
+        if n == 0:
+            return
+        numero += 1
+        datos = _leer(f, largo)
+        if zlib.crc32(datos) != crc:
+            raise ValueError(f"Bloque {numero} del menú corrupto (CRC)")
+        precios = struct.unpack_from(f'<{n}d', datos, 0)
+        versiones = struct.unpack_from(f'<{n}I', datos, 8 * n)
+        largos_codigo = struct.unpack_from(f'<{n}H', datos, 12 * n)
+        largos_nombre = struct.unpack_from(f'<{n}H', datos, 14 * n)
+        indices_categoria = struct.unpack_from(f'<{n}H', datos, 16 * n)
+        disponibles = datos[18 * n:19 * n]
+        num_categorias, = struct.unpack_from('<H', datos, 19 * n)
+        largos_categoria = struct.unpack_from(f'<{num_categorias}H', datos, 19 * n + 2)
+        texto = datos[19 * n + 2 + 2 * num_categorias:].decode('utf-8')
+        categorias, posicion = _cortar(texto, 0, largos_categoria)
+        # códigos y nombres están intercalados: codigo0 nombre0 codigo1 nombre1 ...
+        intercalados = [None] * (2 * n)
+        intercalados[::2] = largos_codigo
+        intercalados[1::2] = largos_nombre
+        partes, _ = _cortar(texto, posicion, intercalados)
+        yield list(zip(partes[::2], partes[1::2], map(categorias.__getitem__, indices_categoria),
+                       precios, map(bool, disponibles), versiones))
+
+
+def importar_menu_binario(sistema, ruta):
+    """
+    Aplica el menú (completo o delta) de `ruta` sobre `sistema`.
+    Retorna la cabecera con 'nuevos', 'actualizados' e 'iguales'.
+
+    Un menú completo sobre un sistema con el menú vacío se carga en bloque
+    (SistemaRestaurante._agregar_platos_nuevos), sin la comparación fila por
+    fila de sincronizar_platos.
+    """
+    resultado = {'nuevos': 0, 'actualizados': 0, 'iguales': 0}
+    with open(ruta, 'rb') as f:
+        cabecera = leer_cabecera(f)
+        en_bloque = cabecera['tipo'] == 'completo' and not sistema.menu
+        leidos = 0
+        for bloque in leer_bloques(f):
+            filas = [fila[:5] for fila in bloque]
+            conteo = sistema._agregar_platos_nuevos(filas) if en_bloque else None
+            if conteo is None:
+                conteo = sistema.sincronizar_platos(filas)
+            for clave in resultado:
+                resultado[clave] += conteo[clave]
+            leidos += len(bloque)
+    if leidos != cabecera['registros']:
+        raise ValueError(f"Se esperaban {cabecera['registros']} registros y se leyeron {leidos}")
+    return {**cabecera, **resultado}
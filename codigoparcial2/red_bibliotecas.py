@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+"""
+Red de sucursales: varios SistemaBiblioteca detrás de un coordinador.
+
+RedBibliotecas reparte el catálogo y los usuarios entre sucursales (por
+hash del ISBN y del id de usuario, o en la sucursal indicada) y mantiene
+un índice fusionado de disponibilidad {isbn: {sucursal: copias}} con los
+valores que cada sucursal informa después de cada operación. Con ese
+índice responde "¿qué sucursales tienen copias de X?" sin consultarlas y
+envía cada préstamo a la sucursal adecuada: la del usuario si tiene
+copias, si no la que tenga más.
+
+Cada sucursal es un SistemaBiblioteca independiente, así que el límite de
+préstamos y la regla de multas se aplican por sucursal. Un usuario se
+registra en su sucursal de origen y, de forma perezosa, en las demás la
+primera vez que pide un libro allí.
+
+Con procesos=True cada sucursal corre en su propio proceso
+(multiprocessing) y las operaciones en lote se envían a todas las
+sucursales antes de esperar las respuestas, para que trabajen en paralelo.
+Los id de préstamo de la red tienen la forma "S<sucursal>:<id_prestamo>".
+"""
+
+from collections import deque
+import multiprocessing
+import threading
+import zlib
+
+from sistema_biblioteca import LibroNoEncontrado, SistemaBiblioteca, UsuarioNoRegistrado
+
+
+def _hash(clave):
+    return zlib.crc32(clave.encode('utf-8'))
+
+
+# ===========================================================================
+# SUCURSAL
+# ===========================================================================
+
+class Sucursal:
+    """
+    Una sucursal de la red. Cada operación retorna (resultado, disponibilidad),
+    donde disponibilidad es {isbn: copias_disponibles} de los libros tocados.
+    """
+
+    def __init__(self, **opciones_sistema):
+        self.sistema = SistemaBiblioteca(**opciones_sistema)
+
+    def _disponibilidad(self, isbns):
+        catalogo = self.sistema.catalogo
+        return {isbn: catalogo[isbn]['copias_disponibles'] for isbn in isbns if isbn in catalogo}
+
+    def agregar_libros(self, libros):
+        """libros: lista de (isbn, titulo, autor, anio, categoria, copias)."""
+        resultados = []
+        for libro in libros:
+            try:
+                self.sistema.agregar_libro(*libro)
+                resultados.append(None)
+            except (KeyError, ValueError) as e:
+                resultados.append(e)
+        return resultados, self._disponibilidad(libro[0] for libro in libros)
+
+    def registrar_usuarios(self, usuarios):
+        """usuarios: lista de (id_usuario, nombre, email); ignora los ya registrados."""
+        for id_usuario, nombre, email in usuarios:
+            if id_usuario not in self.sistema.usuarios:
+                self.sistema.registrar_usuario(id_usuario, nombre, email)
+        return None, {}
+
+    def prestar_lote(self, operaciones, usuarios_nuevos=()):
+        self.registrar_usuarios(usuarios_nuevos)
+        resultados = self.sistema.prestar_lote(operaciones)
+        return resultados, self._disponibilidad(isbn for isbn, _ in operaciones)
+
+    def devolver_lote(self, ids_prestamo):
+        prestamos = self.sistema.prestamos
+        isbns = [prestamos[i]['isbn'] for i in ids_prestamo if i in prestamos]
+        resultados = self.sistema.devolver_lote(ids_prestamo)
+        return resultados, self._disponibilidad(isbns)
+
+    def renovar_prestamo(self, id_prestamo):
+        return self.sistema.renovar_prestamo(id_prestamo), {}
+
+    def buscar_libros(self, criterio, valor, categoria):
+        return self.sistema.buscar_libros(criterio, valor, categoria), {}
+
+    def obtener_estado_usuario(self, id_usuario):
+        return self.sistema.obtener_estado_usuario(id_usuario), {}
+
+
+def _atender(sucursal, metodo, args):
+    try:
+        return True, getattr(sucursal, metodo)(*args)
+    except Exception as e:
+        return False, e
+
+
+def _servir_sucursal(conexion, opciones_sistema):
+    """Bucle del proceso de una sucursal: (metodo, args) -> (ok, valor)."""
+    sucursal = Sucursal(**opciones_sistema)
+    while True:
+        mensaje = conexion.recv()
+        if mensaje is None:
+            break
+        conexion.send(_atender(sucursal, *mensaje))
+    conexion.close()
+
+
+class _SucursalLocal:
+    """Sucursal en el mismo proceso, con la interfaz enviar/recibir del proceso."""
+
+    def __init__(self, opciones_sistema):
+        self.sucursal = Sucursal(**opciones_sistema)
+        self._respuestas = deque()
+
+    def enviar(self, metodo, *args):
+        self._respuestas.append(_atender(self.sucursal, metodo, args))
+
+    def recibir(self):
+        ok, valor = self._respuestas.popleft()
+        if not ok:
+            raise valor
+        return valor
+
+    def cerrar(self):
+        pass
+
+
+class _SucursalProceso:
+    """Sucursal en un proceso aparte, conectada por un Pipe."""
+
+    def __init__(self, opciones_sistema, contexto):
+        self._conexion, remota = contexto.Pipe()
+        self._proceso = contexto.Process(target=_servir_sucursal, args=(remota, opciones_sistema), daemon=True)
+        self._proceso.start()
+        remota.close()
+
+    def enviar(self, metodo, *args):
+        self._conexion.send((metodo, args))
+
+    def recibir(self):
+        ok, valor = self._conexion.recv()
+        if not ok:
+            raise valor
+        return valor
+
+    def cerrar(self):
+        self._conexion.send(None)
+        self._proceso.join()
+        self._conexion.close()
+
+
+# ===========================================================================
+# COORDINADOR
+# ===========================================================================
+
+class RedBibliotecas:
+    """
+    Coordinador de `num_sucursales` sucursales.
+    - procesos: si True, cada sucursal corre en su propio proceso.
+    - opciones_sistema: se pasan a cada SistemaBiblioteca.
+    """
+
+    def __init__(self, num_sucursales=4, procesos=False, **opciones_sistema):
+        if num_sucursales < 1:
+            raise ValueError("Debe haber al menos una sucursal.")
+        self.num_sucursales = num_sucursales
+        if procesos:
+            contexto = multiprocessing.get_context()
+            self._sucursales = [_SucursalProceso(opciones_sistema, contexto) for _ in range(num_sucursales)]
+        else:
+            self._sucursales = [_SucursalLocal(opciones_sistema) for _ in range(num_sucursales)]
+        self._disponibilidad = {}   # {isbn: {sucursal: copias_disponibles}}
+        self._usuarios = {}         # {id_usuario: (nombre, email, sucursal de origen)}
+        self._registrados = set()   # {(sucursal, id_usuario)}
+        self._lock = threading.Lock()
+
+    def cerrar(self):
+        for sucursal in self._sucursales:
+            sucursal.cerrar()
+
+    def sucursal_de_libro(self, isbn):
+        return _hash(isbn) % self.num_sucursales
+
+    def sucursal_de_usuario(self, id_usuario):
+        return _hash(id_usuario) % self.num_sucursales
+
+    def _aplicar(self, envios, confirmada=None):
+        """
+        Envía {sucursal: (metodo, args)} a todas las sucursales y luego
+        recoge las respuestas; actualiza el índice de disponibilidad y llama
+        a confirmada(sucursal) por cada una que respondió sin error.
+        Si alguna falla, lanza su excepción después de recibir el resto; las
+        sucursales que sí respondieron ya aplicaron la operación, así que sus
+        resultados viajan en `error.respuestas` ({sucursal: resultado}) y las
+        que fallaron en `error.fallidas` ({sucursal: excepción}).
+        """
+        for indice, (metodo, args) in envios.items():
+            self._sucursales[indice].enviar(metodo, *args)
+        respuestas = {}
+        fallidas = {}
+        for indice in envios:
+            try:
+                resultado, disponibilidad = self._sucursales[indice].recibir()
+            except Exception as e:
+                fallidas[indice] = e
+                continue
+            for isbn, copias in disponibilidad.items():
+                self._disponibilidad.setdefault(isbn, {})[indice] = copias
+            respuestas[indice] = resultado
+            if confirmada is not None:
+                confirmada(indice)
+        if fallidas:
+            error = next(iter(fallidas.values()))
+            error.respuestas = respuestas
+            error.fallidas = fallidas
+            raise error
+        return respuestas
+
+    def _aplicar_lote(self, envios, confirmada=None):
+        """
+        Como _aplicar, pero no lanza: retorna {sucursal: resultados} donde
+        cada sucursal que falló queda con su excepción, para que los lotes
+        informen por operación lo que sí se aplicó.
+        """
+        try:
+            return self._aplicar(envios, confirmada)
+        except Exception as e:
+            if not hasattr(e, 'fallidas'):
+                raise
+            return {**e.respuestas, **e.fallidas}
+
+    @staticmethod
+    def _repartir(resultados, posiciones, respuesta):
+        """Copia la respuesta de una sucursal a sus posiciones del lote."""
+        if isinstance(respuesta, Exception):
+            for i in posiciones:
+                resultados[i] = respuesta
+        else:
+            for i, resultado in zip(posiciones, respuesta):
+                resultados[i] = resultado
+
+    @staticmethod
+    def _separar_id(id_prestamo):
+        try:
+            sucursal, id_local = id_prestamo.split(':', 1)
+            return int(sucursal[1:]), id_local
+        except (AttributeError, ValueError):
+            raise KeyError("Préstamo no encontrado.") from None
+
+    # ---------------------------
+    # CATÁLOGO Y USUARIOS
+    # ---------------------------
+
+    def agregar_libros(self, libros, sucursal=None):
+        """
+        libros: lista de (isbn, titulo, autor, anio, categoria, copias).
+        Cada libro va a `sucursal` o a la que le corresponde por su ISBN.
+        Retorna una lista paralela con None o la excepción de cada libro.
+        """
+        libros = list(libros)
+        with self._lock:
+            por_sucursal = {}
+            for i, libro in enumerate(libros):
+                indice = self.sucursal_de_libro(libro[0]) if sucursal is None else sucursal
+                por_sucursal.setdefault(indice, ([], []))
+                por_sucursal[indice][0].append(i)
+                por_sucursal[indice][1].append(tuple(libro))
+            respuestas = self._aplicar_lote({k: ('agregar_libros', (lote,)) for k, (_, lote) in por_sucursal.items()})
+            resultados = [None] * len(libros)
+            for indice, (posiciones, _) in por_sucursal.items():
+                self._repartir(resultados, posiciones, respuestas[indice])
+            return resultados
+
+    def agregar_libro(self, isbn, titulo, autor, anio, categoria, copias, sucursal=None):
+        error = self.agregar_libros([(isbn, titulo, autor, anio, categoria, copias)], sucursal)[0]
+        if error is not None:
+            raise error
+
+    def registrar_usuarios(self, usuarios):
+        """usuarios: lista de (id_usuario, nombre, email); cada uno en su sucursal de origen."""
+        usuarios = list(usuarios)
+        with self._lock:
+            por_sucursal = {}
+            vistos = set()
+            for id_usuario, nombre, email in usuarios:
+                if id_usuario in self._usuarios or id_usuario in vistos:
+                    raise ValueError("Usuario ya registrado.")
+                vistos.add(id_usuario)
+                if not nombre or '@' not in email or '.' not in email:
+                    raise ValueError("Datos inválidos del usuario.")
+                por_sucursal.setdefault(self.sucursal_de_usuario(id_usuario), []).append((id_usuario, nombre, email))
+            def confirmada(indice):
+                # si otra sucursal falla, los de esta ya quedaron registrados
+                for id_usuario, nombre, email in por_sucursal[indice]:
+                    self._usuarios[id_usuario] = (nombre, email, indice)
+                    self._registrados.add((indice, id_usuario))
+
+            self._aplicar({k: ('registrar_usuarios', (lote,)) for k, lote in por_sucursal.items()}, confirmada)
+
+    def registrar_usuario(self, id_usuario, nombre, email):
+        self.registrar_usuarios([(id_usuario, nombre, email)])
+
+    def sucursales_con_copias(self, isbn):
+        """[(sucursal, copias_disponibles)] con copias, de mayor a menor disponibilidad."""
+        copias = self._disponibilidad.get(isbn)
+        if copias is None:
+            raise LibroNoEncontrado(isbn)
+        return sorted(((k, n) for k, n in copias.items() if n > 0), key=lambda par: (-par[1], par[0]))
+
+    def buscar_libros(self, criterio='titulo', valor='', categoria=None):
+        """Búsqueda en todas las sucursales; cada libro aparece una vez."""
+        with self._lock:
+            respuestas = self._aplicar({k: ('buscar_libros', (criterio, valor, categoria))
+                                        for k in range(self.num_sucursales)})
+        vistos = set()
+        resultados = []
+        for indice in range(self.num_sucursales):
+            for libro in respuestas[indice]:
+                if libro['isbn'] not in vistos:
+                    vistos.add(libro['isbn'])
+                    resultados.append(libro)
+        return resultados
+
+    # ---------------------------
+    # PRÉSTAMOS
+    # ---------------------------
+
+    def _elegir_sucursal(self, copias, origen):
+        if copias.get(origen, 0) > 0:
+            return origen
+        indice = max(copias, key=copias.get)
+        if copias[indice] <= 0 and origen in copias:
+            return origen
+        return indice
+
+    def prestar_lote(self, operaciones):
+        """
+        Presta varios libros; operaciones: iterable de (isbn, id_usuario).
+        Retorna una lista paralela con el id de préstamo de la red o la
+        excepción correspondiente (como SistemaBiblioteca.prestar_lote). Si
+        una sucursal falla, sus operaciones reciben esa excepción y las de
+        las demás conservan su préstamo.
+        """
+        operaciones = list(operaciones)
+        resultados = [None] * len(operaciones)
+        with self._lock:
+            por_sucursal = {}
+            # copias tomadas por este lote {(isbn, sucursal): n} y usuarios
+            # por registrar; el índice y _registrados solo cambian con la
+            # respuesta de cada sucursal
+            tomadas = {}
+            por_registrar = set()
+            for i, (isbn, id_usuario) in enumerate(operaciones):
+                usuario = self._usuarios.get(id_usuario)
+                if usuario is None:
+                    resultados[i] = UsuarioNoRegistrado(id_usuario)
+                    continue
+                copias = self._disponibilidad.get(isbn)
+                if not copias:
+                    resultados[i] = LibroNoEncontrado(isbn)
+                    continue
+                copias = {k: n - tomadas.get((isbn, k), 0) for k, n in copias.items()}
+                indice = self._elegir_sucursal(copias, usuario[2])
+                if copias[indice] > 0:
+                    tomadas[(isbn, indice)] = tomadas.get((isbn, indice), 0) + 1
+                lote = por_sucursal.setdefault(indice, ([], [], []))
+                lote[0].append(i)
+                lote[1].append((isbn, id_usuario))
+                if (indice, id_usuario) not in self._registrados and (indice, id_usuario) not in por_registrar:
+                    por_registrar.add((indice, id_usuario))
+                    lote[2].append((id_usuario, usuario[0], usuario[1]))
+
+            def confirmada(indice):
+                self._registrados.update((indice, id_usuario) for id_usuario, _, _ in por_sucursal[indice][2])
+
+            respuestas = self._aplicar_lote({k: ('prestar_lote', (ops, nuevos))
+                                             for k, (_, ops, nuevos) in por_sucursal.items()}, confirmada)
+            for indice, (posiciones, _, _) in por_sucursal.items():
+                respuesta = respuestas[indice]
+                if not isinstance(respuesta, Exception):
+                    respuesta = [f"S{indice}:{r}" if isinstance(r, str) else r for r in respuesta]
+                self._repartir(resultados, posiciones, respuesta)
+        return resultados
+
+    def prestar_libro(self, isbn, id_usuario):
+        resultado = self.prestar_lote([(isbn, id_usuario)])[0]
+        if isinstance(resultado, Exception):
+            raise resultado
+        return resultado
+
+    def devolver_lote(self, ids_prestamo):
+        """Devuelve varios préstamos de la red; retorna una lista paralela de resultados o excepciones."""
+        ids_prestamo = list(ids_prestamo)
+        resultados = [None] * len(ids_prestamo)
+        with self._lock:
+            por_sucursal = {}
+            for i, id_prestamo in enumerate(ids_prestamo):
+                try:
+                    indice, id_local = self._separar_id(id_prestamo)
+                    if not 0 <= indice < self.num_sucursales:
+                        raise KeyError("Préstamo no encontrado.")
+                except KeyError as e:
+                    resultados[i] = e
+                    continue
+                lote = por_sucursal.setdefault(indice, ([], []))
+                lote[0].append(i)
+                lote[1].append(id_local)
+            respuestas = self._aplicar_lote({k: ('devolver_lote', (ids,)) for k, (_, ids) in por_sucursal.items()})
+            for indice, (posiciones, _) in por_sucursal.items():
+                self._repartir(resultados, posiciones, respuestas[indice])
+        return resultados
+
+    def devolver_libro(self, id_prestamo):
+        resultado = self.devolver_lote([id_prestamo])[0]
+        if isinstance(resultado, Exception):
+            raise resultado
+        return resultado
+
+    def renovar_prestamo(self, id_prestamo):
+        indice, id_local = self._separar_id(id_prestamo)
+        with self._lock:
+            return self._aplicar({indice: ('renovar_prestamo', (id_local,))})[indice]
+
+    def obtener_estado_usuario(self, id_usuario):
+        """Estado del usuario en cada sucursal donde está registrado: {sucursal: estado}."""
+        if id_usuario not in self._usuarios:
+            raise UsuarioNoRegistrado(id_usuario)
+        with self._lock:
+            sucursales = sorted(k for k, u in self._registrados if u == id_usuario)
+            return self._aplicar({k: ('obtener_estado_usuario', (id_usuario,)) for k in sucursales})
+
+
+if __name__ == "__main__":
+    red = RedBibliotecas(num_sucursales=3)
+    red.agregar_libro("9781234567897", "Cien años de soledad", "Gabriel Garcia Marquez", 1967, "Novela", 2, sucursal=0)
+    red.agregar_libro("9781234567897", "Cien años de soledad", "Gabriel Garcia Marquez", 1967, "Novela", 1, sucursal=2)
+    red.agregar_libro("9781234567898", "El Principito", "Antoine de Saint-Exupéry", 1943, "Infantil", 1)
+    red.registrar_usuario("u1", "Ana Perez", "ana@example.com")
+    red.registrar_usuario("u2", "Luis Gomez", "luis@example.com")
+
+    print("Sucursales con 'Cien años de soledad':", red.sucursales_con_copias("9781234567897"))
+    p1 = red.prestar_libro("9781234567897", "u1")
+    p2 = red.prestar_libro("9781234567897", "u2")
+    print("Préstamos:", p1, p2)
+    print("Después de prestar:", red.sucursales_con_copias("9781234567897"))
+    print("Devolución:", red.devolver_libro(p1)['mensaje'])
+    print("Después de devolver:", red.sucursales_con_copias("9781234567897"))
+    print("Estado de u2 por sucursal:", red.obtener_estado_usuario("u2"))
+    red.cerrar()
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Front-end asyncio para SistemaBiblioteca.
+
+- AsyncSistemaBiblioteca: fachada con las operaciones como corrutinas.
+  Las búsquedas idénticas concurrentes comparten un único cálculo y los
+  préstamos que llegan en la misma vuelta del event loop se aplican juntos
+  con prestar_lote. Un semáforo limita las operaciones en curso.
+  esperar_reserva() se resuelve con los eventos del sistema, sin sondeo.
+- servir(): servidor JSON-lines sobre un socket Unix local.
+- generar_carga(): cliente de carga que mide latencias p50/p99.
+
+Protocolo (una línea JSON por mensaje):
+  petición:  {"id": 1, "op": "prestar_libro", "args": {"isbn": "...", "id_usuario": "..."}}
+  respuesta: {"id": 1, "ok": true, "resultado": ...}
+             {"id": 1, "ok": false, "error": "LibroNoDisponible", "mensaje": "..."}
+"""
+
+import asyncio
+import json
+import time
+
+from estadisticas import percentil
+
+LIMITE_LINEA = 2 ** 24   # bytes máximos por mensaje JSON
+
+OPERACIONES = ('buscar_libros', 'prestar_libro', 'devolver_libro',
+               'renovar_prestamo', 'obtener_estado_usuario',
+               'reservar_libro', 'cancelar_reserva', 'esperar_reserva')
+EVENTOS_RESERVA = ('reserva_asignada', 'reserva_cancelada', 'reserva_vencida')
+
+
+# ===========================================================================
+# FACHADA ASÍNCRONA
+# ===========================================================================
+
+class AsyncSistemaBiblioteca:
+    """
+    Expone un SistemaBiblioteca como corrutinas.
+
+    Las operaciones que modifican estado se ejecutan en el executor por
+    defecto (pueden hacer fsync si el sistema tiene almacenamiento
+    persistente); SistemaBiblioteca ya es seguro entre hilos.
+
+    esperar_reserva() suscribe la fachada a los eventos del sistema; cerrar()
+    la desuscribe (también se desuscribe sola si su event loop ya terminó).
+    """
+
+    def __init__(self, sistema, max_concurrencia=256):
+        self.sistema = sistema
+        self._semaforo = asyncio.Semaphore(max_concurrencia)
+        self._busquedas = {}          # (criterio, valor, categoria) -> Future
+        self._prestamos_pendientes = []
+        self._esperas = {}            # id_reserva -> [Future]
+        self._loop = None             # loop de esperar_reserva mientras está suscrita
+
+    async def _ejecutar(self, funcion, *args):
+        async with self._semaforo:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, funcion, *args)
+
+    async def buscar_libros(self, criterio='titulo', valor='', categoria=None):
+        clave = (criterio, valor, categoria)
+        futuro = self._busquedas.get(clave)
+        if futuro is None:
+            futuro = asyncio.ensure_future(
+                self._ejecutar(self.sistema.buscar_libros, criterio, valor, categoria))
+            self._busquedas[clave] = futuro
+            futuro.add_done_callback(lambda _: self._busquedas.pop(clave, None))
+        resultado = await asyncio.shield(futuro)
+        # cada llamador recibe su propia copia del resultado compartido
+        return [dict(libro) for libro in resultado]
+
+    async def prestar_libro(self, isbn, id_usuario):
+        loop = asyncio.get_running_loop()
+        futuro = loop.create_future()
+        if not self._prestamos_pendientes:
+            loop.call_soon(self._despachar_prestamos)
+        self._prestamos_pendientes.append((isbn, id_usuario, futuro))
+        return await futuro
+
+    def _despachar_prestamos(self):
+        pendientes, self._prestamos_pendientes = self._prestamos_pendientes, []
+        asyncio.ensure_future(self._aplicar_prestamos(pendientes))
+
+    async def _aplicar_prestamos(self, pendientes):
+        operaciones = [(isbn, id_usuario) for isbn, id_usuario, _ in pendientes]
+        try:
+            resultados = await self._ejecutar(self.sistema.prestar_lote, operaciones)
+        except Exception as e:
+            resultados = [e] * len(pendientes)
+        for (_, _, futuro), resultado in zip(pendientes, resultados):
+            if futuro.done():
+                continue
+            if isinstance(resultado, Exception):
+                futuro.set_exception(resultado)
+            else:
+                futuro.set_result(resultado)
+
+    async def devolver_libro(self, id_prestamo):
+        return await self._ejecutar(self.sistema.devolver_libro, id_prestamo)
+
+    async def renovar_prestamo(self, id_prestamo):
+        return await self._ejecutar(self.sistema.renovar_prestamo, id_prestamo)
+
+    async def obtener_estado_usuario(self, id_usuario):
+        return self.sistema.obtener_estado_usuario(id_usuario)
+
+    async def reservar_libro(self, isbn, id_usuario):
+        return await self._ejecutar(self.sistema.reservar_libro, isbn, id_usuario)
+
+    async def cancelar_reserva(self, id_reserva):
+        return await self._ejecutar(self.sistema.cancelar_reserva, id_reserva)
+
+    async def esperar_reserva(self, id_reserva, timeout=None):
+        """Espera a que la reserva deje de estar en espera; retorna su estado."""
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+            self.sistema.suscribir(self._on_evento_reserva)
+        if id_reserva not in self.sistema.reservas:
+            raise KeyError("Reserva no encontrada.")
+        if self.sistema.reservas[id_reserva]['estado'] == 'en_espera':
+            futuro = self._loop.create_future()
+            self._esperas.setdefault(id_reserva, []).append(futuro)
+            try:
+                await asyncio.wait_for(futuro, timeout)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                esperas = self._esperas.get(id_reserva)
+                if esperas and futuro in esperas:
+                    esperas.remove(futuro)
+                    if not esperas:
+                        del self._esperas[id_reserva]
+        return self.sistema.reservas[id_reserva]['estado']
+
+    def _on_evento_reserva(self, evento, id_reserva):
+        # puede llamarse desde los hilos del executor
+        if evento not in EVENTOS_RESERVA:
+            return
+        loop = self._loop
+        if loop is None:
+            return
+        if loop.is_closed():
+            # el event loop terminó sin cerrar(): se deja de escuchar
+            self.cerrar()
+            return
+        try:
+            loop.call_soon_threadsafe(self._resolver_esperas, id_reserva)
+        except RuntimeError:
+            # el loop se cerró entre la comprobación y la llamada
+            self.cerrar()
+
+    def _resolver_esperas(self, id_reserva):
+        for futuro in self._esperas.pop(id_reserva, []):
+            if not futuro.done():
+                futuro.set_result(None)
+
+    def cerrar(self):
+        """Deja de escuchar los eventos del sistema (si esperar_reserva se usó)."""
+        if self._loop is not None:
+            self._loop = None
+            try:
+                self.sistema.desuscribir(self._on_evento_reserva)
+            except ValueError:
+                pass
+
+
+# ===========================================================================
+# SERVIDOR JSON-LINES
+# ===========================================================================
+
+def _a_json(mensaje):
+    return (json.dumps(mensaje, default=str, ensure_ascii=False) + "\n").encode('utf-8')
+
+
+async def _atender_peticion(fachada, linea):
+    id_peticion = None
+    try:
+        peticion = json.loads(linea)
+        id_peticion = peticion.get('id')
+        operacion = peticion.get('op')
+        if operacion not in OPERACIONES:
+            raise ValueError(f"Operación desconocida: {operacion}")
+        resultado = await getattr(fachada, operacion)(**peticion.get('args', {}))
+        return {'id': id_peticion, 'ok': True, 'resultado': resultado}
+    except Exception as e:
+        return {'id': id_peticion, 'ok': False,
+                'error': type(e).__name__, 'mensaje': str(e)}
+
+
+async def servir(sistema, ruta_socket, max_pendientes_por_conexion=64, max_concurrencia=256):
+    """
+    Inicia el servidor en un socket Unix y retorna el asyncio.Server.
+
+    Cada conexión puede encadenar peticiones sin esperar respuesta; cuando
+    tiene max_pendientes_por_conexion en curso se deja de leer el socket
+    (contrapresión) hasta que alguna termina.
+    """
+    fachada = AsyncSistemaBiblioteca(sistema, max_concurrencia)
+
+    async def atender_conexion(reader, writer):
+        cupos = asyncio.Semaphore(max_pendientes_por_conexion)
+        tareas = set()
+
+        async def responder(linea):
+            try:
+                respuesta = await _atender_peticion(fachada, linea)
+                writer.write(_a_json(respuesta))
+                await writer.drain()
+            except ConnectionError:
+                pass
+            finally:
+                cupos.release()
+
+        try:
+            while True:
+                await cupos.acquire()
+                linea = await reader.readline()
+                if not linea:
+                    cupos.release()
+                    break
+                tarea = asyncio.ensure_future(responder(linea))
+                tareas.add(tarea)
+                tarea.add_done_callback(tareas.discard)
+            if tareas:
+                await asyncio.gather(*tareas)
+        finally:
+            writer.close()
+
+    return await asyncio.start_unix_server(atender_conexion, path=ruta_socket,
+                                           limit=LIMITE_LINEA, backlog=4096)
+
+
+# ===========================================================================
+# GENERADOR DE CARGA
+# ===========================================================================
+
+async def generar_carga(ruta_socket, peticiones, clientes=100, en_vuelo_por_cliente=8):
+    """
+    Abre `clientes` conexiones y reparte `peticiones` (lista de dicts
+    {'op', 'args'}) entre ellas, con hasta en_vuelo_por_cliente peticiones
+    encadenadas por conexión. Retorna estadísticas de latencia en ms.
+    """
+    latencias = []
+    errores = 0
+
+    async def cliente(lote):
+        nonlocal errores
+        reader, writer = await asyncio.open_unix_connection(ruta_socket, limit=LIMITE_LINEA)
+        enviados = {}
+        cupos = asyncio.Semaphore(en_vuelo_por_cliente)
+
+        async def leer():
+            nonlocal errores
+            for _ in range(len(lote)):
+                respuesta = json.loads(await reader.readline())
+                latencias.append((time.perf_counter() - enviados.pop(respuesta['id'])) * 1000)
+                if not respuesta['ok']:
+                    errores += 1
+                cupos.release()
+
+        lector = asyncio.ensure_future(leer())
+        for i, peticion in enumerate(lote):
+            await cupos.acquire()
+            enviados[i] = time.perf_counter()
+            writer.write(_a_json({'id': i, **peticion}))
+            await writer.drain()
+        await lector
+        writer.close()
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente(peticiones[c::clientes]) for c in range(clientes)))
+    duracion = time.perf_counter() - inicio
+
+    latencias.sort()
+    return {
+        'peticiones': len(latencias),
+        'errores': errores,
+        'por_segundo': round(len(latencias) / duracion, 1),
+        'p50_ms': round(percentil(latencias, 50), 3),
+        'p99_ms': round(percentil(latencias, 99), 3)
+    }
+
+
+# ===========================================================================
+# DEMO: SERVIDOR + CARGA EN EL MISMO PROCESO
+# ===========================================================================
+
+if __name__ == "__main__":
+    import os
+    import random
+    import tempfile
+
+    from sistema_biblioteca import SistemaBiblioteca
+
+    async def demo():
+        sistema = SistemaBiblioteca(limite_prestamos=50)
+        for i in range(2000):
+            sistema.agregar_libro(f"978{i:010d}", f"Libro {i}", f"Autor {i % 50}", 2000, "General", 20)
+        for i in range(500):
+            sistema.registrar_usuario(f"u{i}", f"Usuario {i}", f"u{i}@example.com")
+
+        ruta = os.path.join(tempfile.mkdtemp(), "biblioteca.sock")
+        servidor = await servir(sistema, ruta)
+
+        peticiones = []
+        for _ in range(20000):
+            if random.random() < 0.6:
+                peticiones.append({'op': 'buscar_libros',
+                                   'args': {'criterio': 'titulo', 'valor': f"libro {random.randrange(1000, 2000)}",
+                                            'categoria': 'General'}})
+            elif random.random() < 0.5:
+                peticiones.append({'op': 'prestar_libro',
+                                   'args': {'isbn': f"978{random.randrange(2000):010d}",
+                                            'id_usuario': f"u{random.randrange(500)}"}})
+            else:
+                peticiones.append({'op': 'obtener_estado_usuario',
+                                   'args': {'id_usuario': f"u{random.randrange(500)}"}})
+
+        print("=" * 70)
+        print(" CARGA SOBRE EL SERVIDOR ASYNCIO DE BIBLIOTECA")
+        print("=" * 70)
+        print(await generar_carga(ruta, peticiones, clientes=50, en_vuelo_por_cliente=4))
+        servidor.close()
+        await servidor.wait_closed()
+
+    asyncio.run(demo())
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Simulador de eventos discretos para SistemaBiblioteca.
+
+El sistema recibe un RelojSimulado (parámetro `reloj`), así que el tiempo
+solo avanza cuando el simulador lo mueve: un año de préstamos se recorre
+en segundos. Cada usuario sintético visita la biblioteca cada cierto
+tiempo (distribución exponencial), pide un libro (los primeros ISBN son
+los más populares), lo lee unos días, a veces renueva, lo devuelve y paga
+la multa si la hubo. Una vez al día se hace el corte de multas.
+
+El reporte incluye el rendimiento (operaciones por segundo real), la
+contención de disponibilidad (día con la mayor tasa de rechazos por falta
+de copias y libros más disputados) y la distribución de multas.
+
+Uso: python simulador_biblioteca.py [num_usuarios] [dias]
+"""
+
+from collections import Counter
+from datetime import datetime, timedelta
+import heapq
+import random
+import time
+
+from estadisticas import percentil
+from sistema_biblioteca import LibroNoDisponible, LimitePrestamosExcedido, PrestamoVencido, SistemaBiblioteca
+
+# tipos de evento, en el orden en que se atienden dentro del mismo instante
+CORTE, DEVOLUCION, RENOVACION, VISITA = range(4)
+RANGOS_MULTA = ((1, 3), (4, 7), (8, 14), (15, 30), (31, None))
+
+
+class RelojSimulado:
+    """
+    Reloj manual para SistemaBiblioteca(reloj=...): retorna siempre el
+    mismo instante hasta que se llama a avanzar() o avanzar_a().
+    """
+
+    def __init__(self, inicio=None):
+        self.ahora = inicio or datetime(2025, 1, 1)
+
+    def __call__(self):
+        return self.ahora
+
+    def avanzar(self, delta):
+        self.ahora += delta
+
+    def avanzar_a(self, instante):
+        if instante < self.ahora:
+            raise ValueError("El reloj simulado no puede retroceder.")
+        self.ahora = instante
+
+
+class SimuladorBiblioteca:
+    """
+    Tráfico sintético sobre un SistemaBiblioteca con tiempo simulado.
+    - dias_entre_visitas / dias_lectura: medias de las distribuciones
+      exponenciales de llegada y de lectura.
+    - prob_renovar: probabilidad de renovar si la lectura supera el plazo.
+    - prob_pagar: probabilidad de pagar la multa al devolver.
+    - sesgo_popularidad: >1 concentra los pedidos en pocos libros.
+    - opciones_sistema: se pasan a SistemaBiblioteca (p. ej. catalogo_compacto).
+    """
+
+    def __init__(self, num_usuarios=100000, num_libros=20000, copias=3, dias_entre_visitas=21.0,
+                 dias_lectura=12.0, prob_renovar=0.4, prob_pagar=0.8, sesgo_popularidad=2.0,
+                 inicio=None, semilla=None, **opciones_sistema):
+        self.num_usuarios = num_usuarios
+        self.num_libros = num_libros
+        self.dias_entre_visitas = dias_entre_visitas
+        self.dias_lectura = dias_lectura
+        self.prob_renovar = prob_renovar
+        self.prob_pagar = prob_pagar
+        self.sesgo_popularidad = sesgo_popularidad
+        self.azar = random.Random(semilla)
+        self.reloj = RelojSimulado(inicio)
+        self.inicio = self.reloj.ahora
+        self.sistema = SistemaBiblioteca(reloj=self.reloj, **opciones_sistema)
+
+        for i in range(num_libros):
+            self.sistema.agregar_libro(self._isbn(i), f"Libro {i}", f"Autor {i % 1000}",
+                                       1950 + i % 75, f"Categoría {i % 20}", copias)
+        for i in range(num_usuarios):
+            self.sistema.registrar_usuario(f"u{i}", f"Usuario {i}", f"u{i}@example.com")
+        self.copias_totales = num_libros * copias
+
+        self._eventos = []          # heap de (dia, secuencia, tipo, dato)
+        self._secuencia = 0
+        self._fin_lectura = {}      # {id_prestamo: día en que el usuario termina de leer}
+        self._ahora_dia = 0.0
+        for i in range(num_usuarios):
+            self._programar(self.azar.expovariate(1 / dias_entre_visitas), VISITA, f"u{i}")
+        self._programar(1.0, CORTE, None)
+        self._reiniciar_metricas()
+
+    @staticmethod
+    def _isbn(i):
+        return f"978{i:010d}"
+
+    def _programar(self, dia, tipo, dato):
+        self._secuencia += 1
+        heapq.heappush(self._eventos, (dia, self._secuencia, tipo, dato))
+
+    def _reiniciar_metricas(self):
+        self.operaciones = 0
+        self.conteos = Counter()
+        self.disputados = Counter()
+        self.multas = []
+        self.activos = 0
+        self._intentos_dia = 0
+        self._sin_copias_dia = 0
+        self.pico = {'fecha': None, 'tasa_rechazo': 0.0, 'ocupacion': 0.0}
+        self.ocupacion_maxima = 0.0
+
+    # ---------------------------
+    # EVENTOS
+    # ---------------------------
+
+    def _visita(self, id_usuario):
+        indice = int(self.num_libros * self.azar.random() ** self.sesgo_popularidad)
+        isbn = self._isbn(indice)
+        self._intentos_dia += 1
+        self.operaciones += 1
+        try:
+            id_prestamo = self.sistema.prestar_libro(isbn, id_usuario)
+        except LibroNoDisponible:
+            self.conteos['rechazo_sin_copias'] += 1
+            self._sin_copias_dia += 1
+            self.disputados[isbn] += 1
+        except LimitePrestamosExcedido:
+            self.conteos['rechazo_limite'] += 1
+        except ValueError:
+            # multas pendientes superiores al máximo
+            self.conteos['rechazo_multas'] += 1
+        else:
+            self.conteos['prestamos'] += 1
+            self.activos += 1
+            fin = self._ahora_dia + self.azar.expovariate(1 / self.dias_lectura)
+            self._fin_lectura[id_prestamo] = fin
+            self._programar_fin(id_prestamo, self.sistema.prestamos[id_prestamo]['fecha_vencimiento'])
+        self._programar(self._ahora_dia + self.azar.expovariate(1 / self.dias_entre_visitas), VISITA, id_usuario)
+
+    def _programar_fin(self, id_prestamo, vencimiento):
+        """Devuelve al terminar de leer, o intenta renovar el día del vencimiento."""
+        fin = self._fin_lectura[id_prestamo]
+        dia_vencimiento = (vencimiento - self.inicio) / timedelta(days=1)
+        if fin > dia_vencimiento and self.azar.random() < self.prob_renovar:
+            self._programar(max(self._ahora_dia, dia_vencimiento - 0.5), RENOVACION, id_prestamo)
+        else:
+            self._programar(fin, DEVOLUCION, id_prestamo)
+
+    def _renovacion(self, id_prestamo):
+        self.operaciones += 1
+        try:
+            vencimiento = self.sistema.renovar_prestamo(id_prestamo)
+        except PrestamoVencido:
+            self._programar(self._ahora_dia, DEVOLUCION, id_prestamo)
+            return
+        self.conteos['renovaciones'] += 1
+        self._programar_fin(id_prestamo, vencimiento)
+
+    def _devolucion(self, id_prestamo):
+        del self._fin_lectura[id_prestamo]
+        self.operaciones += 1
+        multa = self.sistema.devolver_libro(id_prestamo)['multa']
+        self.conteos['devoluciones'] += 1
+        self.activos -= 1
+        if multa:
+            self.multas.append(multa)
+            id_usuario = self.sistema.prestamos[id_prestamo]['id_usuario']
+            if self.azar.random() < self.prob_pagar:
+                self.operaciones += 1
+                self.sistema.pagar_multa(id_usuario, self.sistema.usuarios[id_usuario]['multas_pendientes'])
+
+    def _corte(self):
+        self.operaciones += 1
+        self.sistema.actualizar_multas()
+        tasa = self._sin_copias_dia / self._intentos_dia if self._intentos_dia else 0.0
+        ocupacion = self.activos / self.copias_totales
+        if tasa > self.pico['tasa_rechazo']:
+            self.pico = {'fecha': (self.reloj.ahora - timedelta(days=1)).date().isoformat(),
+                         'tasa_rechazo': round(tasa, 4), 'ocupacion': round(ocupacion, 4)}
+        self.ocupacion_maxima = max(self.ocupacion_maxima, ocupacion)
+        self._intentos_dia = self._sin_copias_dia = 0
+        self._programar(self._ahora_dia + 1, CORTE, None)
+
+    # ---------------------------
+    # EJECUCIÓN
+    # ---------------------------
+
+    def ejecutar(self, dias):
+        """Simula `dias` días más a partir del instante actual; retorna el reporte."""
+        self._reiniciar_metricas()
+        self.activos = sum(len(u['prestamos_activos']) for u in self.sistema.usuarios.values())
+        atender = {CORTE: lambda dato: self._corte(), DEVOLUCION: self._devolucion,
+                   RENOVACION: self._renovacion, VISITA: self._visita}
+        fin = self._ahora_dia + dias
+        eventos = 0
+        inicio = time.perf_counter()
+        while self._eventos and self._eventos[0][0] <= fin:
+            dia, _, tipo, dato = heapq.heappop(self._eventos)
+            self._ahora_dia = dia
+            self.reloj.avanzar_a(self.inicio + timedelta(days=dia))
+            atender[tipo](dato)
+            eventos += 1
+        self._ahora_dia = fin
+        self.reloj.avanzar_a(self.inicio + timedelta(days=fin))
+        return self._reporte(dias, eventos, time.perf_counter() - inicio)
+
+    def _reporte(self, dias, eventos, segundos):
+        multas = sorted(self.multas)
+        retrasos = Counter(round(m / self.sistema.multa_por_dia) for m in multas)
+        histograma = {}
+        for minimo, maximo in RANGOS_MULTA:
+            etiqueta = f"{minimo}-{maximo} días" if maximo else f"{minimo}+ días"
+            histograma[etiqueta] = sum(n for d, n in retrasos.items() if d >= minimo and (maximo is None or d <= maximo))
+        return {
+            'dias_simulados': dias,
+            'usuarios': self.num_usuarios,
+            'libros': self.num_libros,
+            'eventos': eventos,
+            'operaciones': self.operaciones,
+            'segundos': round(segundos, 2),
+            'operaciones_por_segundo': round(self.operaciones / segundos) if segundos else 0,
+            'dias_por_segundo': round(dias / segundos, 2) if segundos else 0,
+            'prestamos': self.conteos['prestamos'],
+            'devoluciones': self.conteos['devoluciones'],
+            'renovaciones': self.conteos['renovaciones'],
+            'rechazos': {'sin_copias': self.conteos['rechazo_sin_copias'],
+                         'limite': self.conteos['rechazo_limite'],
+                         'multas': self.conteos['rechazo_multas']},
+            'contencion_pico': self.pico,
+            'ocupacion_maxima': round(self.ocupacion_maxima, 4),
+            'libros_mas_disputados': self.disputados.most_common(5),
+            'multas': {
+                'cantidad': len(multas),
+                'total': round(sum(multas), 2),
+                'promedio': round(sum(multas) / len(multas), 2) if multas else 0.0,
+                'p50': percentil(multas, 50),
+                'p90': percentil(multas, 90),
+                'p99': percentil(multas, 99),
+                'maxima': multas[-1] if multas else 0.0,
+                'histograma': histograma
+            }
+        }
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    num_usuarios = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    dias = int(sys.argv[2]) if len(sys.argv) > 2 else 365
+
+    inicio = time.perf_counter()
+    simulador = SimuladorBiblioteca(num_usuarios=num_usuarios, num_libros=max(1000, num_usuarios // 5), semilla=42)
+    print(f"Preparación ({num_usuarios} usuarios): {time.perf_counter() - inicio:.2f} s")
+    print(json.dumps(simulador.ejecutar(dias), ensure_ascii=False, indent=2))
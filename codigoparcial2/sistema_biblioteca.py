@@ -7,15 +7,36 @@ Estudiante: Jose Hidalgo
 Fecha: 21-10-2025
 """
 
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
 from datetime import datetime, timedelta
+import functools
+import heapq
+import math
+import threading
+import unicodedata
+
+from almacenamiento_biblioteca import AlmacenamientoMemoria
+from catalogo_compacto import CatalogoCompacto
 
 # ===========================================================================
 # EXCEPCIONES PERSONALIZADAS (5 puntos)
 # ===========================================================================
 
+def _reconstruir_error(clase, mensaje, atributos):
+    error = clase.__new__(clase)
+    Exception.__init__(error, mensaje)
+    error.__dict__.update(atributos)
+    return error
+
+
 class ErrorBiblioteca(Exception):
     """Excepción base para el sistema de biblioteca."""
-    pass
+
+    def __reduce__(self):
+        # las subclases tienen constructores propios; así se pueden enviar
+        # entre procesos (ver red_bibliotecas)
+        return (_reconstruir_error, (type(self), str(self), self.__dict__))
 
 
 class LibroNoEncontrado(ErrorBiblioteca):
@@ -56,6 +77,126 @@ class PrestamoVencido(ErrorBiblioteca):
         super().__init__(f"Préstamo {id_prestamo} está vencido por {dias_retraso} días")
 
 
+# ===========================================================================
+# UTILIDADES DE BÚSQUEDA
+# ===========================================================================
+
+CAMPOS_INDEXADOS = ('titulo', 'autor')
+TAMANIO_NGRAMA = 3
+
+# búsqueda con ranking (buscar_ranking): BM25 con n-gramas como términos
+PESOS_RANKING = {'titulo': 1.0, 'autor': 0.8}
+PESO_CATEGORIA = 0.5
+LIMITE_PRESELECCION = 200
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def _tabla_sin_acentos():
+    """Traducción directa de las letras latinas acentuadas más comunes."""
+    tabla = {}
+    for codigo in range(0xC0, 0x250):
+        descompuesto = unicodedata.normalize('NFKD', chr(codigo))
+        base = ''.join(c for c in descompuesto if not unicodedata.combining(c))
+        if base != chr(codigo) and base.isascii():
+            tabla[codigo] = base
+    return tabla
+
+
+_SIN_ACENTOS = _tabla_sin_acentos()
+
+
+def normalizar_texto(texto):
+    """Pasa a minúsculas y elimina acentos ('García' -> 'garcia')."""
+    texto = str(texto)
+    if not texto.isascii():
+        # camino rápido con la tabla; el resto de Unicode pasa por NFKD
+        traducido = texto.translate(_SIN_ACENTOS)
+        if not traducido.isascii():
+            descompuesto = unicodedata.normalize('NFKD', texto)
+            return ''.join(c for c in descompuesto if not unicodedata.combining(c)).lower()
+        texto = traducido
+    return texto.lower()
+
+
+def generar_ngramas(texto, n=TAMANIO_NGRAMA):
+    """Retorna el conjunto de n-gramas de un texto ya normalizado."""
+    return set(map(''.join, zip(*(texto[i:] for i in range(n)))))
+
+
+def largo_en_ngramas(texto):
+    """Largo de un texto medido en n-gramas (al menos 1), para BM25."""
+    return max(1, len(texto) - TAMANIO_NGRAMA + 1)
+
+
+def preparar_indices(libros):
+    """
+    Calcula los datos de índice de un lote de libros
+    [(isbn, titulo, autor, anio, categoria, copias)] sin tocar ningún
+    sistema, para poder hacerlo en otro proceso (ver importar_libros):
+    - textos: [(titulo_normalizado, autor_normalizado)] paralelo a `libros`
+    - ngramas: {campo: {ngrama: [posiciones en libros]}}
+    - cortos: {campo: [posiciones]} textos con menos caracteres que un n-grama
+    """
+    textos = []
+    ngramas = {campo: defaultdict(list) for campo in CAMPOS_INDEXADOS}
+    cortos = {campo: [] for campo in CAMPOS_INDEXADOS}
+    memo = {}   # autores (y títulos) repetidos se normalizan una sola vez
+    for posicion, libro in enumerate(libros):
+        normalizados = []
+        for campo, original in zip(CAMPOS_INDEXADOS, libro[1:3]):
+            calculado = memo.get(original)
+            if calculado is None:
+                texto = normalizar_texto(original)
+                calculado = memo[original] = (texto, generar_ngramas(texto))
+            texto, claves = calculado
+            normalizados.append(texto)
+            indice = ngramas[campo]
+            for ngrama in claves:
+                indice[ngrama].append(posicion)
+            if len(texto) < TAMANIO_NGRAMA:
+                cortos[campo].append(posicion)
+        textos.append(tuple(normalizados))
+    return {'textos': textos, 'ngramas': {campo: dict(indice) for campo, indice in ngramas.items()}, 'cortos': cortos}
+
+
+# ===========================================================================
+# REGISTRO DE OPERACIONES
+# ===========================================================================
+
+def registrable(metodo):
+    """
+    Marca un método público que modifica estado. Si hay un registro de
+    eventos conectado (ver eventos_biblioteca), la llamada se ejecuta en
+    serie con el reloj fijo en un instante y, si termina bien, se anota con
+    ese instante para poder reproducirla después. El evento se codifica
+    antes de ejecutarla: si los argumentos no se pueden anotar, la llamada
+    falla sin haber cambiado nada.
+
+    Al terminar, ya sin locks, espera a que lo persistido sea durable (ver
+    _persistir).
+    """
+    @functools.wraps(metodo)
+    def envoltura(self, *args, **kwargs):
+        try:
+            registro = self._registro_eventos
+            if registro is None or getattr(self._tiempo_local, 'fijo', None) is not None:
+                return metodo(self, *args, **kwargs)
+            with self._lock_eventos:
+                ahora = self.reloj()
+                evento = registro.codificar(metodo.__name__, ahora, args, kwargs)
+                self._tiempo_local.fijo = ahora
+                try:
+                    resultado = metodo(self, *args, **kwargs)
+                finally:
+                    self._tiempo_local.fijo = None
+                registro.escribir(evento, ahora)
+            return resultado
+        finally:
+            self._esperar_durabilidad()
+    return envoltura
+
+
 # ===========================================================================
 # CLASE PRINCIPAL: SISTEMA BIBLIOTECA (35 puntos)
 # ===========================================================================
@@ -66,151 +207,1121 @@ class SistemaBiblioteca:
     
     Estructuras de datos:
     - catalogo: {isbn: {'titulo', 'autor', 'anio', 'categoria', 'copias_total', 'copias_disponibles'}}
-    - usuarios: {id_usuario: {'nombre', 'email', 'fecha_registro', 'prestamos_activos', 'historial'}}
+    - usuarios: {id_usuario: {'nombre', 'email', 'fecha_registro', 'prestamos_activos' (set), 'historial',
+                              'multas_pendientes', 'multas_proyectadas', 'multas_pagadas', 'multas_condonadas'}}
     - prestamos: {id_prestamo: {'isbn', 'id_usuario', 'fecha_prestamo', 'fecha_vencimiento', 'fecha_devolucion', 'multa'}}
+    - reservas: {id_reserva: {'isbn', 'id_usuario', 'fecha_reserva', 'estado', 'fecha_limite'}}
+      estado: 'en_espera' | 'asignada' | 'completada' | 'cancelada' | 'vencida'
+
+    Índices de búsqueda (se mantienen al agregar/eliminar libros):
+    - _textos: {isbn: {campo: texto_normalizado}} para 'titulo' y 'autor'
+    - _indice_ngramas: {campo: {ngrama: set(isbn)}}
+    - _indice_categoria: {categoria: set(isbn)}
+    - _textos_cortos: {campo: set(isbn)} textos con menos caracteres que un n-grama
+    - _orden: {isbn: posición de inserción} para devolver resultados en orden estable
+    - _largo_total: {campo: suma de largo_en_ngramas} para el largo promedio de BM25
+    - _ngramas_categoria: {categoria: n-gramas del nombre}, calculado al consultar
+
+    Préstamos activos:
+    - _vencimientos: min-heap de (fecha_vencimiento, id_prestamo); las entradas
+      de préstamos devueltos o renovados quedan obsoletas y se descartan al
+      consultarlas o al compactar el heap.
+
+    Multas:
+    - multas_pendientes: deuda firme (préstamos ya devueltos), menos pagos y condonaciones.
+    - multas_proyectadas: multa acumulada por préstamos activos vencidos al
+      último corte (actualizar_multas), mantenida de forma incremental.
+    - _multas_en_curso: {id_prestamo: multa proyectada de ese préstamo}
+    - _estado_cache: {id_usuario: estado} servido por obtener_estado_usuario;
+      se invalida en cada escritura sobre el usuario.
+
+    Reservas:
+    - _colas_reserva: {isbn: deque(id_reserva)} en orden de llegada (FIFO);
+      las reservas canceladas se descartan al llegar al frente.
+    - _reservas_activas: {(isbn, id_usuario): id_reserva} en espera o asignadas
+    - _expiraciones_reserva: min-heap de (fecha_limite, id_reserva) asignadas
+    - _esperas_reserva: {id_reserva: threading.Event} para esperar_reserva
+
+    Concurrencia:
+    - _locks_libro / _locks_usuario: un lock por ISBN y por usuario; las
+      operaciones de préstamo los adquieren en orden determinista (_bloquear).
+    - _lock_compartido: protege solo las secciones cortas sobre estructuras
+      globales (contador, heap, índices, persistencia).
     """
     
-    def __init__(self, dias_prestamo=14, multa_por_dia=1.0, limite_prestamos=3):
+    def __init__(self, dias_prestamo=14, multa_por_dia=1.0, limite_prestamos=3, almacenamiento=None,
+                 catalogo_compacto=False, dias_reserva=3, reloj=None):
         """
         Inicializa el sistema.
+        - reloj: función sin argumentos que retorna el datetime actual
+          (por defecto datetime.now).
+        - dias_reserva: días que una copia asignada a una reserva espera a
+          que el usuario la retire.
+        - almacenamiento: backend de persistencia (ver almacenamiento_biblioteca).
+          Si se indica, el estado guardado se restaura al crear el sistema.
+        - catalogo_compacto: guarda el catálogo en columnas (ver catalogo_compacto)
+          en lugar de un dict por libro; la interfaz es la misma.
         """
-        self.catalogo = {}
+        self.catalogo_compacto = catalogo_compacto
+        self.catalogo = CatalogoCompacto() if catalogo_compacto else {}
         self.usuarios = {}
         self.prestamos = {}
         self.dias_prestamo = dias_prestamo
         self.multa_por_dia = multa_por_dia
         self.limite_prestamos = limite_prestamos
         self.contador_prestamos = 1
+        self.reservas = {}
+        self.dias_reserva = dias_reserva
+        self.contador_reservas = 1
+        self.reloj = reloj or datetime.now
+
+        # registro de operaciones (ver registrable)
+        self._registro_eventos = None
+        self._lock_eventos = threading.RLock()
+        self._tiempo_local = threading.local()
+
+        # índices de búsqueda
+        self._textos = {}
+        self._indice_ngramas = {campo: {} for campo in CAMPOS_INDEXADOS}
+        self._indice_categoria = {}
+        self._textos_cortos = {campo: set() for campo in CAMPOS_INDEXADOS}
+        self._orden = {}
+        self._contador_orden = 0
+        self._largo_total = {campo: 0 for campo in CAMPOS_INDEXADOS}
+        self._ngramas_categoria = {}
+
+        # heap de vencimientos de préstamos activos
+        self._vencimientos = []
+        self._vencimientos_obsoletos = 0
+
+        # multas y estado de usuarios
+        self._multas_en_curso = {}
+        self._ultimo_corte_multas = None
+        self._estado_cache = {}
+
+        # colas de reserva
+        self._colas_reserva = {}
+        self._reservas_activas = {}
+        self._expiraciones_reserva = []
+        self._esperas_reserva = {}
+
+        # suscriptores a eventos de préstamo y reserva (ver suscribir)
+        self._suscriptores = []
+
+        # concurrencia
+        self._locks_libro = {}
+        self._locks_usuario = {}
+        self._lock_compartido = threading.RLock()
+
+        # persistencia
+        self._almacenamiento = almacenamiento or AlmacenamientoMemoria()
+        if almacenamiento is not None:
+            self._restaurar_estado(almacenamiento.cargar())
+
+    # ============ PERSISTENCIA ============
+
+    def exportar_estado(self):
+        """Retorna el estado completo como {tabla: {clave: registro}}."""
+        return {
+            'libro': self.catalogo,
+            'usuario': self.usuarios,
+            'prestamo': self.prestamos,
+            'reserva': self.reservas,
+            'meta': self._valores_meta()
+        }
+
+    def _valores_meta(self):
+        return {
+            'contador_prestamos': self.contador_prestamos,
+            'contador_reservas': self.contador_reservas,
+            'ultimo_corte_multas': self._ultimo_corte_multas
+        }
+
+    def _restaurar_estado(self, estado):
+        if self.catalogo_compacto:
+            self.catalogo = CatalogoCompacto()
+            self.catalogo.update(estado['libro'])
+        else:
+            self.catalogo = estado['libro']
+        self.usuarios = estado['usuario']
+        self.prestamos = estado['prestamo']
+        self.contador_prestamos = estado['meta'].get('contador_prestamos', 1)
+        self.reservas = estado.get('reserva', {})
+        self.contador_reservas = estado['meta'].get('contador_reservas', 1)
+        for isbn in self.catalogo:
+            self._indexar_libro(isbn)
+        for usuario in self.usuarios.values():
+            usuario['prestamos_activos'] = set(usuario['prestamos_activos'])
+            for id_prestamo in usuario['prestamos_activos']:
+                self._vencimientos.append((self.prestamos[id_prestamo]['fecha_vencimiento'], id_prestamo))
+            # la proyección se recalcula desde el heap con el último corte
+            usuario['multas_proyectadas'] = 0.0
+            for campo in ('multas_pagadas', 'multas_condonadas'):
+                usuario.setdefault(campo, 0.0)
+        heapq.heapify(self._vencimientos)
+        for id_reserva in sorted(self.reservas, key=lambda i: int(i[1:])):
+            r = self.reservas[id_reserva]
+            if r['estado'] == 'en_espera':
+                self._colas_reserva.setdefault(r['isbn'], deque()).append(id_reserva)
+            elif r['estado'] == 'asignada':
+                self._expiraciones_reserva.append((r['fecha_limite'], id_reserva))
+            else:
+                continue
+            self._reservas_activas[(r['isbn'], r['id_usuario'])] = id_reserva
+        heapq.heapify(self._expiraciones_reserva)
+        ultimo_corte = estado['meta'].get('ultimo_corte_multas')
+        if ultimo_corte is not None:
+            self._proyectar_multas(ultimo_corte)
+
+    def _persistir(self, libros=(), usuarios=(), prestamos=(), reservas=(), meta=()):
+        """
+        Registra los registros modificados por una operación y la confirma.
+        La espera hasta que sea durable queda para el final de la operación
+        pública (registrable), cuando ya soltó los locks del libro y del
+        usuario: así los hilos que tocan el mismo libro comparten el fsync.
+        meta: nombres de valores de _valores_meta() que cambiaron.
+        """
+        almacenamiento = self._almacenamiento
+        with self._lock_compartido:
+            for isbn in libros:
+                almacenamiento.registrar('libro', isbn, self.catalogo[isbn])
+            for id_usuario in usuarios:
+                almacenamiento.registrar('usuario', id_usuario, self.usuarios[id_usuario])
+            for id_prestamo in prestamos:
+                almacenamiento.registrar('prestamo', id_prestamo, self.prestamos[id_prestamo])
+            for id_reserva in reservas:
+                almacenamiento.registrar('reserva', id_reserva, self.reservas[id_reserva])
+            if meta:
+                valores = self._valores_meta()
+                for clave in meta:
+                    almacenamiento.registrar('meta', clave, valores[clave])
+            self._tiempo_local.confirmada = almacenamiento.confirmar(self)
+
+    def _esperar_durabilidad(self):
+        """Espera el fsync de la última operación persistida por este hilo."""
+        confirmada = getattr(self._tiempo_local, 'confirmada', None)
+        if confirmada is not None:
+            self._tiempo_local.confirmada = None
+            self._almacenamiento.esperar(confirmada)
+
+    # ============ RELOJ Y REGISTRO DE OPERACIONES ============
+
+    def _ahora(self):
+        """Instante actual; fijo durante una operación registrada o reproducida."""
+        fijo = getattr(self._tiempo_local, 'fijo', None)
+        return fijo if fijo is not None else self.reloj()
+
+    def conectar_registro_eventos(self, registro):
+        """Anota cada operación registrable en `registro` (registro.codificar/escribir)."""
+        self._registro_eventos = registro
+
+    def desconectar_registro_eventos(self):
+        self._registro_eventos = None
+
+    def reproducir_operacion(self, nombre, fecha, args=(), kwargs=None):
+        """Ejecuta una operación registrada con el reloj fijo en `fecha`."""
+        metodo = getattr(self, nombre)
+        if not getattr(metodo, '__wrapped__', None):
+            raise ValueError(f"Operación no registrable: {nombre}")
+        self._tiempo_local.fijo = fecha
+        try:
+            return metodo(*args, **(kwargs or {}))
+        finally:
+            self._tiempo_local.fijo = None
+
+    # ============ EVENTOS ============
+
+    def suscribir(self, callback):
+        """
+        Registra callback(evento, id), llamado tras cada 'prestamo',
+        'devolucion' y 'renovacion' (id de préstamo) y cada
+        'reserva_asignada', 'reserva_cancelada' y 'reserva_vencida' (id de
+        reserva). Se invoca con _lock_compartido adquirido, por lo que debe
+        ser rápido.
+        """
+        self._suscriptores.append(callback)
+
+    def desuscribir(self, callback):
+        self._suscriptores.remove(callback)
+
+    def _notificar(self, evento, id_registro):
+        # copia: un callback puede desuscribirse mientras se notifica
+        for callback in list(self._suscriptores):
+            callback(evento, id_registro)
+
+    # ============ CONCURRENCIA ============
+
+    @staticmethod
+    def _lock_de(locks, clave):
+        """
+        Lock asociado a `clave`, creado al primer uso aunque el libro o el
+        usuario todavía no exista: si se agrega mientras la operación espera,
+        ya queda protegido por este mismo lock.
+        """
+        lock = locks.get(clave)
+        if lock is None:
+            lock = locks.setdefault(clave, threading.Lock())
+        return lock
+
+    @contextmanager
+    def _bloquear(self, isbns=(), usuarios=()):
+        """
+        Adquiere los locks de los libros y usuarios indicados, siempre en el
+        mismo orden (ISBN ordenados y luego usuarios ordenados) para que dos
+        operaciones concurrentes no puedan interbloquearse.
+        """
+        locks = [self._lock_de(self._locks_libro, isbn) for isbn in sorted(set(isbns), key=repr)]
+        locks += [self._lock_de(self._locks_usuario, id_usuario) for id_usuario in sorted(set(usuarios), key=repr)]
+        adquiridos = []
+        try:
+            for lock in locks:
+                lock.acquire()
+                adquiridos.append(lock)
+            yield
+        finally:
+            for lock in reversed(adquiridos):
+                lock.release()
 
     # ============ GESTIÓN DE CATÁLOGO ============
     
-    def agregar_libro(self, isbn, titulo, autor, anio, categoria, copias):
+    @staticmethod
+    def _validar_libro(isbn, titulo, autor, anio, copias, anio_maximo):
         if not (isinstance(isbn, str) and len(isbn) == 13 and isbn.isdigit()):
             raise ValueError("ISBN debe ser una cadena de 13 dígitos.")
         if not titulo or not autor:
             raise ValueError("Título y autor no pueden estar vacíos.")
-        if not (1000 <= anio <= datetime.now().year):
+        if not (1000 <= anio <= anio_maximo):
             raise ValueError("Año fuera de rango.")
         if copias < 1:
             raise ValueError("Debe haber al menos una copia.")
-        if isbn in self.catalogo:
-            raise KeyError(f"Libro con ISBN {isbn} ya existe.")
-        
-        self.catalogo[isbn] = {
-            'titulo': titulo,
-            'autor': autor,
-            'anio': anio,
-            'categoria': categoria,
-            'copias_total': copias,
-            'copias_disponibles': copias,
-            'prestamos': 0
-        }
+
+    @registrable
+    def agregar_libro(self, isbn, titulo, autor, anio, categoria, copias):
+        self._validar_libro(isbn, titulo, autor, anio, copias, self._ahora().year)
+        with self._lock_compartido:
+            if isbn in self.catalogo:
+                raise KeyError(f"Libro con ISBN {isbn} ya existe.")
+            self.catalogo[isbn] = {
+                'titulo': titulo,
+                'autor': autor,
+                'anio': anio,
+                'categoria': categoria,
+                'copias_total': copias,
+                'copias_disponibles': copias,
+                'prestamos': 0
+            }
+            self._indexar_libro(isbn)
+            self._persistir(libros=(isbn,))
+
+    @registrable
+    def importar_libros(self, libros, indices=None):
+        """
+        Alta masiva de libros [(isbn, titulo, autor, anio, categoria, copias)].
+        Valida igual que agregar_libro (con el año máximo calculado una vez),
+        descarta las filas inválidas o duplicadas sin abortar el resto y
+        actualiza los índices por lote, no libro por libro.
+        - indices: resultado de preparar_indices(libros), si ya se calculó
+          (p. ej. en otro proceso).
+        Retorna [(posición en libros, mensaje)] de las filas rechazadas.
+        """
+        libros = list(libros)
+        if indices is None:
+            indices = preparar_indices(libros)
+        anio_maximo = self._ahora().year
+        rechazados = []
+        aceptados = [None] * len(libros)
+        with self._lock_compartido:
+            for posicion, libro in enumerate(libros):
+                try:
+                    isbn, titulo, autor, anio, categoria, copias = libro
+                    self._validar_libro(isbn, titulo, autor, anio, copias, anio_maximo)
+                    if isbn in self.catalogo:
+                        raise KeyError(f"Libro con ISBN {isbn} ya existe.")
+                    # el catálogo compacto rechaza aquí valores que sus columnas no admiten
+                    self.catalogo[isbn] = {
+                        'titulo': titulo,
+                        'autor': autor,
+                        'anio': anio,
+                        'categoria': categoria,
+                        'copias_total': copias,
+                        'copias_disponibles': copias,
+                        'prestamos': 0
+                    }
+                except (KeyError, TypeError, ValueError, OverflowError) as e:
+                    rechazados.append((posicion, e.args[0] if e.args else str(e)))
+                    continue
+                aceptados[posicion] = isbn
+            self._indexar_lote(aceptados, indices)
+            self._persistir(libros=[isbn for isbn in aceptados if isbn is not None])
+        return rechazados
+
+    def _indexar_lote(self, aceptados, indices):
+        """
+        Registra en los índices los libros de un lote; aceptados[i] es el
+        ISBN de la fila i o None si fue rechazada. Requiere _lock_compartido.
+        """
+        isbn_de = aceptados.__getitem__
+        for posicion, textos in enumerate(indices['textos']):
+            isbn = aceptados[posicion]
+            if isbn is not None:
+                self._textos[isbn] = dict(zip(CAMPOS_INDEXADOS, textos))
+                for campo, texto in zip(CAMPOS_INDEXADOS, textos):
+                    self._largo_total[campo] += largo_en_ngramas(texto)
+                self._indice_categoria.setdefault(self.catalogo[isbn]['categoria'], set()).add(isbn)
+                self._orden[isbn] = self._contador_orden
+                self._contador_orden += 1
+        for campo in CAMPOS_INDEXADOS:
+            indice = self._indice_ngramas[campo]
+            for ngrama, posiciones in indices['ngramas'][campo].items():
+                isbns = indice.get(ngrama)
+                if isbns is None:
+                    isbns = indice[ngrama] = set()
+                isbns.update(filter(None, map(isbn_de, posiciones)))
+                if not isbns:
+                    del indice[ngrama]
+            self._textos_cortos[campo].update(filter(None, map(isbn_de, indices['cortos'][campo])))
+
+    def _indexar_libro(self, isbn):
+        """Registra el libro en los índices (normaliza una sola vez)."""
+        info = self.catalogo[isbn]
+        textos = {campo: normalizar_texto(info[campo]) for campo in CAMPOS_INDEXADOS}
+        self._textos[isbn] = textos
+        for campo, texto in textos.items():
+            indice = self._indice_ngramas[campo]
+            for ngrama in generar_ngramas(texto):
+                indice.setdefault(ngrama, set()).add(isbn)
+            if len(texto) < TAMANIO_NGRAMA:
+                self._textos_cortos[campo].add(isbn)
+            self._largo_total[campo] += largo_en_ngramas(texto)
+        self._indice_categoria.setdefault(info['categoria'], set()).add(isbn)
+        self._orden[isbn] = self._contador_orden
+        self._contador_orden += 1
+
+    def _desindexar_libro(self, isbn):
+        """Quita el libro de los índices (usar antes de modificarlo o eliminarlo)."""
+        textos = self._textos.pop(isbn, None)
+        if textos is None:
+            return
+        for campo, texto in textos.items():
+            indice = self._indice_ngramas[campo]
+            for ngrama in generar_ngramas(texto):
+                isbns = indice.get(ngrama)
+                if isbns is not None:
+                    isbns.discard(isbn)
+                    if not isbns:
+                        del indice[ngrama]
+            self._textos_cortos[campo].discard(isbn)
+            self._largo_total[campo] -= largo_en_ngramas(texto)
+        categoria = self.catalogo[isbn]['categoria']
+        isbns = self._indice_categoria.get(categoria)
+        if isbns is not None:
+            isbns.discard(isbn)
+            if not isbns:
+                del self._indice_categoria[categoria]
+        self._orden.pop(isbn, None)
+
+    def _candidatos(self, campo, valor):
+        """
+        Retorna el conjunto de ISBN cuyo campo contiene `valor` (normalizado).
+        Intersecta los n-gramas de la consulta y verifica sobre el texto
+        guardado; consultas cortas se resuelven con las claves del índice.
+        """
+        indice = self._indice_ngramas[campo]
+        if len(valor) >= TAMANIO_NGRAMA:
+            conjuntos = []
+            for ngrama in generar_ngramas(valor):
+                isbns = indice.get(ngrama)
+                if not isbns:
+                    return set()
+                conjuntos.append(isbns)
+            conjuntos.sort(key=len)
+            candidatos = set(conjuntos[0]).intersection(*conjuntos[1:])
+        else:
+            candidatos = set()
+            for ngrama, isbns in indice.items():
+                if valor in ngrama:
+                    candidatos |= isbns
+            # textos más cortos que un n-grama no aparecen en el índice
+            candidatos |= self._textos_cortos[campo]
+        return {isbn for isbn in candidatos if valor in self._textos[isbn][campo]}
 
     def buscar_libros(self, criterio='titulo', valor='', categoria=None):
-        resultados = []
-        valor = valor.lower()
-        for isbn, info in self.catalogo.items():
-            if categoria and info['categoria'] != categoria:
-                continue
-            if valor in str(info.get(criterio, '')).lower():
-                resultados.append({'isbn': isbn, **info})
-        return resultados
+        """
+        Busca libros cuyo `criterio` contenga `valor` (sin distinguir
+        mayúsculas ni acentos). 'titulo' y 'autor' usan el índice de n-gramas;
+        otros criterios recorren el catálogo.
+        """
+        with self._lock_compartido:
+            valor = normalizar_texto(valor)
+            if criterio in CAMPOS_INDEXADOS:
+                if valor:
+                    isbns = self._candidatos(criterio, valor)
+                    if categoria:
+                        isbns &= self._indice_categoria.get(categoria, set())
+                elif categoria:
+                    isbns = self._indice_categoria.get(categoria, set())
+                else:
+                    return [{'isbn': isbn, **info} for isbn, info in self.catalogo.items()]
+                return [{'isbn': isbn, **self.catalogo[isbn]}
+                        for isbn in sorted(isbns, key=self._orden.__getitem__)]
+
+            resultados = []
+            for isbn, info in self.catalogo.items():
+                if categoria and info['categoria'] != categoria:
+                    continue
+                if valor in normalizar_texto(info.get(criterio, '')):
+                    resultados.append({'isbn': isbn, **info})
+            return resultados
+
+    # ============ BÚSQUEDA CON RANKING ============
+
+    def _terminos_ranking(self, claves):
+        """
+        Para cada n-grama de la consulta presente en el índice: la lista
+        [(campo, isbns, peso)] con peso = peso del campo * idf. Ordenados del
+        más raro al más común.
+        """
+        total = len(self._textos)
+        terminos = []
+        for ngrama in claves:
+            por_campo = []
+            for campo, peso_campo in PESOS_RANKING.items():
+                isbns = self._indice_ngramas[campo].get(ngrama)
+                if isbns:
+                    idf = math.log(1 + (total - len(isbns) + 0.5) / (len(isbns) + 0.5))
+                    por_campo.append((campo, isbns, peso_campo * idf))
+            if por_campo:
+                terminos.append((sum(len(isbns) for _, isbns, _ in por_campo), por_campo))
+        terminos.sort(key=lambda termino: termino[0])
+        return [por_campo for _, por_campo in terminos]
+
+    def _puntajes_categoria(self, claves):
+        """{categoria: bono} de las categorías cuyo nombre comparte n-gramas con la consulta."""
+        puntajes = {}
+        for categoria in self._indice_categoria:
+            ngramas = self._ngramas_categoria.get(categoria)
+            if ngramas is None:
+                ngramas = self._ngramas_categoria[categoria] = generar_ngramas(normalizar_texto(categoria))
+            comunes = len(claves & ngramas)
+            if comunes:
+                puntajes[categoria] = PESO_CATEGORIA * comunes / len(claves)
+        return puntajes
+
+    def buscar_ranking(self, consulta, n=10, categoria=None):
+        """
+        Retorna los n libros que mejor coinciden con `consulta` en título,
+        autor y categoría, de mayor a menor 'puntaje'.
+
+        Cada n-grama de la consulta es un término BM25 sobre el título y el
+        autor, así que se toleran errores de tipeo ("Garcia Marques"
+        encuentra "García Márquez"); el nombre de la categoría suma un bono.
+        En dos etapas:
+        1. Preselección: se cuentan, por libro, los n-gramas compartidos
+           entre los más raros de la consulta (los comunes no se recorren) y
+           se quedan los LIMITE_PRESELECCION libros con más coincidencias.
+        2. Solo esos se puntúan con BM25 completo y se retornan los n mejores.
+        - categoria: si se indica, solo libros de esa categoría.
+        """
+        texto = normalizar_texto(consulta).strip()
+        if n <= 0 or not texto:
+            return []
+        with self._lock_compartido:
+            filtro = self._indice_categoria.get(categoria, set()) if categoria else None
+            orden = self._orden
+            if len(texto) < TAMANIO_NGRAMA:
+                isbns = self._candidatos('titulo', texto) | self._candidatos('autor', texto)
+                if filtro is not None:
+                    isbns &= filtro
+                mejores = heapq.nsmallest(n, isbns, key=orden.__getitem__)
+                return [{'isbn': isbn, **self.catalogo[isbn], 'puntaje': 0.0} for isbn in mejores]
+
+            claves = generar_ngramas(texto)
+            terminos = self._terminos_ranking(claves)
+            if not terminos:
+                return []
+
+            # etapa 1: basta con los raros; un libro que comparte al menos la
+            # mitad de los n-gramas aparece en alguno de ellos
+            raros = terminos[:len(terminos) - (len(terminos) + 1) // 2 + 1]
+            coincidencias = Counter()
+            for por_campo in raros:
+                en_termino = set().union(*(isbns for _, isbns, _ in por_campo))
+                coincidencias.update(en_termino if filtro is None else en_termino & filtro)
+            preseleccion = [isbn for isbn, _ in coincidencias.most_common(max(LIMITE_PRESELECCION, 4 * n))]
+
+            # etapa 2: BM25 completo solo sobre la preselección
+            bono_categoria = self._puntajes_categoria(claves)
+            promedio = {campo: self._largo_total[campo] / max(1, len(self._textos)) for campo in CAMPOS_INDEXADOS}
+            todos = [termino for por_campo in terminos for termino in por_campo]
+            puntajes = {}
+            for isbn in preseleccion:
+                textos = self._textos[isbn]
+                puntaje = bono_categoria.get(self.catalogo[isbn]['categoria'], 0.0)
+                for campo, isbns, peso in todos:
+                    if isbn in isbns:
+                        largo = largo_en_ngramas(textos[campo])
+                        puntaje += peso * (BM25_K1 + 1) / (
+                            1 + BM25_K1 * (1 - BM25_B + BM25_B * largo / promedio[campo]))
+                puntajes[isbn] = puntaje
+            mejores = heapq.nlargest(n, puntajes.items(), key=lambda par: (par[1], -orden[par[0]]))
+            return [{'isbn': isbn, **self.catalogo[isbn], 'puntaje': round(puntaje, 4)}
+                    for isbn, puntaje in mejores]
 
     # ============ GESTIÓN DE USUARIOS ============
 
+    @registrable
     def registrar_usuario(self, id_usuario, nombre, email):
-        if id_usuario in self.usuarios:
-            raise ValueError("Usuario ya registrado.")
-        if not nombre or '@' not in email or '.' not in email:
-            raise ValueError("Datos inválidos del usuario.")
-        self.usuarios[id_usuario] = {
-            'nombre': nombre,
-            'email': email,
-            'fecha_registro': datetime.now(),
-            'prestamos_activos': [],
-            'historial': [],
-            'multas_pendientes': 0
-        }
+        with self._lock_compartido:
+            if id_usuario in self.usuarios:
+                raise ValueError("Usuario ya registrado.")
+            if not nombre or '@' not in email or '.' not in email:
+                raise ValueError("Datos inválidos del usuario.")
+            self.usuarios[id_usuario] = {
+                'nombre': nombre,
+                'email': email,
+                'fecha_registro': self._ahora(),
+                'prestamos_activos': set(),
+                'historial': [],
+                'multas_pendientes': 0,
+                'multas_proyectadas': 0.0,
+                'multas_pagadas': 0.0,
+                'multas_condonadas': 0.0
+            }
+            self._persistir(usuarios=(id_usuario,))
 
     def obtener_estado_usuario(self, id_usuario):
+        """
+        Estado del usuario en O(1): se sirve desde _estado_cache, que se
+        recalcula solo después de una escritura sobre ese usuario.
+        """
+        estado = self._estado_cache.get(id_usuario)
+        if estado is None:
+            with self._lock_compartido:
+                if id_usuario not in self.usuarios:
+                    raise UsuarioNoRegistrado(id_usuario)
+                u = self.usuarios[id_usuario]
+                deuda_total = u['multas_pendientes'] + u['multas_proyectadas']
+                puede_prestar = len(u['prestamos_activos']) < self.limite_prestamos and deuda_total <= 50
+                estado = {
+                    'nombre': u['nombre'],
+                    'prestamos_activos': len(u['prestamos_activos']),
+                    'puede_prestar': puede_prestar,
+                    'multas_pendientes': u['multas_pendientes'],
+                    'multas_proyectadas': u['multas_proyectadas'],
+                    'deuda_total': deuda_total
+                }
+                self._estado_cache[id_usuario] = estado
+        return dict(estado)
+
+    def _invalidar_estado(self, id_usuario):
+        self._estado_cache.pop(id_usuario, None)
+
+    # ============ MULTAS ============
+
+    def _proyectar_multas(self, hasta):
+        """
+        Actualiza multas_proyectadas con los préstamos vencidos a `hasta`
+        (recorriendo solo el heap de vencidos). Retorna los usuarios afectados.
+        Requiere _lock_compartido.
+        """
+        afectados = set()
+        for p in self.prestamos_vencidos(hasta):
+            id_prestamo = p['id_prestamo']
+            monto = max(0, (hasta - p['fecha_vencimiento']).days) * self.multa_por_dia
+            anterior = self._multas_en_curso.get(id_prestamo, 0.0)
+            if monto != anterior:
+                self._multas_en_curso[id_prestamo] = monto
+                self.usuarios[p['id_usuario']]['multas_proyectadas'] += monto - anterior
+                self._invalidar_estado(p['id_usuario'])
+                afectados.add(p['id_usuario'])
+        self._ultimo_corte_multas = hasta
+        return afectados
+
+    @registrable
+    def actualizar_multas(self, hasta=None):
+        """
+        Corte diario de multas: proyecta la multa de cada préstamo activo
+        vencido a la fecha `hasta` (por defecto ahora). Su costo depende de
+        los préstamos vencidos, no del historial completo.
+        Retorna la cantidad de usuarios cuya deuda cambió.
+        """
+        if hasta is None:
+            hasta = self._ahora()
+        with self._lock_compartido:
+            usuarios = {p['id_usuario'] for p in self.prestamos_vencidos(hasta)}
+        with self._bloquear(usuarios=usuarios):
+            with self._lock_compartido:
+                afectados = self._proyectar_multas(hasta)
+                self._persistir(usuarios=afectados, meta=('ultimo_corte_multas',))
+        return len(afectados)
+
+    def _validar_monto_multa(self, id_usuario, monto):
         if id_usuario not in self.usuarios:
             raise UsuarioNoRegistrado(id_usuario)
-        u = self.usuarios[id_usuario]
-        puede_prestar = len(u['prestamos_activos']) < self.limite_prestamos and u['multas_pendientes'] <= 50
-        return {
-            'nombre': u['nombre'],
-            'prestamos_activos': len(u['prestamos_activos']),
-            'puede_prestar': puede_prestar,
-            'multas_pendientes': u['multas_pendientes']
-        }
+        if monto <= 0:
+            raise ValueError("El monto debe ser positivo.")
+        if monto > self.usuarios[id_usuario]['multas_pendientes']:
+            raise ValueError("El monto supera las multas pendientes.")
+
+    @registrable
+    def pagar_multa(self, id_usuario, monto):
+        """Registra un pago sobre las multas pendientes; retorna el saldo restante."""
+        with self._bloquear(usuarios=(id_usuario,)):
+            self._validar_monto_multa(id_usuario, monto)
+            usuario = self.usuarios[id_usuario]
+            usuario['multas_pendientes'] -= monto
+            usuario['multas_pagadas'] += monto
+            with self._lock_compartido:
+                self._invalidar_estado(id_usuario)
+            self._persistir(usuarios=(id_usuario,))
+        return usuario['multas_pendientes']
+
+    @registrable
+    def condonar_multa(self, id_usuario, monto=None):
+        """Condona `monto` (o todas) de las multas pendientes; retorna el saldo restante."""
+        with self._bloquear(usuarios=(id_usuario,)):
+            if monto is None and id_usuario in self.usuarios:
+                monto = self.usuarios[id_usuario]['multas_pendientes']
+                if not monto:
+                    return 0
+            self._validar_monto_multa(id_usuario, monto)
+            usuario = self.usuarios[id_usuario]
+            usuario['multas_pendientes'] -= monto
+            usuario['multas_condonadas'] += monto
+            with self._lock_compartido:
+                self._invalidar_estado(id_usuario)
+            self._persistir(usuarios=(id_usuario,))
+        return usuario['multas_pendientes']
 
     # ============ GESTIÓN DE PRÉSTAMOS ============
 
-    def prestar_libro(self, isbn, id_usuario):
+    def _validar_prestamo(self, isbn, id_usuario, copias_reservadas=0, prestamos_nuevos=0):
+        """
+        Lanza la excepción correspondiente si el préstamo no es posible.
+        copias_reservadas / prestamos_nuevos descuentan lo ya asignado dentro
+        de un lote aún no aplicado.
+        """
         if id_usuario not in self.usuarios:
             raise UsuarioNoRegistrado(id_usuario)
         if isbn not in self.catalogo:
             raise LibroNoEncontrado(isbn)
         libro = self.catalogo[isbn]
         usuario = self.usuarios[id_usuario]
-        if libro['copias_disponibles'] <= 0:
+        if libro['copias_disponibles'] - copias_reservadas <= 0:
             raise LibroNoDisponible(isbn, libro['titulo'])
-        if len(usuario['prestamos_activos']) >= self.limite_prestamos:
+        if len(usuario['prestamos_activos']) + prestamos_nuevos >= self.limite_prestamos:
             raise LimitePrestamosExcedido(id_usuario, self.limite_prestamos)
-        if usuario['multas_pendientes'] > 50:
+        if usuario['multas_pendientes'] + usuario['multas_proyectadas'] > 50:
             raise ValueError("El usuario tiene multas pendientes superiores a $50.")
-        
-        id_prestamo = f"P{self.contador_prestamos:04d}"
-        self.contador_prestamos += 1
-        fecha_prestamo = datetime.now()
-        fecha_vencimiento = fecha_prestamo + timedelta(days=self.dias_prestamo)
-        
-        self.prestamos[id_prestamo] = {
-            'isbn': isbn,
-            'id_usuario': id_usuario,
-            'fecha_prestamo': fecha_prestamo,
-            'fecha_vencimiento': fecha_vencimiento,
-            'fecha_devolucion': None,
-            'multa': 0.0
-        }
-        
+
+    def _registrar_prestamo(self, isbn, id_usuario, fecha_prestamo, fecha_vencimiento):
+        """
+        Crea el préstamo y actualiza libro, usuario y heap (ya validado, con
+        los locks del libro y del usuario adquiridos).
+        """
+        libro = self.catalogo[isbn]
         libro['copias_disponibles'] -= 1
         libro['prestamos'] += 1
-        usuario['prestamos_activos'].append(id_prestamo)
+        with self._lock_compartido:
+            id_prestamo = f"P{self.contador_prestamos:04d}"
+            self.contador_prestamos += 1
+            self.prestamos[id_prestamo] = {
+                'isbn': isbn,
+                'id_usuario': id_usuario,
+                'fecha_prestamo': fecha_prestamo,
+                'fecha_vencimiento': fecha_vencimiento,
+                'fecha_devolucion': None,
+                'multa': 0.0
+            }
+            self.usuarios[id_usuario]['prestamos_activos'].add(id_prestamo)
+            heapq.heappush(self._vencimientos, (fecha_vencimiento, id_prestamo))
+            self._invalidar_estado(id_usuario)
+            self._notificar('prestamo', id_prestamo)
         return id_prestamo
 
-    def devolver_libro(self, id_prestamo):
+    def _reserva_asignada(self, isbn, id_usuario):
+        """True si el usuario tiene una copia de este libro apartada por una reserva."""
+        id_reserva = self._reservas_activas.get((isbn, id_usuario))
+        return id_reserva is not None and self.reservas[id_reserva]['estado'] == 'asignada'
+
+    def _completar_reserva(self, isbn, id_usuario):
+        """
+        Completa la reserva activa del usuario sobre el libro, si la hay, y
+        devuelve a las disponibles la copia que tenía apartada para que el
+        préstamo la tome. Retorna el id de la reserva o None (ya validado,
+        con los locks del libro y del usuario adquiridos).
+        """
+        id_reserva = self._reservas_activas.get((isbn, id_usuario))
+        if id_reserva is None:
+            return None
+        if self.reservas[id_reserva]['estado'] == 'asignada':
+            self.catalogo[isbn]['copias_disponibles'] += 1
+        with self._lock_compartido:
+            self._finalizar_reserva(id_reserva, 'completada')
+        return id_reserva
+
+    @registrable
+    def prestar_libro(self, isbn, id_usuario):
+        """
+        Presta una copia. Si el usuario tiene una reserva asignada de este
+        libro, se usa la copia apartada para él y la reserva se completa.
+        """
+        with self._bloquear((isbn,), (id_usuario,)):
+            asignada = self._reserva_asignada(isbn, id_usuario)
+            self._validar_prestamo(isbn, id_usuario, copias_reservadas=-1 if asignada else 0)
+            fecha_prestamo = self._ahora()
+            fecha_vencimiento = fecha_prestamo + timedelta(days=self.dias_prestamo)
+            id_reserva = self._completar_reserva(isbn, id_usuario)
+            id_prestamo = self._registrar_prestamo(isbn, id_usuario, fecha_prestamo, fecha_vencimiento)
+            reservas = () if id_reserva is None else (id_reserva,)
+            self._persistir(libros=(isbn,), usuarios=(id_usuario,), prestamos=(id_prestamo,),
+                            reservas=reservas, meta=('contador_prestamos',))
+        return id_prestamo
+
+    def _validar_devolucion(self, id_prestamo):
         if id_prestamo not in self.prestamos:
             raise KeyError("Préstamo no encontrado.")
-        p = self.prestamos[id_prestamo]
-        if p['fecha_devolucion'] is not None:
+        if self.prestamos[id_prestamo]['fecha_devolucion'] is not None:
             raise ValueError("El libro ya fue devuelto.")
-        
-        hoy = datetime.now()
+
+    def _cerrar_prestamo(self, id_prestamo, hoy):
+        """
+        Marca la devolución, calcula la multa y libera la copia (ya validado,
+        con los locks del libro y del usuario adquiridos).
+        """
+        p = self.prestamos[id_prestamo]
         dias_retraso = max(0, (hoy - p['fecha_vencimiento']).days)
         multa = dias_retraso * self.multa_por_dia
         p['fecha_devolucion'] = hoy
         p['multa'] = multa
-        
+
         libro = self.catalogo[p['isbn']]
         libro['copias_disponibles'] += 1
-        
+
         usuario = self.usuarios[p['id_usuario']]
-        usuario['prestamos_activos'].remove(id_prestamo)
-        usuario['historial'].append(id_prestamo)
         usuario['multas_pendientes'] += multa
-        
+        with self._lock_compartido:
+            usuario['multas_proyectadas'] -= self._multas_en_curso.pop(id_prestamo, 0.0)
+            usuario['prestamos_activos'].discard(id_prestamo)
+            usuario['historial'].append(id_prestamo)
+            self._marcar_vencimiento_obsoleto()
+            self._invalidar_estado(p['id_usuario'])
+            self._notificar('devolucion', id_prestamo)
+        self._asignar_reservas(p['isbn'], hoy)
         return {'dias_retraso': dias_retraso, 'multa': multa, 'mensaje': "Devolución procesada"}
 
+    def _bloquear_prestamos(self, ids_prestamo):
+        """Adquiere los locks de libros y usuarios de los préstamos indicados."""
+        existentes = [self.prestamos[i] for i in ids_prestamo if i in self.prestamos]
+        return self._bloquear([p['isbn'] for p in existentes], [p['id_usuario'] for p in existentes])
+
+    @registrable
+    def devolver_libro(self, id_prestamo):
+        with self._bloquear_prestamos((id_prestamo,)):
+            self._validar_devolucion(id_prestamo)
+            resultado = self._cerrar_prestamo(id_prestamo, self._ahora())
+            p = self.prestamos[id_prestamo]
+            self._persistir(libros=(p['isbn'],), usuarios=(p['id_usuario'],), prestamos=(id_prestamo,))
+        return resultado
+
+    # ============ OPERACIONES EN LOTE ============
+
+    @registrable
+    def prestar_lote(self, operaciones, atomico=False):
+        """
+        Presta varios libros en una sola pasada.
+        - operaciones: iterable de (isbn, id_usuario)
+        - atomico: si True, basta un error para no aplicar ningún préstamo.
+        Retorna una lista paralela a `operaciones` con el id_prestamo creado o
+        la excepción correspondiente (None para los válidos de un lote
+        atómico rechazado).
+        """
+        operaciones = list(operaciones)
+        with self._bloquear([isbn for isbn, _ in operaciones], [u for _, u in operaciones]):
+            resultados = [None] * len(operaciones)
+            copias_reservadas = {}
+            prestamos_nuevos = {}
+            con_reserva = set()
+            validos = []
+            for i, (isbn, id_usuario) in enumerate(operaciones):
+                # solo el primer préstamo del par (libro, usuario) usa la copia apartada
+                asignada = (isbn, id_usuario) not in con_reserva and self._reserva_asignada(isbn, id_usuario)
+                try:
+                    self._validar_prestamo(isbn, id_usuario,
+                                           copias_reservadas.get(isbn, 0) - asignada,
+                                           prestamos_nuevos.get(id_usuario, 0))
+                except (ErrorBiblioteca, ValueError) as e:
+                    resultados[i] = e
+                    continue
+                con_reserva.add((isbn, id_usuario))
+                copias_reservadas[isbn] = copias_reservadas.get(isbn, 0) + (not asignada)
+                prestamos_nuevos[id_usuario] = prestamos_nuevos.get(id_usuario, 0) + 1
+                validos.append(i)
+
+            if not validos or (atomico and len(validos) < len(operaciones)):
+                return resultados
+
+            fecha_prestamo = self._ahora()
+            fecha_vencimiento = fecha_prestamo + timedelta(days=self.dias_prestamo)
+            reservas = []
+            for i in validos:
+                isbn, id_usuario = operaciones[i]
+                id_reserva = self._completar_reserva(isbn, id_usuario)
+                if id_reserva is not None:
+                    reservas.append(id_reserva)
+                resultados[i] = self._registrar_prestamo(isbn, id_usuario, fecha_prestamo, fecha_vencimiento)
+            self._persistir(libros=copias_reservadas, usuarios=prestamos_nuevos,
+                            prestamos=[resultados[i] for i in validos], reservas=reservas,
+                            meta=('contador_prestamos',))
+            return resultados
+
+    @registrable
+    def devolver_lote(self, ids_prestamo, atomico=False):
+        """
+        Devuelve varios préstamos en una sola pasada.
+        Retorna una lista paralela con el resultado de cada devolución (igual
+        que devolver_libro) o la excepción correspondiente.
+        """
+        ids_prestamo = list(ids_prestamo)
+        with self._bloquear_prestamos(ids_prestamo):
+            resultados = [None] * len(ids_prestamo)
+            vistos = set()
+            validos = []
+            for i, id_prestamo in enumerate(ids_prestamo):
+                try:
+                    self._validar_devolucion(id_prestamo)
+                    if id_prestamo in vistos:
+                        raise ValueError("El libro ya fue devuelto.")
+                except (KeyError, ValueError) as e:
+                    resultados[i] = e
+                    continue
+                vistos.add(id_prestamo)
+                validos.append(i)
+
+            if not validos or (atomico and len(validos) < len(ids_prestamo)):
+                return resultados
+
+            hoy = self._ahora()
+            libros = set()
+            usuarios = set()
+            for i in validos:
+                id_prestamo = ids_prestamo[i]
+                resultados[i] = self._cerrar_prestamo(id_prestamo, hoy)
+                p = self.prestamos[id_prestamo]
+                libros.add(p['isbn'])
+                usuarios.add(p['id_usuario'])
+            self._persistir(libros=libros, usuarios=usuarios, prestamos=[ids_prestamo[i] for i in validos])
+            return resultados
+
+    @registrable
     def renovar_prestamo(self, id_prestamo):
         if id_prestamo not in self.prestamos:
             raise KeyError("Préstamo no encontrado.")
-        p = self.prestamos[id_prestamo]
-        if datetime.now() > p['fecha_vencimiento']:
-            raise PrestamoVencido(id_prestamo, (datetime.now() - p['fecha_vencimiento']).days)
-        p['fecha_vencimiento'] += timedelta(days=self.dias_prestamo)
+        with self._bloquear_prestamos((id_prestamo,)):
+            p = self.prestamos[id_prestamo]
+            if self._ahora() > p['fecha_vencimiento']:
+                raise PrestamoVencido(id_prestamo, (self._ahora() - p['fecha_vencimiento']).days)
+            p['fecha_vencimiento'] += timedelta(days=self.dias_prestamo)
+            with self._lock_compartido:
+                heapq.heappush(self._vencimientos, (p['fecha_vencimiento'], id_prestamo))
+                self._marcar_vencimiento_obsoleto()
+                # una multa proyectada a un corte futuro ya no corresponde
+                usuario = self.usuarios[p['id_usuario']]
+                usuario['multas_proyectadas'] -= self._multas_en_curso.pop(id_prestamo, 0.0)
+                self._invalidar_estado(p['id_usuario'])
+                self._notificar('renovacion', id_prestamo)
+            self._persistir(usuarios=(p['id_usuario'],), prestamos=(id_prestamo,))
         return p['fecha_vencimiento']
 
+    # ============ RESERVAS ============
+
+    @registrable
+    def reservar_libro(self, isbn, id_usuario):
+        """
+        Pone al usuario en la cola FIFO del libro (solo si no hay copias
+        disponibles). Cuando se devuelva una copia se le asignará
+        automáticamente; ver esperar_reserva y suscribir.
+        """
+        with self._bloquear((isbn,), (id_usuario,)):
+            if id_usuario not in self.usuarios:
+                raise UsuarioNoRegistrado(id_usuario)
+            if isbn not in self.catalogo:
+                raise LibroNoEncontrado(isbn)
+            if self.catalogo[isbn]['copias_disponibles'] > 0:
+                raise ValueError("Hay copias disponibles; no es necesario reservar.")
+            with self._lock_compartido:
+                if (isbn, id_usuario) in self._reservas_activas:
+                    raise ValueError("El usuario ya tiene una reserva activa de este libro.")
+                id_reserva = f"R{self.contador_reservas:04d}"
+                self.contador_reservas += 1
+                self.reservas[id_reserva] = {
+                    'isbn': isbn,
+                    'id_usuario': id_usuario,
+                    'fecha_reserva': self._ahora(),
+                    'estado': 'en_espera',
+                    'fecha_limite': None
+                }
+                self._colas_reserva.setdefault(isbn, deque()).append(id_reserva)
+                self._reservas_activas[(isbn, id_usuario)] = id_reserva
+            self._persistir(reservas=(id_reserva,), meta=('contador_reservas',))
+        return id_reserva
+
+    @registrable
+    def cancelar_reserva(self, id_reserva):
+        """Cancela la reserva; si tenía una copia asignada, pasa al siguiente de la cola."""
+        if id_reserva not in self.reservas:
+            raise KeyError("Reserva no encontrada.")
+        r = self.reservas[id_reserva]
+        with self._bloquear((r['isbn'],)):
+            if r['estado'] not in ('en_espera', 'asignada'):
+                raise ValueError("La reserva ya no está activa.")
+            asignada = r['estado'] == 'asignada'
+            with self._lock_compartido:
+                self._finalizar_reserva(id_reserva, 'cancelada')
+                self._notificar('reserva_cancelada', id_reserva)
+            if asignada:
+                self.catalogo[r['isbn']]['copias_disponibles'] += 1
+                self._asignar_reservas(r['isbn'], self._ahora())
+            self._persistir(libros=(r['isbn'],), reservas=(id_reserva,))
+        return True
+
+    def esperar_reserva(self, id_reserva, timeout=None):
+        """
+        Bloquea hasta que la reserva deje de estar en espera (o se agote
+        `timeout` segundos) y retorna su estado, sin necesidad de sondear.
+        """
+        with self._lock_compartido:
+            if id_reserva not in self.reservas:
+                raise KeyError("Reserva no encontrada.")
+            if self.reservas[id_reserva]['estado'] != 'en_espera':
+                return self.reservas[id_reserva]['estado']
+            evento = self._esperas_reserva.setdefault(id_reserva, threading.Event())
+        evento.wait(timeout)
+        return self.reservas[id_reserva]['estado']
+
+    def _finalizar_reserva(self, id_reserva, estado):
+        """Cierra la reserva y despierta a quien la espera. Requiere _lock_compartido."""
+        r = self.reservas[id_reserva]
+        r['estado'] = estado
+        self._reservas_activas.pop((r['isbn'], r['id_usuario']), None)
+        evento = self._esperas_reserva.pop(id_reserva, None)
+        if evento is not None:
+            evento.set()
+
+    def _asignar_reservas(self, isbn, hoy):
+        """
+        Aparta las copias disponibles para los primeros usuarios elegibles de
+        la cola del libro (los no elegibles conservan su lugar). Requiere el
+        lock del libro.
+        """
+        cola = self._colas_reserva.get(isbn)
+        if not cola:
+            return []
+        libro = self.catalogo[isbn]
+        asignadas = []
+        omitidas = []
+        with self._lock_compartido:
+            while cola and libro['copias_disponibles'] > 0:
+                id_reserva = cola.popleft()
+                r = self.reservas[id_reserva]
+                if r['estado'] != 'en_espera':
+                    continue
+                u = self.usuarios[r['id_usuario']]
+                if (len(u['prestamos_activos']) >= self.limite_prestamos
+                        or u['multas_pendientes'] + u['multas_proyectadas'] > 50):
+                    omitidas.append(id_reserva)
+                    continue
+                libro['copias_disponibles'] -= 1
+                r['estado'] = 'asignada'
+                r['fecha_limite'] = hoy + timedelta(days=self.dias_reserva)
+                heapq.heappush(self._expiraciones_reserva, (r['fecha_limite'], id_reserva))
+                asignadas.append(id_reserva)
+            cola.extendleft(reversed(omitidas))
+            if not cola:
+                del self._colas_reserva[isbn]
+            for id_reserva in asignadas:
+                evento = self._esperas_reserva.pop(id_reserva, None)
+                if evento is not None:
+                    evento.set()
+                self._notificar('reserva_asignada', id_reserva)
+        if asignadas:
+            self._persistir(libros=(isbn,), reservas=asignadas)
+        return asignadas
+
+    @registrable
+    def vencer_reservas(self, hasta=None):
+        """
+        Libera las copias de reservas asignadas no retiradas antes de su
+        fecha límite y las pasa al siguiente de la cola. Solo recorre las
+        reservas vencidas (heap de expiraciones). Retorna cuántas venció.
+        """
+        if hasta is None:
+            hasta = self._ahora()
+        with self._lock_compartido:
+            vencidas = []
+            while self._expiraciones_reserva and self._expiraciones_reserva[0][0] <= hasta:
+                vencidas.append(heapq.heappop(self._expiraciones_reserva))
+        cantidad = 0
+        for fecha_limite, id_reserva in vencidas:
+            r = self.reservas[id_reserva]
+            with self._bloquear((r['isbn'],)):
+                if r['estado'] != 'asignada' or r['fecha_limite'] != fecha_limite:
+                    continue
+                with self._lock_compartido:
+                    self._finalizar_reserva(id_reserva, 'vencida')
+                    self._notificar('reserva_vencida', id_reserva)
+                self.catalogo[r['isbn']]['copias_disponibles'] += 1
+                self._asignar_reservas(r['isbn'], hasta)
+                self._persistir(libros=(r['isbn'],), reservas=(id_reserva,))
+                cantidad += 1
+        return cantidad
+
+    # ============ VENCIMIENTOS ============
+
+    def _vencimiento_vigente(self, entrada):
+        fecha, id_prestamo = entrada
+        p = self.prestamos[id_prestamo]
+        return p['fecha_devolucion'] is None and p['fecha_vencimiento'] == fecha
+
+    def _marcar_vencimiento_obsoleto(self):
+        """Cuenta una entrada obsoleta y compacta el heap si ya son mayoría."""
+        self._vencimientos_obsoletos += 1
+        if self._vencimientos_obsoletos * 2 > len(self._vencimientos):
+            self._vencimientos = [e for e in self._vencimientos if self._vencimiento_vigente(e)]
+            heapq.heapify(self._vencimientos)
+            self._vencimientos_obsoletos = 0
+
+    def prestamos_vencidos(self, hasta=None):
+        """
+        Retorna los préstamos activos con vencimiento anterior a `hasta`
+        (por defecto ahora), ordenados por fecha de vencimiento.
+
+        Recorre el heap sin extraer elementos: O(k log k) para k resultados.
+        La lista se arma con el lock tomado, así que renovar o compactar el
+        heap mientras se la recorre no la afecta.
+        """
+        if hasta is None:
+            hasta = self._ahora()
+        vencidos = []
+        with self._lock_compartido:
+            heap = self._vencimientos
+            while heap and not self._vencimiento_vigente(heap[0]):
+                heapq.heappop(heap)
+                self._vencimientos_obsoletos -= 1
+            frontera = [(heap[0], 0)] if heap else []
+            while frontera:
+                entrada, i = heapq.heappop(frontera)
+                fecha, id_prestamo = entrada
+                if fecha >= hasta:
+                    break
+                if self._vencimiento_vigente(entrada):
+                    vencidos.append({'id_prestamo': id_prestamo, **self.prestamos[id_prestamo]})
+                for hijo in (2 * i + 1, 2 * i + 2):
+                    if hijo < len(heap):
+                        heapq.heappush(frontera, (heap[hijo], hijo))
+        return vencidos
+
+
 
 # ===========================================================================
 # CASOS DE PRUEBA BÁSICOS
@@ -228,6 +1339,8 @@ if __name__ == "__main__":
     biblioteca.agregar_libro("9781234567897", "Cien años de soledad", "Gabriel Garcia Marquez", 1967, "Novela", 3)
     biblioteca.agregar_libro("9781234567898", "El Principito", "Antoine de Saint-Exupéry", 1943, "Infantil", 2)
     print("Catálogo:", biblioteca.buscar_libros('titulo', ''))
+    print("Ranking 'Garcia Marques':",
+          [(l['titulo'], l['puntaje']) for l in biblioteca.buscar_ranking("Garcia Marques", n=3)])
 
     # Registrar usuarios
     print("\n--- Registrar usuarios ---")
@@ -7,7 +7,11 @@ Nombre: Jose Hidalgo
 Fecha: 21-10-2025
 """
 
-from datetime import datetime, time
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, deque
+from collections.abc import Mapping
+from datetime import datetime, time, timedelta
+import heapq
 import os
 
 # ===========================================================================
@@ -42,6 +46,12 @@ class CapacidadExcedida(ErrorRestaurante):
         self.comensales = comensales
         super().__init__(f"Mesa {numero_mesa}: capacidad {capacidad}, comensales {comensales}")
 
+class SinMesasDisponibles(ErrorRestaurante):
+    """Se lanza cuando ninguna mesa libre tiene capacidad suficiente."""
+    def __init__(self, comensales):
+        self.comensales = comensales
+        super().__init__(f"No hay mesas libres para {comensales} comensales")
+
 class PedidoInvalido(ErrorRestaurante):
     """Se lanza para pedidos con problemas."""
     def __init__(self, razon):
@@ -49,6 +59,90 @@ class PedidoInvalido(ErrorRestaurante):
         super().__init__(f"Pedido inválido: {razon}")
 
 
+# cambios a partir de los cuales los índices del menú se reconstruyen
+# (en la próxima búsqueda) en lugar de insertar/borrar uno por uno
+LOTE_INDICE = 64
+
+
+# ===========================================================================
+# VISTA DE PLATO
+# ===========================================================================
+
+class VistaPlato(Mapping):
+    """
+    Vista de solo lectura de un plato del menú: se usa como el dict
+    {'codigo': codigo, **info} pero no copia nada y refleja los cambios.
+    """
+
+    __slots__ = ('codigo', '_info')
+
+    def __init__(self, codigo, info):
+        self.codigo = codigo
+        self._info = info
+
+    def __getitem__(self, clave):
+        if clave == 'codigo':
+            return self.codigo
+        return self._info[clave]
+
+    def __iter__(self):
+        yield 'codigo'
+        yield from self._info
+
+    def __len__(self):
+        return len(self._info) + 1
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+# ===========================================================================
+# VENTANA DESLIZANTE DE VENTAS
+# ===========================================================================
+
+class VentanaVentas:
+    """
+    Unidades vendidas por plato en los últimos `duracion` (timedelta).
+    Las ventas se agrupan en buckets de `ancho` y se mantiene la suma de los
+    buckets vigentes: al avanzar el tiempo solo se restan los buckets que
+    salen de la ventana, nunca se recorre el historial.
+    """
+
+    def __init__(self, duracion, ancho):
+        self.duracion = duracion
+        self.ancho = ancho
+        self._buckets = deque()     # (inicio del bucket, Counter)
+        self.totales = Counter()    # suma de los buckets vigentes
+
+    def _inicio_bucket(self, instante):
+        return instante - (instante - datetime.min) % self.ancho
+
+    def expirar(self, ahora):
+        """Descarta los buckets que terminaron antes de `ahora - duracion`."""
+        limite = ahora - self.duracion
+        while self._buckets and self._buckets[0][0] + self.ancho <= limite:
+            _, conteo = self._buckets.popleft()
+            for codigo, cantidad in conteo.items():
+                restante = self.totales[codigo] - cantidad
+                if restante:
+                    self.totales[codigo] = restante
+                else:
+                    del self.totales[codigo]
+
+    def registrar(self, instante, codigo, cantidad):
+        inicio = self._inicio_bucket(instante)
+        if not self._buckets or self._buckets[-1][0] < inicio:
+            self._buckets.append((inicio, Counter()))
+        # una venta con fecha anterior al último bucket se suma a ese bucket
+        self._buckets[-1][1][codigo] += cantidad
+        self.totales[codigo] += cantidad
+
+    def mas_vendidos(self, n, ahora):
+        """[(codigo, cantidad)] de los n platos más vendidos en la ventana."""
+        self.expirar(ahora)
+        return heapq.nlargest(n, self.totales.items(), key=lambda par: par[1])
+
+
 # ===========================================================================
 # CLASE PRINCIPAL: SISTEMA RESTAURANTE
 # ===========================================================================
@@ -56,26 +150,71 @@ class PedidoInvalido(ErrorRestaurante):
 class SistemaRestaurante:
     """Sistema completo de gestión de restaurante."""
 
-    def __init__(self, num_mesas=10, tasa_impuesto=0.16, propina_sugerida=0.15):
+    def __init__(self, num_mesas=10, tasa_impuesto=0.16, propina_sugerida=0.15, reloj=None):
         """
         Inicializa el sistema.
+        - reloj: función sin argumentos que retorna el datetime actual
+          (por defecto datetime.now; útil para simulaciones y pruebas)
 
         Estructuras internas (en memoria):
         - menu: {codigo: {'nombre','categoria','precio','disponible','vendidos'}}
         - mesas: {numero: {'capacidad','ocupada'(bool),'comensales', 'hora_reserva'(datetime.time) , 'pedido_id'}}
         - pedidos: {id_pedido: {'numero_mesa','items':{codigo:cantidad}, 'estado','fecha','subtot','impuesto','propina','total'}}
+          con 'lineas': {codigo: {'precio','categoria'}} fijados en agregar_item y 'acumulado' (subtotal en curso)
         - ventas: list de pedidos pagados (para reportes)
+        - ventas_por_dia: {date: {'pedidos','ventas','impuesto','propina','items','por_categoria':{categoria:cantidad}}}
+          totales ya acumulados de cada día, actualizados en pagar_pedido
+        - versiones_plato: {codigo: versión del menú en que cambió}, del cambio más viejo al más nuevo
+        - _ranking: list ordenada de (-vendidos, orden de alta, codigo) con todos los platos
+        - _platos_por_precio: {categoria en minúsculas | None (todas): list ordenada de
+          (precio, orden de alta, codigo)} con los platos disponibles
+        - _platos_por_nombre: list ordenada de (nombre en minúsculas, orden de alta, codigo) disponibles
+          (tras un lote de LOTE_INDICE cambios o más, ambos se reconstruyen en la próxima búsqueda)
+        - ventanas: {'hora': VentanaVentas, 'dia': VentanaVentas} para rankings recientes
+        - _mesas_libres: list ordenada de (capacidad, numero) de las mesas libres
+        - _pedidos_abiertos: {id_pedido: pedido} de los pedidos sin pagar
+        - archivo: ArchivoPedidos opcional (conectar_archivo) donde se mueven los pedidos pagados
+        - cocina: Cocina opcional (conectar_cocina) que recibe un ticket por cada agregar_item
         """
         # configuración
         self.num_mesas = int(num_mesas)
         self.tasa_impuesto = float(tasa_impuesto)
         self.propina_sugerida = float(propina_sugerida)
+        self.reloj = reloj or datetime.now
 
         # datos
         self.menu = {}      # menú de platos
         self.mesas = {}     # mesas configuradas
         self.pedidos = {}   # pedidos en curso e históricos
         self.ventas = []    # pedidos pagados (para reportes)
+        self.ventas_por_dia = {}  # totales por día (para reportes por fecha)
+        self._ingresos_categoria = {}  # categoria -> ingresos históricos
+        self._pedidos_abiertos = {}    # pedidos sin pagar (subconjunto de pedidos)
+
+        # archivo de pedidos pagados (opcional)
+        self.archivo = None
+        self._pagados_sin_archivar = []
+        self._ventas_archivadas = 0
+
+        # pantalla de cocina (opcional)
+        self.cocina = None
+
+        # versiones del menú (para exportar solo los cambios)
+        self.version_menu = 0
+        self.versiones_plato = {}
+
+        # ranking de vendidos, mantenido en pagar_pedido
+        self._ranking = []
+        self._orden_plato = {}    # codigo -> orden de alta (desempate estable)
+
+        # índices de búsqueda del menú (solo platos disponibles)
+        self._platos_por_precio = {None: []}
+        self._platos_por_nombre = []
+        self._indice_desactualizado = False
+        self.ventanas = {
+            'hora': VentanaVentas(timedelta(hours=1), timedelta(minutes=1)),
+            'dia': VentanaVentas(timedelta(days=1), timedelta(minutes=15))
+        }
 
         # contadores
         self._next_pedido_id = 1
@@ -89,6 +228,7 @@ class SistemaRestaurante:
                 'hora_reserva': None,
                 'pedido_id': None
             }
+        self._mesas_libres = [(4, m) for m in self.mesas]
 
     # ---------------------------
     # GESTIÓN DE MENÚ
@@ -122,32 +262,236 @@ class SistemaRestaurante:
             'disponible': True,
             'vendidos': 0
         }
+        self._agregar_al_ranking(codigo)
+        self._tocar_plato(codigo)
+        self._indexar([codigo])
         return True
 
     def cambiar_disponibilidad(self, codigo, disponible):
         if codigo not in self.menu:
             raise PlatoNoEncontrado(codigo)
+        anteriores = self._entradas_indice(codigo)
         self.menu[codigo]['disponible'] = bool(disponible)
+        self._tocar_plato(codigo)
+        self._desindexar([anteriores])
+        self._indexar([codigo])
         return True
 
+    def sincronizar_plato(self, codigo, nombre, categoria, precio, disponible=True):
+        """
+        Agrega el plato o actualiza nombre, categoría, precio y disponibilidad.
+        Retorna 'nuevo', 'actualizado' o 'igual'.
+        """
+        conteo = self.sincronizar_platos([(codigo, nombre, categoria, precio, disponible)])
+        if conteo['nuevos']:
+            return 'nuevo'
+        return 'actualizado' if conteo['actualizados'] else 'igual'
+
+    def sincronizar_platos(self, filas):
+        """
+        sincronizar_plato para muchas filas (codigo, nombre, categoria, precio, disponible).
+        Retorna {'nuevos', 'actualizados', 'iguales'}.
+        """
+        # codigo -> entradas que tenía en el índice antes del lote (None si
+        # no estaba); un código repetido en el lote conserva las primeras
+        anteriores = {}
+        try:
+            return self._sincronizar(filas, anteriores)
+        finally:
+            # también si una fila inválida corta la sincronización a la mitad
+            self._desindexar(anteriores.values())
+            self._indexar(list(anteriores))
+
+    def _sincronizar(self, filas, anteriores):
+        menu = self.menu
+        nuevos = actualizados = iguales = 0
+        for codigo, nombre, categoria, precio, disponible in filas:
+            plato = menu.get(codigo)
+            disponible = bool(disponible)
+            if plato is not None and (plato['nombre'], plato['categoria'], plato['precio'],
+                                      plato['disponible']) == (nombre, categoria, precio, disponible):
+                iguales += 1
+                continue
+            if not codigo or not str(codigo).strip():
+                raise ValueError("Código inválido")
+            if not nombre or not categoria:
+                raise ValueError("Nombre y categoría no pueden estar vacíos")
+            precio = float(precio)
+            if precio <= 0:
+                raise ValueError("Precio debe ser mayor a 0")
+            if codigo not in anteriores:
+                anteriores[codigo] = None if plato is None else self._entradas_indice(codigo)
+            if plato is None:
+                menu[codigo] = {
+                    'nombre': nombre,
+                    'categoria': categoria,
+                    'precio': precio,
+                    'disponible': disponible,
+                    'vendidos': 0
+                }
+                self._agregar_al_ranking(codigo)
+                nuevos += 1
+            else:
+                plato['nombre'] = nombre
+                plato['categoria'] = categoria
+                plato['precio'] = precio
+                plato['disponible'] = disponible
+                actualizados += 1
+            self._tocar_plato(codigo)
+        return {'nuevos': nuevos, 'actualizados': actualizados, 'iguales': iguales}
+
+    def _agregar_platos_nuevos(self, filas):
+        """
+        Alta en bloque de filas (codigo, nombre, categoria, precio, disponible)
+        que no están en el menú, p. ej. al importar un menú completo en un
+        sistema vacío: valida todo el lote y después actualiza menú, ranking,
+        versiones e índice de una vez, sin comparar plato por plato.
+        Retorna el conteo de sincronizar_platos, o None sin cambiar nada si
+        alguna fila no es un alta válida (código repetido o ya existente,
+        datos inválidos); en ese caso hay que usar sincronizar_platos.
+        """
+        if not filas:
+            return {'nuevos': 0, 'actualizados': 0, 'iguales': 0}
+        menu = self.menu
+        # validación por columnas: mismas reglas que sincronizar_platos
+        codigos, nombres, categorias, precios, _ = zip(*filas)
+        if (len(set(codigos)) != len(codigos) or not menu.keys().isdisjoint(codigos)
+                or set(map(type, codigos)) != {str} or not all(map(str.strip, codigos))
+                or not all(nombres) or not all(categorias)
+                or set(map(type, precios)) != {float} or not min(precios) > 0):
+            return None
+        menu.update({codigo: {
+            'nombre': nombre,
+            'categoria': categoria,
+            'precio': precio,
+            'disponible': bool(disponible),
+            'vendidos': 0
+        } for codigo, nombre, categoria, precio, disponible in filas})
+        # igual que _agregar_al_ranking y _tocar_plato para cada código, en orden
+        inicio = len(self._orden_plato)
+        self._orden_plato.update(zip(codigos, range(inicio, inicio + len(codigos))))
+        self._ranking.extend((0, orden, codigo) for orden, codigo in enumerate(codigos, inicio))
+        self.versiones_plato.update(zip(codigos, range(self.version_menu + 1, self.version_menu + len(codigos) + 1)))
+        self.version_menu += len(codigos)
+        self._indexar(codigos)
+        return {'nuevos': len(codigos), 'actualizados': 0, 'iguales': 0}
+
+    def _tocar_plato(self, codigo):
+        """Registra que el plato cambió en una versión nueva del menú."""
+        self.version_menu += 1
+        self.versiones_plato.pop(codigo, None)
+        self.versiones_plato[codigo] = self.version_menu
+
+    def cambios_menu(self, desde_version=0):
+        """Códigos de los platos que cambiaron después de `desde_version`, del más viejo al más nuevo."""
+        cambios = []
+        for codigo in reversed(self.versiones_plato):
+            if self.versiones_plato[codigo] <= desde_version:
+                break
+            cambios.append(codigo)
+        cambios.reverse()
+        return cambios
+
     def buscar_platos(self, categoria=None, precio_max=None):
         """
-        Retorna lista de platos coincidentes (solo disponibles).
+        Retorna lista de platos coincidentes (solo disponibles), de menor a
+        mayor precio, como VistaPlato (se leen igual que un dict).
         """
+        if precio_max is not None:
+            try:
+                precio_max = float(precio_max)
+            except Exception:
+                raise ValueError("precio_max inválido")
+        if self._indice_desactualizado:
+            self._reconstruir_indice()
+        platos = self._platos_por_precio.get(str(categoria).lower() if categoria else None, [])
+        fin = len(platos) if precio_max is None else bisect_right(platos, (precio_max, float('inf')))
+        menu = self.menu
+        return [VistaPlato(codigo, menu[codigo]) for _, _, codigo in platos[:fin]]
+
+    def buscar_por_nombre(self, prefijo, n=None):
+        """Platos disponibles cuyo nombre empieza con `prefijo` (sin distinguir mayúsculas), en orden alfabético."""
+        prefijo = str(prefijo).lower()
+        if self._indice_desactualizado:
+            self._reconstruir_indice()
+        nombres = self._platos_por_nombre
         resultados = []
-        for codigo, info in self.menu.items():
-            if not info.get('disponible', True):
+        for k in range(bisect_left(nombres, (prefijo,)), len(nombres)):
+            nombre, _, codigo = nombres[k]
+            if not nombre.startswith(prefijo) or len(resultados) == n:
+                break
+            resultados.append(VistaPlato(codigo, self.menu[codigo]))
+        return resultados
+
+    def _entradas_indice(self, codigo):
+        """(categoria, entrada por precio, entrada por nombre) del plato; None si no está disponible."""
+        plato = self.menu[codigo]
+        if not plato['disponible']:
+            return None
+        orden = self._orden_plato[codigo]
+        return (plato['categoria'].lower(), (plato['precio'], orden, codigo),
+                (plato['nombre'].lower(), orden, codigo))
+
+    def _indexar(self, codigos):
+        if self._indice_desactualizado:
+            return
+        if len(codigos) >= LOTE_INDICE:
+            # lotes grandes (importaciones): se reconstruye en la próxima búsqueda
+            self._indice_desactualizado = True
+            return
+        por_precio = self._platos_por_precio
+        for codigo in codigos:
+            entradas = self._entradas_indice(codigo)
+            if entradas is None:
                 continue
-            if categoria and info['categoria'].lower() != str(categoria).lower():
+            categoria, precio, nombre = entradas
+            insort(por_precio[None], precio)
+            insort(por_precio.setdefault(categoria, []), precio)
+            insort(self._platos_por_nombre, nombre)
+
+    def _desindexar(self, entradas):
+        if self._indice_desactualizado:
+            return
+        entradas = [e for e in entradas if e is not None]
+        if len(entradas) >= LOTE_INDICE:
+            self._indice_desactualizado = True
+            return
+        por_precio = self._platos_por_precio
+        for categoria, precio, nombre in entradas:
+            if not (self._quitar(por_precio[None], precio) and self._quitar(por_precio.get(categoria), precio)
+                    and self._quitar(self._platos_por_nombre, nombre)):
+                # la entrada no estaba donde debía: el índice no es confiable
+                self._indice_desactualizado = True
+                return
+
+    @staticmethod
+    def _quitar(platos, entrada):
+        """Borra `entrada` de la lista ordenada; False si no está."""
+        if platos is None:
+            return False
+        posicion = bisect_left(platos, entrada)
+        if posicion == len(platos) or platos[posicion] != entrada:
+            return False
+        del platos[posicion]
+        return True
+
+    def _reconstruir_indice(self):
+        por_precio = {None: []}
+        nombres = []
+        for codigo in self.menu:
+            entradas = self._entradas_indice(codigo)
+            if entradas is None:
                 continue
-            if precio_max is not None:
-                try:
-                    if info['precio'] > float(precio_max):
-                        continue
-                except Exception:
-                    raise ValueError("precio_max inválido")
-            resultados.append({'codigo': codigo, **info})
-        return resultados
+            categoria, precio, nombre = entradas
+            por_precio[None].append(precio)
+            por_precio.setdefault(categoria, []).append(precio)
+            nombres.append(nombre)
+        for platos in por_precio.values():
+            platos.sort()
+        nombres.sort()
+        self._platos_por_precio = por_precio
+        self._platos_por_nombre = nombres
+        self._indice_desactualizado = False
 
     # ---------------------------
     # GESTIÓN DE MESAS
@@ -159,16 +503,36 @@ class SistemaRestaurante:
         if not isinstance(capacidad, int) or capacidad < 1:
             raise ValueError("Capacidad inválida")
         # si la mesa está fuera del rango, la creamos/adaptamos
-        self.mesas.setdefault(numero, {
-            'capacidad': capacidad,
-            'ocupada': False,
-            'comensales': 0,
-            'hora_reserva': None,
-            'pedido_id': None
-        })
-        self.mesas[numero]['capacidad'] = capacidad
+        if numero not in self.mesas:
+            self.mesas[numero] = {
+                'capacidad': capacidad,
+                'ocupada': False,
+                'comensales': 0,
+                'hora_reserva': None,
+                'pedido_id': None
+            }
+            insort(self._mesas_libres, (capacidad, numero))
+        elif self.mesas[numero]['ocupada']:
+            self.mesas[numero]['capacidad'] = capacidad
+        else:
+            # reubicar la mesa libre en el índice según su nueva capacidad
+            self._marcar_mesa(numero, True)
+            self.mesas[numero]['capacidad'] = capacidad
+            self._marcar_mesa(numero, False)
         return True
 
+    def _marcar_mesa(self, numero, ocupada):
+        """Cambia el estado de la mesa manteniendo el índice de mesas libres."""
+        mesa = self.mesas[numero]
+        if mesa['ocupada'] == ocupada:
+            return
+        clave = (mesa['capacidad'], numero)
+        if ocupada:
+            del self._mesas_libres[bisect_left(self._mesas_libres, clave)]
+        else:
+            insort(self._mesas_libres, clave)
+        mesa['ocupada'] = ocupada
+
     def reservar_mesa(self, numero, comensales, hora=None):
         """
         Reservar mesa en hora (hora puede ser datetime.time o None = ahora).
@@ -184,7 +548,7 @@ class SistemaRestaurante:
         if comensales > mesa['capacidad']:
             raise CapacidadExcedida(numero, mesa['capacidad'], comensales)
         # aceptar reserva
-        mesa['ocupada'] = True
+        self._marcar_mesa(numero, True)
         mesa['comensales'] = int(comensales)
         mesa['hora_reserva'] = hora if isinstance(hora, time) or hora is None else mesa['hora_reserva']
         # crear un pedido inicial para la mesa
@@ -199,18 +563,30 @@ class SistemaRestaurante:
         if not mesa['ocupada']:
             raise ValueError("Mesa no está ocupada")
         # si hay pedido asociado y está abierto, lo dejamos intacto (se puede pagar después)
-        mesa['ocupada'] = False
+        self._marcar_mesa(numero, False)
         mesa['comensales'] = 0
         mesa['hora_reserva'] = None
         mesa['pedido_id'] = None
         return True
 
     def mesas_disponibles(self, comensales=1):
-        disponibles = []
-        for numero, info in self.mesas.items():
-            if (not info['ocupada']) and info['capacidad'] >= comensales:
-                disponibles.append(numero)
-        return disponibles
+        """Mesas libres con capacidad suficiente, de menor a mayor capacidad."""
+        inicio = bisect_left(self._mesas_libres, (comensales, 0))
+        return [numero for _, numero in self._mesas_libres[inicio:]]
+
+    def asignar_mesa(self, comensales, hora=None):
+        """
+        Reserva la mesa libre más pequeña en la que caben los comensales
+        (a igual capacidad, la de menor número).
+        Retorna (numero_mesa, pedido_id); si no hay mesa -> SinMesasDisponibles.
+        """
+        if not isinstance(comensales, int) or comensales < 1:
+            raise ValueError("Cantidad de comensales inválida")
+        posicion = bisect_left(self._mesas_libres, (comensales, 0))
+        if posicion == len(self._mesas_libres):
+            raise SinMesasDisponibles(comensales)
+        numero = self._mesas_libres[posicion][1]
+        return numero, self.reservar_mesa(numero, comensales, hora)
 
     # ---------------------------
     # GESTIÓN DE PEDIDOS
@@ -225,11 +601,13 @@ class SistemaRestaurante:
         if numero_mesa not in self.mesas:
             raise ValueError("Mesa no existe")
         pedido_id = self._generar_id_pedido()
-        self.pedidos[pedido_id] = {
+        self.pedidos[pedido_id] = self._pedidos_abiertos[pedido_id] = {
             'numero_mesa': numero_mesa,
             'items': {},  # codigo -> cantidad
+            'lineas': {},  # codigo -> precio y categoría al momento de pedir
+            'acumulado': 0.0,
             'estado': 'abierto',
-            'fecha': datetime.now(),
+            'fecha': self.reloj(),
             'subtotal': 0.0,
             'impuesto': 0.0,
             'propina': 0.0,
@@ -240,7 +618,7 @@ class SistemaRestaurante:
         mesa = self.mesas[numero_mesa]
         if mesa.get('pedido_id') is None:
             mesa['pedido_id'] = pedido_id
-            mesa['ocupada'] = True
+            self._marcar_mesa(numero_mesa, True)
         return pedido_id
 
     def agregar_item(self, id_pedido, codigo_plato, cantidad=1):
@@ -257,17 +635,22 @@ class SistemaRestaurante:
         if cantidad <= 0:
             raise ValueError("Cantidad debe ser positiva")
 
-        pedido['items'][codigo_plato] = pedido['items'].get(codigo_plato, 0) + int(cantidad)
+        cantidad = int(cantidad)
+        linea = pedido['lineas'].get(codigo_plato)
+        if linea is None:
+            # el precio queda fijo para el pedido aunque luego cambie el menú
+            linea = pedido['lineas'][codigo_plato] = {'precio': plato['precio'], 'categoria': plato['categoria']}
+        pedido['items'][codigo_plato] = pedido['items'].get(codigo_plato, 0) + cantidad
+        pedido['acumulado'] += linea['precio'] * cantidad
+        if self.cocina is not None:
+            self.cocina.recibir(id_pedido, pedido, codigo_plato, cantidad, linea['categoria'])
         return True
 
     def calcular_total(self, id_pedido, propina_porcentaje=None):
         if id_pedido not in self.pedidos:
             raise PedidoInvalido("Pedido no existe")
         pedido = self.pedidos[id_pedido]
-        subtotal = 0.0
-        for codigo, cantidad in pedido['items'].items():
-            precio = self.menu[codigo]['precio']
-            subtotal += precio * cantidad
+        subtotal = pedido['acumulado']
         impuesto = round(subtotal * self.tasa_impuesto, 2)
         if propina_porcentaje is None:
             propina_porcentaje = self.propina_sugerida
@@ -295,10 +678,11 @@ class SistemaRestaurante:
         totals = self.calcular_total(id_pedido, propina_porcentaje)
         pedido['pagado'] = True
         pedido['estado'] = 'pagado'
-        pedido['fecha_pago'] = datetime.now()
+        pedido['fecha_pago'] = self.reloj()
+        del self._pedidos_abiertos[id_pedido]
         # actualizar indicadores de ventas: incrementar vendidos en menú
         for codigo, cantidad in pedido['items'].items():
-            self.menu[codigo]['vendidos'] = self.menu[codigo].get('vendidos', 0) + cantidad
+            self._sumar_vendidos(codigo, cantidad, pedido['fecha_pago'])
         # asignar a ventas históricas (copia del pedido)
         venta_record = {
             'id_pedido': id_pedido,
@@ -308,9 +692,15 @@ class SistemaRestaurante:
             'impuesto': pedido['impuesto'],
             'propina': pedido['propina'],
             'total': pedido['total'],
-            'items': dict(pedido['items'])
+            'items': dict(pedido['items']),
+            'lineas': pedido['lineas']
         }
         self.ventas.append(venta_record)
+        for codigo, cantidad in pedido['items'].items():
+            linea = pedido['lineas'][codigo]
+            self._ingresos_categoria[linea['categoria']] = (
+                self._ingresos_categoria.get(linea['categoria'], 0.0) + linea['precio'] * cantidad)
+        self._acumular_venta_dia(venta_record)
         # liberar mesa asociada
         numero = pedido['numero_mesa']
         if numero in self.mesas:
@@ -318,57 +708,156 @@ class SistemaRestaurante:
             # solo liberar si la mesa tiene ese pedido_id
             if mesa.get('pedido_id') == id_pedido:
                 mesa['pedido_id'] = None
-                mesa['ocupada'] = False
+                self._marcar_mesa(numero, False)
                 mesa['comensales'] = 0
                 mesa['hora_reserva'] = None
+        if self.archivo is not None:
+            self._pagados_sin_archivar.append(id_pedido)
+            if len(self._pagados_sin_archivar) >= self.archivo.pedidos_por_segmento:
+                try:
+                    self.archivar_pagados()
+                except OSError:
+                    # el pago ya se aplicó; los pedidos siguen en memoria y
+                    # el corte se reintenta con el próximo pago
+                    pass
         return venta_record
 
+    def conectar_cocina(self, cocina):
+        """Envía cada línea agregada a un pedido como ticket a `cocina` (Cocina)."""
+        self.cocina = cocina
+
+    # ---------------------------
+    # ARCHIVO DE PEDIDOS PAGADOS
+    # ---------------------------
+
+    def conectar_archivo(self, archivo):
+        """
+        Mueve los pedidos pagados a `archivo` (ArchivoPedidos) cada
+        archivo.pedidos_por_segmento pagos; los ya pagados se archivan en el
+        próximo corte.
+        """
+        self.archivo = archivo
+        self._pagados_sin_archivar = [pid for pid, p in self.pedidos.items() if p['pagado']]
+
+    def archivar_pagados(self):
+        """
+        Escribe en el archivo los pedidos pagados que siguen en memoria y los
+        quita de `pedidos` y `ventas`. Retorna la cantidad archivada.
+        Si la escritura falla no se quita nada: los pedidos siguen en memoria
+        y el próximo corte los vuelve a intentar.
+        """
+        if self.archivo is None:
+            raise ValueError("No hay archivo de pedidos conectado")
+        pagados = [(pid, self.pedidos[pid]) for pid in self._pagados_sin_archivar]
+        self.archivo.guardar(pagados)
+        for pid, _ in pagados:
+            del self.pedidos[pid]
+        self._pagados_sin_archivar = []
+        # ventas solo contiene pedidos pagados, todos incluidos en este corte
+        self._ventas_archivadas += len(self.ventas)
+        self.ventas.clear()
+        return len(pagados)
+
+    def obtener_pedido(self, id_pedido):
+        """Pedido en memoria o, si ya se archivó, leído del archivo."""
+        pedido = self.pedidos.get(id_pedido)
+        if pedido is None and self.archivo is not None:
+            pedido = self.archivo.buscar(id_pedido)
+        if pedido is None:
+            raise PedidoInvalido("Pedido no existe")
+        return pedido
+
     # ---------------------------
     # REPORTES Y ESTADÍSTICAS
     # ---------------------------
 
-    def platos_mas_vendidos(self, n=5):
-        lista = []
-        for codigo, info in self.menu.items():
-            lista.append((codigo, info['nombre'], info.get('vendidos', 0)))
-        lista.sort(key=lambda x: x[2], reverse=True)
-        return lista[:n]
+    def _agregar_al_ranking(self, codigo):
+        orden = self._orden_plato[codigo] = len(self._orden_plato)
+        # un plato nuevo no tiene ventas y su orden es el mayor: va al final
+        self._ranking.append((-self.menu[codigo]['vendidos'], orden, codigo))
+
+    def _sumar_vendidos(self, codigo, cantidad, instante):
+        """Actualiza vendidos, la posición del plato en el ranking y las ventanas."""
+        plato = self.menu[codigo]
+        orden = self._orden_plato[codigo]
+        del self._ranking[bisect_left(self._ranking, (-plato['vendidos'], orden, codigo))]
+        plato['vendidos'] += cantidad
+        insort(self._ranking, (-plato['vendidos'], orden, codigo))
+        for ventana in self.ventanas.values():
+            ventana.registrar(instante, codigo, cantidad)
+
+    def platos_mas_vendidos(self, n=5, ventana=None):
+        """
+        Los n platos más vendidos: [(codigo, nombre, vendidos)].
+        - ventana: None (histórico), 'hora' o 'dia' (últimos 60 minutos / 24 horas)
+        """
+        if ventana is None:
+            return [(codigo, self.menu[codigo]['nombre'], -negativo)
+                    for negativo, _, codigo in self._ranking[:n]]
+        if ventana not in self.ventanas:
+            raise ValueError(f"Ventana inválida: {ventana}")
+        return [(codigo, self.menu[codigo]['nombre'], cantidad)
+                for codigo, cantidad in self.ventanas[ventana].mas_vendidos(n, self.reloj())]
 
     def ventas_por_categoria(self):
-        agg = {}
-        for venta in self.ventas:
-            for codigo, cantidad in venta['items'].items():
-                categoria = self.menu[codigo]['categoria']
-                valor = self.menu[codigo]['precio'] * cantidad
-                agg[categoria] = agg.get(categoria, 0.0) + valor
-        # round values
-        return {k: round(v, 2) for k, v in agg.items()}
+        """Ingresos por categoría con los precios y categorías vigentes al momento de cada pedido."""
+        return {k: round(v, 2) for k, v in self._ingresos_categoria.items()}
 
-    def reporte_ventas_dia(self, fecha=None):
+    def _acumular_venta_dia(self, venta):
+        """Suma la venta a los totales de su día (un bucket por fecha)."""
+        fecha = venta['fecha'].date()
+        dia = self.ventas_por_dia.get(fecha)
+        if dia is None:
+            dia = self.ventas_por_dia[fecha] = {
+                'pedidos': 0,
+                'ventas': 0.0,
+                'impuesto': 0.0,
+                'propina': 0.0,
+                'items': 0,
+                'por_categoria': {}
+            }
+        dia['pedidos'] += 1
+        dia['ventas'] += venta['total']
+        dia['impuesto'] += venta['impuesto']
+        dia['propina'] += venta['propina']
+        por_categoria = dia['por_categoria']
+        lineas = venta['lineas']
+        for codigo, cantidad in venta['items'].items():
+            dia['items'] += cantidad
+            categoria = lineas[codigo]['categoria']
+            por_categoria[categoria] = por_categoria.get(categoria, 0) + cantidad
+
+    def reporte_ventas_rango(self, desde, hasta):
         """
-        Si fecha es None -> hoy. fecha debe ser datetime.date si se pasa.
-        Retorna: total_ventas, total_impuesto, total_propina, total_items_vendidos, detalle_por_categoria
+        Totales de ventas entre las fechas desde y hasta (datetime.date, ambas incluidas).
+        Solo consulta los buckets diarios: el costo depende de los días del rango,
+        no de la cantidad de ventas históricas.
         """
-        if fecha is None:
-            fecha = datetime.now().date()
+        if hasta < desde:
+            raise ValueError("La fecha final es anterior a la inicial")
+        tot_pedidos = 0
         tot_ventas = 0.0
         tot_impuesto = 0.0
         tot_propina = 0.0
         tot_items = 0
         detalle_cat = {}
-        for venta in self.ventas:
-            vfecha = venta['fecha'].date()
-            if vfecha != fecha:
+        fecha = desde
+        while fecha <= hasta:
+            dia = self.ventas_por_dia.get(fecha)
+            fecha += timedelta(days=1)
+            if dia is None:
                 continue
-            tot_ventas += venta['total']
-            tot_impuesto += venta['impuesto']
-            tot_propina += venta['propina']
-            for codigo, cantidad in venta['items'].items():
-                tot_items += cantidad
-                categoria = self.menu[codigo]['categoria']
+            tot_pedidos += dia['pedidos']
+            tot_ventas += dia['ventas']
+            tot_impuesto += dia['impuesto']
+            tot_propina += dia['propina']
+            tot_items += dia['items']
+            for categoria, cantidad in dia['por_categoria'].items():
                 detalle_cat[categoria] = detalle_cat.get(categoria, 0) + cantidad
         return {
-            'fecha': fecha.isoformat(),
+            'desde': desde.isoformat(),
+            'hasta': hasta.isoformat(),
+            'pedidos': tot_pedidos,
             'total_ventas': round(tot_ventas, 2),
             'total_impuesto': round(tot_impuesto, 2),
             'total_propina': round(tot_propina, 2),
@@ -376,6 +865,30 @@ class SistemaRestaurante:
             'detalle_por_categoria': detalle_cat
         }
 
+    def reporte_ventas_dia(self, fecha=None):
+        """
+        Si fecha es None -> hoy. fecha debe ser datetime.date si se pasa.
+        Retorna: total_ventas, total_impuesto, total_propina, total_items_vendidos, detalle_por_categoria
+        """
+        if fecha is None:
+            fecha = self.reloj().date()
+        reporte = self.reporte_ventas_rango(fecha, fecha)
+        return {
+            'fecha': fecha.isoformat(),
+            'total_ventas': reporte['total_ventas'],
+            'total_impuesto': reporte['total_impuesto'],
+            'total_propina': reporte['total_propina'],
+            'total_items_vendidos': reporte['total_items_vendidos'],
+            'detalle_por_categoria': reporte['detalle_por_categoria']
+        }
+
+    def reporte_ventas_semana(self, fecha=None):
+        """Totales de la semana (lunes a domingo) que contiene `fecha` (por defecto, hoy)."""
+        if fecha is None:
+            fecha = self.reloj().date()
+        lunes = fecha - timedelta(days=fecha.weekday())
+        return self.reporte_ventas_rango(lunes, lunes + timedelta(days=6))
+
     def estado_restaurante(self):
         mesas_info = {}
         for numero, info in self.mesas.items():
@@ -385,11 +898,11 @@ class SistemaRestaurante:
                 'comensales': info['comensales'],
                 'pedido_id': info['pedido_id']
             }
-        pedidos_activos = {pid: {'numero_mesa': p['numero_mesa'], 'items': p['items'], 'pagado': p['pagado']} for pid, p in self.pedidos.items() if not p.get('pagado', False)}
+        pedidos_activos = {pid: {'numero_mesa': p['numero_mesa'], 'items': p['items'], 'pagado': p['pagado']} for pid, p in self._pedidos_abiertos.items()}
         return {
             'mesas': mesas_info,
             'pedidos_activos': pedidos_activos,
-            'ventas_totales_historicas': len(self.ventas)
+            'ventas_totales_historicas': self._ventas_archivadas + len(self.ventas)
         }
 
     # ---------------------------
@@ -415,6 +928,7 @@ class SistemaRestaurante:
     def importar_menu(self, archivo='menu.txt'):
         exitosos = 0
         errores = []
+        importados = []
         if not os.path.exists(archivo):
             return {'exitosos': 0, 'errores': [(0, 'Archivo no existe')]}
         with open(archivo, 'r', encoding='utf-8') as f:
@@ -440,11 +954,58 @@ class SistemaRestaurante:
                         'disponible': disponible,
                         'vendidos': 0
                     }
+                    self._agregar_al_ranking(codigo)
+                    self._tocar_plato(codigo)
+                    importados.append(codigo)
                     exitosos += 1
                 except Exception as e:
                     errores.append((i, str(e)))
+        self._indexar(importados)
         return {'exitosos': exitosos, 'errores': errores}
 
+    def _importar_filas_menu(self, filas, recuperados=None):
+        """
+        Aplica filas ya convertidas por importador_menu, en orden:
+        (posicion, codigo, nombre, categoria, precio, disponible, error), con
+        error = mensaje si la fila no se pudo convertir. Igual que
+        importar_menu, un código repetido se informa como duplicado (gana la
+        primera aparición).
+        - recuperados: set de códigos que ya agregó una importación
+          interrumpida de estas mismas filas; su primera aparición cuenta
+          como importada (y se quita del set) en lugar de como duplicado.
+        Retorna (exitosos, [(posicion, mensaje)]).
+        """
+        menu = self.menu
+        errores = []
+        importados = []
+        ya_importados = 0
+        for posicion, codigo, nombre, categoria, precio, disponible, error in filas:
+            if codigo in menu and recuperados and codigo in recuperados:
+                recuperados.discard(codigo)
+                if codigo not in self._orden_plato:
+                    self._agregar_al_ranking(codigo)
+                    self._tocar_plato(codigo)
+                # no se sabe si llegó a indexarse: se reconstruye en la próxima búsqueda
+                self._indice_desactualizado = True
+                ya_importados += 1
+            elif codigo in menu:
+                errores.append((posicion, 'Duplicado: código ya existe'))
+            elif error is not None:
+                errores.append((posicion, error))
+            else:
+                menu[codigo] = {
+                    'nombre': nombre,
+                    'categoria': categoria,
+                    'precio': precio,
+                    'disponible': disponible,
+                    'vendidos': 0
+                }
+                self._agregar_al_ranking(codigo)
+                self._tocar_plato(codigo)
+                importados.append(codigo)
+        self._indexar(importados)
+        return len(importados) + ya_importados, errores
+
 
 # ===========================================================================
 # EJEMPLO DE USO / PRUEBAS
@@ -466,6 +1027,7 @@ if __name__ == "__main__":
     print("\nMenú disponible:")
     for p in sistema.buscar_platos():
         print(f"  {p['codigo']} - {p['nombre']} ${p['precio']}")
+    print("Empiezan con 'ham':", [p['codigo'] for p in sistema.buscar_por_nombre("ham")])
 
     # Configurar mesa 1 para 4 comensales
     sistema.configurar_mesa(1, 4)
@@ -496,6 +1058,7 @@ if __name__ == "__main__":
     # Reportes
     print("\nPlatos más vendidos:")
     print(sistema.platos_mas_vendidos())
+    print("Última hora:", sistema.platos_mas_vendidos(3, ventana='hora'))
 
     print("\nVentas por categoría:")
     print(sistema.ventas_por_categoria())
@@ -503,6 +1066,9 @@ if __name__ == "__main__":
     print("\nReporte ventas del día:")
     print(sistema.reporte_ventas_dia())
 
+    print("\nReporte ventas de la semana:")
+    print(sistema.reporte_ventas_semana())
+
     # Exportar menú a archivo demo_menu.txt
     sistema.exportar_menu('demo_menu.txt')
     print("\nMenú exportado a 'demo_menu.txt'")
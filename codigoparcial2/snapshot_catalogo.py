@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Instantánea binaria de solo lectura del catálogo, para abrir con mmap.
+
+exportar_snapshot() escribe en un único archivo:
+- Cabecera con las posiciones de cada sección.
+- Registros de ancho fijo ordenados por ISBN (búsqueda binaria por ISBN).
+- Montículo de cadenas (títulos, autores, categorías y sus textos
+  normalizados), con cadenas repetidas guardadas una sola vez.
+- Tres índices (n-gramas de título, n-gramas de autor, categoría): tablas
+  de entradas ordenadas por clave que apuntan a listas de filas (uint32).
+
+CatalogoMapeado abre el archivo con mmap: el arranque no depende del
+tamaño del catálogo y varios procesos comparten las mismas páginas del
+caché del sistema operativo.
+"""
+
+from array import array
+from bisect import bisect_left
+import mmap
+import struct
+import sys
+
+from sistema_biblioteca import TAMANIO_NGRAMA, generar_ngramas, normalizar_texto
+
+MAGICO = b'BIBSNAP1'
+VERSION = 1
+INDICES = ('titulo', 'autor', 'categoria')
+
+# magico, version, num_libros, off_registros, off_cadenas, off_postings,
+# y (off_tabla, num_entradas) para cada índice
+CABECERA = struct.Struct('<8sII' + 'QQQ' + 'QI' * len(INDICES))
+# isbn, orden, (off, len) x [titulo, autor, categoria, titulo_norm, autor_norm],
+# anio, copias_total, copias_disponibles, prestamos
+REGISTRO = struct.Struct('<qI' + 'II' * 5 + 'Hiii')
+# off_clave, len_clave, off_posting, num_filas
+ENTRADA = struct.Struct('<IIQI')
+# desplazamiento de una cadena ausente (categoría None)
+NULO = 0xFFFFFFFF
+
+
+def _a_bytes(filas):
+    datos = array('I', filas)
+    if sys.byteorder != 'little':
+        datos.byteswap()
+    return datos.tobytes()
+
+
+# ===========================================================================
+# EXPORTADOR
+# ===========================================================================
+
+def exportar_snapshot(catalogo, ruta):
+    """
+    Escribe `catalogo` ({isbn: registro}, p. ej. SistemaBiblioteca.catalogo)
+    y sus índices de búsqueda en `ruta`.
+    """
+    orden = {isbn: i for i, isbn in enumerate(catalogo)}
+    isbns = sorted(catalogo, key=int)
+
+    cadenas = bytearray()
+    posiciones = {}
+
+    def guardar(texto):
+        if texto is None:
+            return (NULO, 0)
+        if texto not in posiciones:
+            datos = texto.encode('utf-8')
+            posiciones[texto] = (len(cadenas), len(datos))
+            cadenas.extend(datos)
+        return posiciones[texto]
+
+    registros = bytearray()
+    indices = {nombre: {} for nombre in INDICES}
+    for fila, isbn in enumerate(isbns):
+        info = catalogo[isbn]
+        normalizados = [normalizar_texto(info['titulo']), normalizar_texto(info['autor'])]
+        campos = []
+        for texto in (info['titulo'], info['autor'], info['categoria'], *normalizados):
+            campos.extend(guardar(texto))
+        registros += REGISTRO.pack(int(isbn), orden[isbn], *campos, info['anio'],
+                                   info['copias_total'], info['copias_disponibles'], info['prestamos'])
+        for nombre, texto in zip(('titulo', 'autor'), normalizados):
+            # la clave '' agrupa los textos más cortos que un n-grama
+            claves = generar_ngramas(texto) if len(texto) >= TAMANIO_NGRAMA else {''}
+            for ngrama in claves:
+                indices[nombre].setdefault(ngrama, []).append(fila)
+        if info['categoria'] is not None:
+            indices['categoria'].setdefault(info['categoria'], []).append(fila)
+
+    postings = bytearray()
+    tablas = {}
+    for nombre in INDICES:
+        tabla = bytearray()
+        claves = sorted(indices[nombre], key=lambda c: c.encode('utf-8'))
+        for clave in claves:
+            filas = indices[nombre][clave]
+            off_clave, len_clave = guardar(clave)
+            tabla += ENTRADA.pack(off_clave, len_clave, len(postings), len(filas))
+            postings += _a_bytes(filas)
+        tablas[nombre] = (tabla, len(claves))
+
+    off_registros = CABECERA.size
+    off_cadenas = off_registros + len(registros)
+    off_postings = off_cadenas + len(cadenas)
+    off_tabla = off_postings + len(postings)
+    directorio = []
+    for nombre in INDICES:
+        tabla, num_entradas = tablas[nombre]
+        directorio += [off_tabla, num_entradas]
+        off_tabla += len(tabla)
+
+    with open(ruta, 'wb') as f:
+        f.write(CABECERA.pack(MAGICO, VERSION, len(isbns), off_registros, off_cadenas, off_postings, *directorio))
+        f.write(registros)
+        f.write(cadenas)
+        f.write(postings)
+        for nombre in INDICES:
+            f.write(tablas[nombre][0])
+    return len(isbns)
+
+
+# ===========================================================================
+# LECTOR MAPEADO EN MEMORIA
+# ===========================================================================
+
+class CatalogoMapeado:
+    """
+    Catálogo de solo lectura sobre un archivo de exportar_snapshot().
+    Soporta catalogo[isbn], `isbn in catalogo`, len(), iteración y
+    buscar_libros() con la misma semántica que SistemaBiblioteca.
+    """
+
+    def __init__(self, ruta):
+        self._archivo = open(ruta, 'rb')
+        self._mm = mmap.mmap(self._archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        campos = CABECERA.unpack_from(self._mm, 0)
+        magico, version, self._num_libros, self._off_registros, self._off_cadenas, self._off_postings = campos[:6]
+        if magico != MAGICO or version != VERSION:
+            raise ValueError("Archivo de instantánea inválido o de otra versión")
+        directorio = campos[6:]
+        self._tablas = {nombre: (directorio[2 * i], directorio[2 * i + 1]) for i, nombre in enumerate(INDICES)}
+
+    def cerrar(self):
+        self._mm.close()
+        self._archivo.close()
+
+    # ---- acceso a bajo nivel ----
+
+    def _cadena(self, off, largo):
+        if off == NULO:
+            return None
+        inicio = self._off_cadenas + off
+        return str(self._mm[inicio:inicio + largo], 'utf-8')
+
+    def _registro(self, fila):
+        return REGISTRO.unpack_from(self._mm, self._off_registros + fila * REGISTRO.size)
+
+    def _isbn_fila(self, fila):
+        return struct.unpack_from('<q', self._mm, self._off_registros + fila * REGISTRO.size)[0]
+
+    def _buscar_fila(self, isbn):
+        if not (isinstance(isbn, str) and len(isbn) == 13 and isbn.isdigit()):
+            return None
+        clave = int(isbn)
+        bajo, alto = 0, self._num_libros
+        while bajo < alto:
+            medio = (bajo + alto) // 2
+            if self._isbn_fila(medio) < clave:
+                bajo = medio + 1
+            else:
+                alto = medio
+        if bajo < self._num_libros and self._isbn_fila(bajo) == clave:
+            return bajo
+        return None
+
+    def _libro(self, fila):
+        r = self._registro(fila)
+        return {
+            'titulo': self._cadena(r[2], r[3]),
+            'autor': self._cadena(r[4], r[5]),
+            'anio': r[12],
+            'categoria': self._cadena(r[6], r[7]),
+            'copias_total': r[13],
+            'copias_disponibles': r[14],
+            'prestamos': r[15]
+        }
+
+    def _normalizado(self, fila, campo):
+        r = self._registro(fila)
+        return self._cadena(r[8], r[9]) if campo == 'titulo' else self._cadena(r[10], r[11])
+
+    def _posting(self, off, cantidad):
+        # copia: ninguna vista sobre el mmap sobrevive a la consulta, así que
+        # cerrar() no falla aunque el llamador conserve el resultado
+        inicio = self._off_postings + off
+        filas = array('I')
+        filas.frombytes(self._mm[inicio:inicio + 4 * cantidad])
+        if sys.byteorder != 'little':
+            filas.byteswap()
+        return filas
+
+    def _entrada(self, indice, i):
+        off_tabla, _ = self._tablas[indice]
+        return ENTRADA.unpack_from(self._mm, off_tabla + i * ENTRADA.size)
+
+    def _filas_de(self, indice, clave):
+        """Lista de filas (uint32, ordenadas) para `clave`; vacía si no existe."""
+        objetivo = clave.encode('utf-8')
+        _, num_entradas = self._tablas[indice]
+        bajo, alto = 0, num_entradas
+        while bajo < alto:
+            medio = (bajo + alto) // 2
+            off_clave, len_clave, _, _ = self._entrada(indice, medio)
+            inicio = self._off_cadenas + off_clave
+            if self._mm[inicio:inicio + len_clave] < objetivo:
+                bajo = medio + 1
+            else:
+                alto = medio
+        if bajo < num_entradas:
+            off_clave, len_clave, off_posting, cantidad = self._entrada(indice, bajo)
+            inicio = self._off_cadenas + off_clave
+            if self._mm[inicio:inicio + len_clave] == objetivo:
+                return self._posting(off_posting, cantidad)
+        return ()
+
+    @staticmethod
+    def _contiene(filas, fila):
+        i = bisect_left(filas, fila)
+        return i < len(filas) and filas[i] == fila
+
+    # ---- interfaz de mapeo ----
+
+    def __getitem__(self, isbn):
+        fila = self._buscar_fila(isbn)
+        if fila is None:
+            raise KeyError(isbn)
+        return self._libro(fila)
+
+    def __contains__(self, isbn):
+        return self._buscar_fila(isbn) is not None
+
+    def __len__(self):
+        return self._num_libros
+
+    def __iter__(self):
+        return (f"{self._isbn_fila(fila):013d}" for fila in range(self._num_libros))
+
+    # ---- búsqueda ----
+
+    def _candidatos(self, campo, valor):
+        if len(valor) >= TAMANIO_NGRAMA:
+            listas = [self._filas_de(campo, ngrama) for ngrama in generar_ngramas(valor)]
+            if not all(listas):
+                return set()
+            listas.sort(key=len)
+            candidatos = {fila for fila in listas[0]
+                          if all(self._contiene(otra, fila) for otra in listas[1:])}
+        else:
+            candidatos = set()
+            for i in range(self._tablas[campo][1]):
+                off_clave, len_clave, off_posting, cantidad = self._entrada(campo, i)
+                if valor in self._cadena(off_clave, len_clave) or len_clave == 0:
+                    candidatos.update(self._posting(off_posting, cantidad))
+        return {fila for fila in candidatos if valor in self._normalizado(fila, campo)}
+
+    def buscar_libros(self, criterio='titulo', valor='', categoria=None):
+        valor = normalizar_texto(valor)
+        if criterio in ('titulo', 'autor') and valor:
+            filas = self._candidatos(criterio, valor)
+            if categoria:
+                de_categoria = self._filas_de('categoria', categoria)
+                filas = {fila for fila in filas if self._contiene(de_categoria, fila)}
+        elif categoria:
+            filas = self._filas_de('categoria', categoria)
+        else:
+            filas = range(self._num_libros)
+        resultados = []
+        for fila in filas:
+            info = self._libro(fila)
+            if valor and criterio not in ('titulo', 'autor') and valor not in normalizar_texto(info.get(criterio, '')):
+                continue
+            resultados.append((self._registro(fila)[1], {'isbn': f"{self._isbn_fila(fila):013d}", **info}))
+        resultados.sort(key=lambda par: par[0])
+        return [libro for _, libro in resultados]
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+    import time
+
+    from sistema_biblioteca import SistemaBiblioteca
+
+    sistema = SistemaBiblioteca()
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'catalogo_inicial.txt'), encoding='utf-8') as f:
+        for linea in f:
+            if linea.strip():
+                isbn, titulo, autor, anio, categoria, copias = linea.strip().split('|')
+                sistema.agregar_libro(isbn, titulo, autor, int(anio), categoria, int(copias))
+
+    ruta = os.path.join(tempfile.mkdtemp(), 'catalogo.snap')
+    print("Libros exportados:", exportar_snapshot(sistema.catalogo, ruta))
+    inicio = time.perf_counter()
+    mapeado = CatalogoMapeado(ruta)
+    print(f"Apertura: {(time.perf_counter() - inicio) * 1000:.3f} ms")
+    print("Búsqueda 'python':", [l['titulo'] for l in mapeado.buscar_libros('titulo', 'python')])
+    print("Iguales a la búsqueda en memoria:",
+          mapeado.buscar_libros('autor', 'ramalho') == sistema.buscar_libros('autor', 'ramalho'))
+    mapeado.cerrar()
@@ -0,0 +1,181 @@
+"""
+Pruebas del almacenamiento SQLite + WAL de SistemaBiblioteca.
+"""
+
+from datetime import datetime, timedelta
+import json
+import os
+import threading
+import time
+
+import pytest
+
+import almacenamiento_biblioteca
+from almacenamiento_biblioteca import AlmacenamientoSQLite
+from sistema_biblioteca import SistemaBiblioteca
+
+INICIO = datetime(2025, 3, 3, 10, 0)
+ISBN = "9780000000001"
+
+
+def _abrir(ruta, **opciones):
+    return SistemaBiblioteca(almacenamiento=AlmacenamientoSQLite(ruta, **opciones), reloj=lambda: INICIO)
+
+
+def _poblar(sistema, usuarios=1):
+    sistema.agregar_libro(ISBN, "Rayuela", "Julio Cortázar", 1963, "Novela", 5)
+    for i in range(usuarios):
+        sistema.registrar_usuario(f"u{i}", f"Usuario {i}", f"u{i}@example.com")
+
+
+def test_estado_se_restaura_desde_el_wal(tmp_path):
+    ruta = str(tmp_path / "biblioteca.db")
+    sistema = _abrir(ruta)
+    _poblar(sistema)
+    id_prestamo = sistema.prestar_libro(ISBN, "u0")
+    sistema.devolver_libro(id_prestamo)
+    sistema.prestar_libro(ISBN, "u0")
+    sistema._almacenamiento.cerrar()
+
+    restaurado = _abrir(ruta)
+    assert restaurado.catalogo[ISBN]['copias_disponibles'] == 4
+    assert restaurado.usuarios["u0"]['historial'] == [id_prestamo]
+    assert restaurado.usuarios["u0"]['prestamos_activos'] == {"P0002"}
+    assert restaurado.prestamos == sistema.prestamos
+    assert restaurado.contador_prestamos == 3
+
+
+def test_operacion_es_durable_al_retornar(tmp_path):
+    ruta = str(tmp_path / "biblioteca.db")
+    sistema = _abrir(ruta)
+    _poblar(sistema)
+    id_prestamo = sistema.prestar_libro(ISBN, "u0")
+    # caída: no se cierra el almacenamiento; otro proceso lee lo que hay en disco
+    restaurado = _abrir(ruta)
+    assert id_prestamo in restaurado.prestamos
+    assert restaurado.catalogo[ISBN]['copias_disponibles'] == 4
+
+
+def test_hilos_concurrentes_comparten_fsync(tmp_path, monkeypatch):
+    fsync_original = os.fsync
+    llamadas = []
+
+    def fsync_lento(descriptor):
+        llamadas.append(descriptor)
+        time.sleep(0.005)
+        fsync_original(descriptor)
+
+    ruta = str(tmp_path / "biblioteca.db")
+    sistema = _abrir(ruta)
+    _poblar(sistema, usuarios=16)
+    sistema.limite_prestamos = 100
+    sistema.catalogo[ISBN]['copias_disponibles'] = 1000
+    monkeypatch.setattr(almacenamiento_biblioteca.os, 'fsync', fsync_lento)
+
+    def trabajador(id_usuario):
+        for _ in range(10):
+            sistema.prestar_libro(ISBN, id_usuario)
+
+    hilos = [threading.Thread(target=trabajador, args=(f"u{i}",)) for i in range(16)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert len(llamadas) < 100
+    restaurado = _abrir(ruta)
+    assert len(restaurado.prestamos) == 160
+
+
+def test_grupo_sincroniza_una_vez_al_salir(tmp_path, monkeypatch):
+    ruta = str(tmp_path / "biblioteca.db")
+    sistema = _abrir(ruta)
+    _poblar(sistema, usuarios=3)
+    llamadas = []
+    fsync_original = os.fsync
+    monkeypatch.setattr(almacenamiento_biblioteca.os, 'fsync',
+                        lambda descriptor: llamadas.append(descriptor) or fsync_original(descriptor))
+    with sistema._almacenamiento.grupo():
+        for i in range(3):
+            sistema.prestar_libro(ISBN, f"u{i}")
+        assert llamadas == []
+    assert len(llamadas) == 1
+    assert len(_abrir(ruta).prestamos) == 3
+
+
+def test_historial_se_escribe_como_delta(tmp_path):
+    ruta = str(tmp_path / "biblioteca.db")
+    sistema = _abrir(ruta)
+    _poblar(sistema)
+    for _ in range(30):
+        sistema.devolver_libro(sistema.prestar_libro(ISBN, "u0"))
+    sistema._almacenamiento.cerrar()
+
+    with open(ruta + '.wal', encoding='utf-8') as f:
+        usuarios = [json.loads(linea) for linea in f if linea.startswith('["usuario"')]
+    # cada devolución anexa un solo préstamo: la línea no crece con el historial
+    assert all(len(linea[3]['historial'][1]) <= 1 for linea in usuarios)
+    assert all('historial' not in linea[2] for linea in usuarios)
+    assert _abrir(ruta).usuarios["u0"]['historial'] == [f"P{i:04d}" for i in range(1, 31)]
+
+
+def test_snapshot_trunca_el_wal_y_conserva_la_cola(tmp_path):
+    ruta = str(tmp_path / "biblioteca.db")
+    sistema = _abrir(ruta, snapshot_cada=5)
+    _poblar(sistema)
+    for _ in range(4):
+        sistema.devolver_libro(sistema.prestar_libro(ISBN, "u0"))
+    sistema._almacenamiento.cerrar()
+
+    with open(ruta + '.wal', encoding='utf-8') as f:
+        assert len(f.readlines()) < 5
+    restaurado = _abrir(ruta)
+    assert restaurado.usuarios["u0"]['historial'] == ["P0001", "P0002", "P0003", "P0004"]
+    assert restaurado.catalogo[ISBN]['copias_disponibles'] == 5
+
+
+def test_caida_entre_commit_y_truncado_no_duplica_el_historial(tmp_path, monkeypatch):
+    ruta = str(tmp_path / "biblioteca.db")
+    sistema = _abrir(ruta)
+    _poblar(sistema)
+    for _ in range(2):
+        sistema.devolver_libro(sistema.prestar_libro(ISBN, "u0"))
+
+    def caida(*args):
+        raise OSError("caída antes de truncar el WAL")
+
+    monkeypatch.setattr(sistema._almacenamiento._wal, 'truncate', caida)
+    with pytest.raises(OSError):
+        sistema._almacenamiento.guardar_snapshot(sistema)
+    # la instantánea quedó en SQLite y el WAL sigue completo: se reaplica entero
+    restaurado = _abrir(ruta)
+    assert restaurado.usuarios["u0"]['historial'] == ["P0001", "P0002"]
+    assert restaurado.catalogo[ISBN]['copias_disponibles'] == 5
+
+
+def test_linea_truncada_del_wal_se_descarta(tmp_path):
+    ruta = str(tmp_path / "biblioteca.db")
+    sistema = _abrir(ruta)
+    _poblar(sistema)
+    sistema._almacenamiento.cerrar()
+    with open(ruta + '.wal', 'a', encoding='utf-8') as f:
+        f.write('["prestamo","P0001",{"isbn":')
+    restaurado = _abrir(ruta)
+    assert restaurado.prestamos == {}
+    assert ISBN in restaurado.catalogo
+
+
+def test_multas_proyectadas_se_recalculan_al_restaurar(tmp_path):
+    ruta = str(tmp_path / "biblioteca.db")
+    reloj = [INICIO]
+    sistema = SistemaBiblioteca(almacenamiento=AlmacenamientoSQLite(ruta), dias_prestamo=7,
+                                reloj=lambda: reloj[0])
+    _poblar(sistema)
+    sistema.prestar_libro(ISBN, "u0")
+    reloj[0] = INICIO + timedelta(days=12)
+    sistema.actualizar_multas()
+    sistema._almacenamiento.cerrar()
+
+    restaurado = SistemaBiblioteca(almacenamiento=AlmacenamientoSQLite(ruta), dias_prestamo=7,
+                                   reloj=lambda: reloj[0])
+    assert restaurado.obtener_estado_usuario("u0")['multas_proyectadas'] == 5.0
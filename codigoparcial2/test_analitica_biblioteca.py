@@ -0,0 +1,99 @@
+"""
+Pruebas de los agregados de préstamos (AnaliticaPrestamos).
+"""
+
+from datetime import date, datetime
+
+import pytest
+
+from analitica_biblioteca import AnaliticaPrestamos, descomponer_ventana
+from sistema_biblioteca import SistemaBiblioteca
+
+INICIO = datetime(2025, 1, 30, 10, 0)
+NOVELA = "9780000000001"
+CUENTO = "9780000000002"
+
+
+def _biblioteca(reloj):
+    sistema = SistemaBiblioteca(dias_prestamo=7, multa_por_dia=1.0, limite_prestamos=10, reloj=reloj)
+    sistema.agregar_libro(NOVELA, "Rayuela", "Julio Cortázar", 1963, "Novela", 5)
+    sistema.agregar_libro(CUENTO, "Ficciones", "Jorge Luis Borges", 1944, "Cuento", 5)
+    sistema.registrar_usuario("u1", "Ana", "ana@example.com")
+    return sistema
+
+
+def test_descomponer_ventana_usa_periodos_completos():
+    assert descomponer_ventana(date(2024, 12, 30), date(2026, 2, 2)) == [
+        ('d', date(2024, 12, 30)), ('d', date(2024, 12, 31)),
+        ('a', 2025),
+        ('m', 2026, 1),
+        ('d', date(2026, 2, 1)), ('d', date(2026, 2, 2)),
+    ]
+    assert descomponer_ventana(date(2025, 3, 1), date(2025, 3, 31)) == [('m', 2025, 3)]
+
+
+def test_mas_prestados_por_ventana(reloj):
+    sistema = _biblioteca(reloj)
+    analitica = AnaliticaPrestamos(sistema)
+    sistema.prestar_libro(NOVELA, "u1")
+    sistema.prestar_libro(NOVELA, "u1")
+    reloj.avanzar(days=3)                       # 2 de febrero
+    sistema.prestar_libro(CUENTO, "u1")
+
+    enero = (date(2025, 1, 1), date(2025, 1, 31))
+    assert analitica.mas_prestados('titulo', *enero) == [("Rayuela", 2)]
+    assert analitica.mas_prestados('autor', date(2025, 1, 1), date(2025, 12, 31)) == [
+        ("Julio Cortázar", 2), ("Jorge Luis Borges", 1)]
+    assert analitica.mas_prestados('categoria', date(2025, 2, 2), date(2025, 2, 2)) == [("Cuento", 1)]
+    assert analitica.mas_prestados('isbn', date(2025, 1, 1), date(2025, 12, 31), n=1) == [(NOVELA, 2)]
+    with pytest.raises(ValueError):
+        analitica.mas_prestados('editorial')
+    with pytest.raises(ValueError):
+        analitica.mas_prestados('titulo', date(2025, 2, 1), date(2025, 1, 1))
+
+
+def test_resumen_de_devoluciones_y_multas(reloj):
+    sistema = _biblioteca(reloj)
+    analitica = AnaliticaPrestamos(sistema)
+    a_tiempo = sistema.prestar_libro(NOVELA, "u1")
+    vencido = sistema.prestar_libro(CUENTO, "u1")
+    reloj.avanzar(days=4)
+    sistema.devolver_libro(a_tiempo)
+    reloj.avanzar(days=6)                       # 10 días después: 3 de retraso
+    sistema.devolver_libro(vencido)
+
+    resumen = analitica.resumen(date(2025, 1, 1), date(2025, 12, 31))
+    assert resumen['prestamos'] == 2
+    assert resumen['devoluciones'] == 2
+    assert resumen['duracion_promedio_dias'] == 7.0
+    assert resumen['tasa_vencidos'] == 0.5
+    assert resumen['total_multas'] == sistema.prestamos[vencido]['multa'] > 0
+    # las devoluciones cuentan en la fecha de devolución, no en la del préstamo
+    assert analitica.resumen(date(2025, 1, 30), date(2025, 1, 31))['devoluciones'] == 0
+
+
+def test_carga_el_historial_existente_y_deja_de_observar_al_cerrar(reloj):
+    sistema = _biblioteca(reloj)
+    id_prestamo = sistema.prestar_libro(NOVELA, "u1")
+    reloj.avanzar(days=1)
+    sistema.devolver_libro(id_prestamo)
+
+    analitica = AnaliticaPrestamos(sistema)
+    anual = (date(2025, 1, 1), date(2025, 12, 31))
+    assert analitica.resumen(*anual)['prestamos'] == 1
+    assert analitica.resumen(*anual)['devoluciones'] == 1
+
+    analitica.cerrar()
+    sistema.prestar_libro(NOVELA, "u1")
+    assert analitica.resumen(*anual)['prestamos'] == 1
+
+
+def test_ventana_por_defecto_usa_el_reloj_del_sistema(reloj):
+    sistema = _biblioteca(reloj)
+    analitica = AnaliticaPrestamos(sistema)
+    sistema.prestar_libro(NOVELA, "u1")
+    assert analitica.mas_prestados() == [("Rayuela", 1)]
+    assert analitica.resumen()['hasta'] == INICIO.date().isoformat()
+    reloj.avanzar(days=1)
+    assert analitica.mas_prestados() == []
+    analitica.cerrar()
@@ -0,0 +1,94 @@
+"""
+Pruebas del archivo de pedidos pagados (ArchivoPedidos) conectado a SistemaRestaurante.
+"""
+
+from datetime import datetime
+
+import pytest
+
+from archivo_pedidos import ArchivoPedidos, numero_pedido
+from sistema_restaurante import PedidoInvalido, SistemaRestaurante
+
+INICIO = datetime(2025, 3, 3, 12, 0)
+
+
+def _archivado(restaurante, archivo):
+    sistema = restaurante(num_mesas=3)
+    sistema.conectar_archivo(archivo)
+    return sistema
+
+
+def _pagar(sistema, cantidad):
+    ids = []
+    for _ in range(cantidad):
+        id_pedido = sistema.crear_pedido(1)
+        sistema.agregar_item(id_pedido, "P001", 2)
+        sistema.agregar_item(id_pedido, "P004", 1)
+        sistema.pagar_pedido(id_pedido)
+        ids.append(id_pedido)
+    return ids
+
+
+def test_pagados_salen_de_memoria_y_se_encuentran_en_disco(tmp_path, restaurante):
+    archivo = ArchivoPedidos(str(tmp_path), pedidos_por_segmento=10, cada=3)
+    sistema = _archivado(restaurante, archivo)
+    abierto = sistema.crear_pedido(2)
+    ids = _pagar(sistema, 25)
+
+    assert len(archivo.segmentos) == 2 and len(archivo) == 20
+    assert set(sistema.pedidos) == {abierto} | set(ids[20:])
+    assert sistema.estado_restaurante()['ventas_totales_historicas'] == 25
+    assert list(sistema.estado_restaurante()['pedidos_activos']) == [abierto]
+    for id_pedido in (ids[0], ids[7], ids[19], ids[24]):
+        pedido = sistema.obtener_pedido(id_pedido)
+        assert pedido['total'] == 24.2
+        assert pedido['lineas']["P001"] == {'precio': 10.0, 'categoria': 'Principal'}
+    with pytest.raises(PedidoInvalido):
+        sistema.obtener_pedido("P99999")
+    # los reportes usan los totales acumulados, no los pedidos archivados
+    assert sistema.platos_mas_vendidos(1) == [("P001", "Hamburguesa", 50)]
+    assert sistema.reporte_ventas_dia(datetime(2025, 3, 3).date())['total_items_vendidos'] == 75
+
+
+def test_archivo_se_reabre_y_rota(tmp_path, restaurante):
+    archivo = ArchivoPedidos(str(tmp_path), pedidos_por_segmento=5, cada=2, max_segmentos=2)
+    sistema = _archivado(restaurante, archivo)
+    ids = _pagar(sistema, 15)
+    assert len(archivo.segmentos) == 2
+    assert archivo.buscar(ids[0]) is None
+    assert archivo.buscar(ids[5])['pagado'] is True
+
+    reabierto = ArchivoPedidos(str(tmp_path))
+    assert len(reabierto) == 10
+    assert [numero_pedido(i) for i, _ in reabierto.recorrer()] == [numero_pedido(i) for i in ids[5:]]
+    assert reabierto.guardar([]) is None
+    assert reabierto.guardar([(f"P{99:05d}", archivo.buscar(ids[14]))]).endswith("pedidos_000004.seg")
+
+
+def test_archivar_sin_archivo_falla():
+    sistema = SistemaRestaurante()
+    with pytest.raises(ValueError):
+        sistema.archivar_pagados()
+
+
+def test_fallo_al_guardar_no_pierde_pedidos(tmp_path, restaurante, monkeypatch):
+    archivo = ArchivoPedidos(str(tmp_path), pedidos_por_segmento=3)
+    sistema = _archivado(restaurante, archivo)
+    guardar = archivo.guardar
+
+    def disco_lleno(pedidos):
+        raise OSError("disco lleno")
+
+    monkeypatch.setattr(archivo, 'guardar', disco_lleno)
+    ids = _pagar(sistema, 3)
+    assert sistema.obtener_pedido(ids[0])['pagado'] is True
+    with pytest.raises(OSError):
+        sistema.archivar_pagados()
+    assert set(sistema.pedidos) == set(ids)
+
+    # el disco vuelve: el siguiente corte archiva todo lo pendiente
+    monkeypatch.setattr(archivo, 'guardar', guardar)
+    ids += _pagar(sistema, 1)
+    assert sistema.pedidos == {}
+    assert [archivo.buscar(i)['total'] for i in ids] == [24.2] * 4
+    assert sistema.estado_restaurante()['ventas_totales_historicas'] == 4
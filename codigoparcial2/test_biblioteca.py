@@ -4,6 +4,10 @@ Autor: José Hidalgo
 Versión corregida 100%
 """
 
+from datetime import datetime, timedelta
+
+import pytest
+
 from sistema_biblioteca import *
 
 
@@ -103,5 +107,444 @@ def pruebas_biblioteca():
     print("\n=== FIN DE PRUEBAS ===")
 
 
+def test_prestamos_concurrentes_isbn_popular():
+    """32 hilos compiten por las mismas copias: nunca se presta de más."""
+    import threading
+
+    copias = 50
+    biblioteca = SistemaBiblioteca(limite_prestamos=1000)
+    biblioteca.agregar_libro("9781234567897", "Cien años de soledad", "Gabriel García Márquez", 1967, "Novela", copias)
+    for h in range(32):
+        biblioteca.registrar_usuario(f"u{h}", f"Usuario {h}", f"u{h}@example.com")
+
+    prestados = []
+    barrera = threading.Barrier(32)
+
+    def trabajador(id_usuario):
+        barrera.wait()
+        for _ in range(200):
+            try:
+                id_prestamo = biblioteca.prestar_libro("9781234567897", id_usuario)
+            except LibroNoDisponible:
+                continue
+            prestados.append(id_prestamo)
+            if len(prestados) % 3 == 0:
+                biblioteca.devolver_libro(id_prestamo)
+
+    hilos = [threading.Thread(target=trabajador, args=(f"u{h}",)) for h in range(32)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    libro = biblioteca.catalogo["9781234567897"]
+    activos = sum(len(u['prestamos_activos']) for u in biblioteca.usuarios.values())
+    assert libro['copias_disponibles'] >= 0
+    assert libro['copias_disponibles'] + activos == copias
+    assert len(set(prestados)) == len(prestados) == libro['prestamos']
+
+
+# ===========================================================================
+# PRUEBAS CON PYTEST
+# ===========================================================================
+
+INICIO = datetime(2025, 3, 3, 10, 0)
+
+
+def _biblioteca(reloj=None, **opciones):
+    """Sistema con tres libros y tres usuarios (u1, u2, u3)."""
+    biblioteca = SistemaBiblioteca(reloj=reloj or (lambda: INICIO), **opciones)
+    biblioteca.agregar_libro("9780000000001", "Cien años de soledad", "Gabriel García Márquez", 1967, "Novela", 2)
+    biblioteca.agregar_libro("9780000000002", "El amor en los tiempos del cólera", "Gabriel García Márquez", 1985, "Novela", 1)
+    biblioteca.agregar_libro("9780000000003", "Rayuela", "Julio Cortázar", 1963, "Cuento", 1)
+    for i in (1, 2, 3):
+        biblioteca.registrar_usuario(f"u{i}", f"Usuario {i}", f"u{i}@example.com")
+    return biblioteca
+
+
+def _isbns(libros):
+    return [libro['isbn'] for libro in libros]
+
+
+# ---------------------------
+# BÚSQUEDA CON ÍNDICE DE N-GRAMAS
+# ---------------------------
+
+def test_buscar_libros_ignora_mayusculas_y_acentos():
+    biblioteca = _biblioteca()
+    assert _isbns(biblioteca.buscar_libros('autor', 'GARCIA MARQUEZ')) == ["9780000000001", "9780000000002"]
+    assert _isbns(biblioteca.buscar_libros('titulo', 'colera')) == ["9780000000002"]
+    assert _isbns(biblioteca.buscar_libros('autor', 'cortazar')) == ["9780000000003"]
+
+
+def test_buscar_libros_consultas_cortas_y_subcadenas():
+    biblioteca = _biblioteca()
+    biblioteca.agregar_libro("9780000000004", "Io", "Ana", 2001, "Poesia", 1)
+    # más cortas que un n-grama: se resuelven con las claves del índice y los textos cortos
+    assert _isbns(biblioteca.buscar_libros('titulo', 'io')) == ["9780000000004"]
+    assert _isbns(biblioteca.buscar_libros('autor', 'an')) == ["9780000000004"]
+    # todos los n-gramas de 'abcde' están en el título pero la subcadena no
+    biblioteca.agregar_libro("9780000000005", "abcd bcde", "Autor", 2001, "Poesia", 1)
+    assert biblioteca._candidatos('titulo', 'abcde') == set()
+    assert _isbns(biblioteca.buscar_libros('titulo', 'bcd')) == ["9780000000005"]
+
+
+def test_buscar_libros_filtra_por_categoria_y_criterio_no_indexado():
+    biblioteca = _biblioteca()
+    assert _isbns(biblioteca.buscar_libros('titulo', '', categoria='Novela')) == ["9780000000001", "9780000000002"]
+    assert _isbns(biblioteca.buscar_libros('titulo', 'a', categoria='Cuento')) == ["9780000000003"]
+    assert biblioteca.buscar_libros('titulo', 'rayuela', categoria='Novela') == []
+    assert len(biblioteca.buscar_libros('titulo', '')) == 3
+    # criterio sin índice: recorre el catálogo
+    assert _isbns(biblioteca.buscar_libros('anio', '1963')) == ["9780000000003"]
+
+
+def test_desindexar_libro_quita_todas_las_entradas():
+    biblioteca = _biblioteca()
+    biblioteca._desindexar_libro("9780000000003")
+    assert biblioteca.buscar_libros('titulo', 'rayuela') == []
+    assert biblioteca.buscar_libros('titulo', '', categoria='Cuento') == []
+    assert all("9780000000003" not in isbns
+               for indice in biblioteca._indice_ngramas.values() for isbns in indice.values())
+
+
+# ---------------------------
+# PRÉSTAMOS ACTIVOS Y VENCIMIENTOS
+# ---------------------------
+
+def test_prestamos_activos_es_un_conjunto():
+    biblioteca = _biblioteca()
+    p1 = biblioteca.prestar_libro("9780000000001", "u1")
+    p2 = biblioteca.prestar_libro("9780000000003", "u1")
+    assert biblioteca.usuarios["u1"]['prestamos_activos'] == {p1, p2}
+    biblioteca.devolver_libro(p1)
+    assert biblioteca.usuarios["u1"]['prestamos_activos'] == {p2}
+    assert biblioteca.usuarios["u1"]['historial'] == [p1]
+    assert biblioteca.obtener_estado_usuario("u1")['prestamos_activos'] == 1
+
+
+def test_prestamos_vencidos_en_orden_de_vencimiento(reloj):
+    biblioteca = _biblioteca(reloj, dias_prestamo=7)
+    p1 = biblioteca.prestar_libro("9780000000001", "u1")
+    reloj.avanzar(days=1)
+    p2 = biblioteca.prestar_libro("9780000000002", "u2")
+    reloj.avanzar(days=1)
+    p3 = biblioteca.prestar_libro("9780000000003", "u3")
+
+    assert list(biblioteca.prestamos_vencidos(INICIO + timedelta(days=7))) == []
+    hasta = INICIO + timedelta(days=8, hours=12)
+    assert [p['id_prestamo'] for p in biblioteca.prestamos_vencidos(hasta)] == [p1, p2]
+    assert [p['id_prestamo'] for p in biblioteca.prestamos_vencidos(INICIO + timedelta(days=30))] == [p1, p2, p3]
+
+
+def test_vencimientos_ignoran_devueltos_y_renovados(reloj):
+    biblioteca = _biblioteca(reloj, dias_prestamo=7)
+    p1 = biblioteca.prestar_libro("9780000000001", "u1")
+    p2 = biblioteca.prestar_libro("9780000000002", "u2")
+    p3 = biblioteca.prestar_libro("9780000000003", "u3")
+    biblioteca.devolver_libro(p1)
+    biblioteca.renovar_prestamo(p2)
+
+    hasta = INICIO + timedelta(days=10)
+    assert [p['id_prestamo'] for p in biblioteca.prestamos_vencidos(hasta)] == [p3]
+    vencidos = list(biblioteca.prestamos_vencidos(INICIO + timedelta(days=20)))
+    assert [p['id_prestamo'] for p in vencidos] == [p3, p2]
+    assert vencidos[1]['fecha_vencimiento'] == INICIO + timedelta(days=14)
+
+
+def test_heap_de_vencimientos_se_compacta():
+    biblioteca = _biblioteca(limite_prestamos=100)
+    biblioteca.agregar_libro("9780000000009", "Ficciones", "Jorge Luis Borges", 1944, "Cuento", 50)
+    for _ in range(40):
+        biblioteca.devolver_libro(biblioteca.prestar_libro("9780000000009", "u1"))
+    # las entradas obsoletas nunca superan a la mitad del heap
+    assert len(biblioteca._vencimientos) <= 2
+    assert list(biblioteca.prestamos_vencidos(INICIO + timedelta(days=365))) == []
+
+
+def test_renovar_prestamo_vencido_falla(reloj):
+    biblioteca = _biblioteca(reloj, dias_prestamo=7)
+    id_prestamo = biblioteca.prestar_libro("9780000000001", "u1")
+    reloj.avanzar(days=9)
+    with pytest.raises(PrestamoVencido) as error:
+        biblioteca.renovar_prestamo(id_prestamo)
+    assert error.value.dias_retraso == 2
+
+
+# ---------------------------
+# OPERACIONES EN LOTE
+# ---------------------------
+
+def test_prestar_lote_descuenta_lo_asignado_en_el_mismo_lote():
+    biblioteca = _biblioteca(limite_prestamos=2)
+    resultados = biblioteca.prestar_lote([
+        ("9780000000003", "u1"),    # única copia
+        ("9780000000003", "u2"),    # ya asignada dentro del lote
+        ("9780000000001", "u1"),
+        ("9780000000002", "u1"),    # u1 llega al límite dentro del lote
+        ("9780000000009", "u2"),
+        ("9780000000001", "nadie"),
+    ])
+    assert resultados[0] == "P0001" and resultados[2] == "P0002"
+    assert isinstance(resultados[1], LibroNoDisponible)
+    assert isinstance(resultados[3], LimitePrestamosExcedido)
+    assert isinstance(resultados[4], LibroNoEncontrado)
+    assert isinstance(resultados[5], UsuarioNoRegistrado)
+    assert biblioteca.catalogo["9780000000003"]['copias_disponibles'] == 0
+    assert biblioteca.usuarios["u1"]['prestamos_activos'] == {"P0001", "P0002"}
+
+
+def test_prestar_lote_atomico_no_aplica_nada_si_hay_errores():
+    biblioteca = _biblioteca()
+    resultados = biblioteca.prestar_lote([("9780000000001", "u1"), ("9780000000009", "u1")], atomico=True)
+    assert resultados[0] is None
+    assert isinstance(resultados[1], LibroNoEncontrado)
+    assert biblioteca.prestamos == {}
+    assert biblioteca.catalogo["9780000000001"]['copias_disponibles'] == 2
+
+
+def test_devolver_lote_rechaza_repetidos_e_inexistentes():
+    biblioteca = _biblioteca()
+    p1, p2 = biblioteca.prestar_lote([("9780000000001", "u1"), ("9780000000002", "u2")])
+    resultados = biblioteca.devolver_lote([p1, p1, "P9999", p2])
+    assert resultados[0]['mensaje'] == "Devolución procesada"
+    assert isinstance(resultados[1], ValueError)
+    assert isinstance(resultados[2], KeyError)
+    assert resultados[3]['multa'] == 0
+    assert biblioteca.catalogo["9780000000002"]['copias_disponibles'] == 1
+    assert isinstance(biblioteca.devolver_lote([p1])[0], ValueError)
+
+
+def test_devolver_lote_atomico():
+    biblioteca = _biblioteca()
+    p1 = biblioteca.prestar_libro("9780000000001", "u1")
+    resultados = biblioteca.devolver_lote([p1, "P9999"], atomico=True)
+    assert resultados[0] is None
+    assert biblioteca.prestamos[p1]['fecha_devolucion'] is None
+
+
+# ---------------------------
+# CONCURRENCIA
+# ---------------------------
+
+def test_lock_de_libro_inexistente_protege_al_agregarlo():
+    import threading
+
+    biblioteca = _biblioteca()
+    isbn = "9780000000099"
+    prestados = []
+    with biblioteca._bloquear((isbn,), ("u1",)):
+        # el libro se agrega después de elegir los locks
+        biblioteca.agregar_libro(isbn, "Pedro Páramo", "Juan Rulfo", 1955, "Novela", 1)
+        hilo = threading.Thread(target=lambda: prestados.append(biblioteca.prestar_libro(isbn, "u2")))
+        hilo.start()
+        hilo.join(0.2)
+        assert hilo.is_alive()
+        assert biblioteca.catalogo[isbn]['copias_disponibles'] == 1
+    hilo.join()
+    assert prestados == ["P0001"]
+    assert biblioteca._locks_libro[isbn] is biblioteca._lock_de(biblioteca._locks_libro, isbn)
+
+
+# ---------------------------
+# MULTAS Y ESTADO DE USUARIOS
+# ---------------------------
+
+def test_actualizar_multas_proyecta_prestamos_vencidos(reloj):
+    biblioteca = _biblioteca(reloj, dias_prestamo=7, multa_por_dia=2.0)
+    p1 = biblioteca.prestar_libro("9780000000001", "u1")
+    biblioteca.prestar_libro("9780000000003", "u2")
+    reloj.avanzar(days=10)
+    assert biblioteca.actualizar_multas() == 2
+    assert biblioteca.obtener_estado_usuario("u1")['multas_proyectadas'] == 6.0
+    # un segundo corte el mismo día no cambia nada
+    assert biblioteca.actualizar_multas() == 0
+    reloj.avanzar(days=2)
+    biblioteca.actualizar_multas()
+    assert biblioteca.obtener_estado_usuario("u1")['multas_proyectadas'] == 10.0
+
+    # al devolver, la proyección pasa a deuda firme
+    resultado = biblioteca.devolver_libro(p1)
+    assert resultado['multa'] == 10.0
+    estado = biblioteca.obtener_estado_usuario("u1")
+    assert (estado['multas_proyectadas'], estado['multas_pendientes'], estado['deuda_total']) == (0.0, 10.0, 10.0)
+
+
+def test_renovar_descarta_la_multa_proyectada(reloj):
+    biblioteca = _biblioteca(reloj, dias_prestamo=7, multa_por_dia=2.0)
+    p1 = biblioteca.prestar_libro("9780000000001", "u1")
+    biblioteca.actualizar_multas(INICIO + timedelta(days=10))
+    assert biblioteca.obtener_estado_usuario("u1")['multas_proyectadas'] == 6.0
+    reloj.avanzar(days=1)
+    biblioteca.renovar_prestamo(p1)
+    assert biblioteca.obtener_estado_usuario("u1")['multas_proyectadas'] == 0.0
+    assert biblioteca._multas_en_curso == {}
+
+
+def test_prestamos_vencidos_es_una_lista_estable(reloj):
+    biblioteca = _biblioteca(reloj, dias_prestamo=7)
+    p1 = biblioteca.prestar_libro("9780000000001", "u1")
+    p2 = biblioteca.prestar_libro("9780000000002", "u2")
+    vencidos = biblioteca.prestamos_vencidos(INICIO + timedelta(days=10))
+    for p in vencidos:
+        biblioteca.renovar_prestamo(p['id_prestamo'])
+    assert [p['id_prestamo'] for p in vencidos] == [p1, p2]
+
+
+def test_estado_en_cache_se_invalida_al_escribir():
+    biblioteca = _biblioteca()
+    estado = biblioteca.obtener_estado_usuario("u1")
+    assert biblioteca.obtener_estado_usuario("u1") == estado
+    # la copia retornada no altera la caché
+    estado['puede_prestar'] = False
+    assert biblioteca.obtener_estado_usuario("u1")['puede_prestar'] is True
+    biblioteca.prestar_libro("9780000000001", "u1")
+    assert biblioteca.obtener_estado_usuario("u1")['prestamos_activos'] == 1
+    with pytest.raises(UsuarioNoRegistrado):
+        biblioteca.obtener_estado_usuario("nadie")
+
+
+def test_deuda_mayor_a_50_bloquea_prestamos(reloj):
+    biblioteca = _biblioteca(reloj, dias_prestamo=7, multa_por_dia=1.0)
+    biblioteca.prestar_libro("9780000000001", "u1")
+    reloj.avanzar(days=60)
+    biblioteca.actualizar_multas()
+    assert biblioteca.obtener_estado_usuario("u1")['puede_prestar'] is False
+    with pytest.raises(ValueError):
+        biblioteca.prestar_libro("9780000000003", "u1")
+
+
+def test_pagar_y_condonar_multas(reloj):
+    biblioteca = _biblioteca(reloj, dias_prestamo=7, multa_por_dia=1.0)
+    id_prestamo = biblioteca.prestar_libro("9780000000001", "u1")
+    reloj.avanzar(days=17)
+    biblioteca.devolver_libro(id_prestamo)
+    assert biblioteca.pagar_multa("u1", 4.0) == 6.0
+    with pytest.raises(ValueError):
+        biblioteca.pagar_multa("u1", 7.0)
+    with pytest.raises(ValueError):
+        biblioteca.pagar_multa("u1", 0)
+    assert biblioteca.condonar_multa("u1") == 0
+    usuario = biblioteca.usuarios["u1"]
+    assert (usuario['multas_pagadas'], usuario['multas_condonadas']) == (4.0, 6.0)
+    assert biblioteca.condonar_multa("u1") == 0
+    assert biblioteca.obtener_estado_usuario("u1")['deuda_total'] == 0
+
+
+# ---------------------------
+# RESERVAS
+# ---------------------------
+
+RAYUELA = "9780000000003"
+
+
+def _con_reserva_asignada(reloj=None):
+    """Rayuela (1 copia) prestada a u1 y devuelta: queda apartada para u2."""
+    biblioteca = _biblioteca(reloj, dias_reserva=3)
+    id_prestamo = biblioteca.prestar_libro(RAYUELA, "u1")
+    id_reserva = biblioteca.reservar_libro(RAYUELA, "u2")
+    biblioteca.devolver_libro(id_prestamo)
+    return biblioteca, id_reserva
+
+
+def test_devolucion_asigna_la_copia_al_primero_de_la_cola():
+    biblioteca, id_reserva = _con_reserva_asignada()
+    assert biblioteca.reservas[id_reserva]['estado'] == 'asignada'
+    assert biblioteca.catalogo[RAYUELA]['copias_disponibles'] == 0
+    with pytest.raises(LibroNoDisponible):
+        biblioteca.prestar_libro(RAYUELA, "u3")
+    with pytest.raises(ValueError):
+        biblioteca.reservar_libro("9780000000001", "u3")
+
+
+def test_reserva_asignada_vence_y_libera_la_copia(reloj):
+    biblioteca, id_reserva = _con_reserva_asignada(reloj)
+    assert biblioteca.vencer_reservas() == 0
+    reloj.avanzar(days=3)
+    assert biblioteca.vencer_reservas() == 1
+    assert biblioteca.reservas[id_reserva]['estado'] == 'vencida'
+    assert biblioteca.catalogo[RAYUELA]['copias_disponibles'] == 1
+    assert biblioteca.prestar_libro(RAYUELA, "u3")
+
+
+def test_prestar_libro_completa_la_reserva_asignada():
+    biblioteca, id_reserva = _con_reserva_asignada()
+    id_prestamo = biblioteca.prestar_libro(RAYUELA, "u2")
+    assert biblioteca.reservas[id_reserva]['estado'] == 'completada'
+    assert biblioteca.prestamos[id_prestamo]['id_usuario'] == "u2"
+    assert biblioteca.catalogo[RAYUELA]['copias_disponibles'] == 0
+
+
+def test_prestar_lote_completa_la_reserva_asignada():
+    biblioteca, id_reserva = _con_reserva_asignada()
+    resultados = biblioteca.prestar_lote([(RAYUELA, "u2"), (RAYUELA, "u2"), (RAYUELA, "u3")])
+    assert resultados[0] == "P0002"
+    # la copia apartada sirve a un solo préstamo del lote
+    assert isinstance(resultados[1], LibroNoDisponible)
+    assert isinstance(resultados[2], LibroNoDisponible)
+    assert biblioteca.reservas[id_reserva]['estado'] == 'completada'
+    assert biblioteca.catalogo[RAYUELA]['copias_disponibles'] == 0
+    assert (RAYUELA, "u2") not in biblioteca._reservas_activas
+
+
+def test_prestar_lote_completa_la_reserva_en_espera():
+    # con límite 1, u2 no es elegible cuando se devuelve Rayuela: la copia
+    # queda libre y su reserva sigue en espera
+    biblioteca = _biblioteca(limite_prestamos=1)
+    id_prestamo = biblioteca.prestar_libro(RAYUELA, "u1")
+    id_reserva = biblioteca.reservar_libro(RAYUELA, "u2")
+    otro = biblioteca.prestar_libro("9780000000001", "u2")
+    biblioteca.devolver_libro(id_prestamo)
+    assert biblioteca.reservas[id_reserva]['estado'] == 'en_espera'
+    biblioteca.devolver_libro(otro)
+
+    assert biblioteca.prestar_lote([(RAYUELA, "u2")]) == ["P0003"]
+    assert biblioteca.reservas[id_reserva]['estado'] == 'completada'
+    assert (RAYUELA, "u2") not in biblioteca._reservas_activas
+    assert biblioteca.catalogo[RAYUELA]['copias_disponibles'] == 0
+
+
+# ---------------------------
+# BÚSQUEDA CON RANKING
+# ---------------------------
+
+def test_buscar_ranking_tolera_errores_de_tipeo():
+    biblioteca = _biblioteca()
+    resultados = biblioteca.buscar_ranking("Garcia Marques", n=5)
+    assert set(_isbns(resultados)) == {"9780000000001", "9780000000002"}
+    assert "9780000000003" not in _isbns(resultados)
+    assert all(r['puntaje'] > 0 for r in resultados)
+
+
+def test_buscar_ranking_ordena_por_puntaje():
+    biblioteca = _biblioteca()
+    resultados = biblioteca.buscar_ranking("cien años soledad")
+    assert resultados[0]['isbn'] == "9780000000001"
+    puntajes = [r['puntaje'] for r in resultados]
+    assert puntajes == sorted(puntajes, reverse=True)
+    assert len(biblioteca.buscar_ranking("gabriel", n=1)) == 1
+
+
+def test_buscar_ranking_filtra_y_bonifica_categoria():
+    biblioteca = _biblioteca()
+    assert _isbns(biblioteca.buscar_ranking("cortazar", categoria="Novela")) == []
+    assert _isbns(biblioteca.buscar_ranking("cortazar", categoria="Cuento")) == ["9780000000003"]
+    # el nombre de la categoría suma un bono aunque no esté en título ni autor
+    con_categoria = biblioteca.buscar_ranking("rayuela cuento")[0]
+    sin_categoria = biblioteca.buscar_ranking("rayuela")[0]
+    assert con_categoria['isbn'] == sin_categoria['isbn'] == "9780000000003"
+    assert con_categoria['puntaje'] > sin_categoria['puntaje']
+
+
+def test_buscar_ranking_consultas_vacias_y_cortas():
+    biblioteca = _biblioteca()
+    assert biblioteca.buscar_ranking("") == []
+    assert biblioteca.buscar_ranking("rayuela", n=0) == []
+    assert biblioteca.buscar_ranking("zzzzzz") == []
+    cortos = biblioteca.buscar_ranking("ra")
+    assert "9780000000003" in _isbns(cortos)
+    assert all(r['puntaje'] == 0.0 for r in cortos)
+
+
 if __name__ == "__main__":
     pruebas_biblioteca()
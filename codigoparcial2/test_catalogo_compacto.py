@@ -0,0 +1,90 @@
+"""
+Pruebas del catálogo compacto (columnar).
+"""
+
+from datetime import datetime
+
+import pytest
+
+from catalogo_compacto import CatalogoCompacto
+from sistema_biblioteca import SistemaBiblioteca
+
+ISBN = "9780000000001"
+
+
+def _registro(**cambios):
+    registro = {'titulo': "Rayuela", 'autor': "Julio Cortázar", 'anio': 1963, 'categoria': "Novela",
+                'copias_total': 2, 'copias_disponibles': 2, 'prestamos': 0}
+    registro.update(cambios)
+    return registro
+
+
+def test_se_comporta_como_el_dict_original():
+    catalogo = CatalogoCompacto()
+    catalogo[ISBN] = _registro()
+    catalogo["9780000000002"] = _registro(titulo="Bestiario")
+    assert len(catalogo) == 2
+    assert list(catalogo) == [ISBN, "9780000000002"]
+    assert dict(catalogo[ISBN]) == _registro()
+    assert ISBN in catalogo and "123" not in catalogo and 9780000000001 not in catalogo
+
+    catalogo[ISBN]['copias_disponibles'] -= 1
+    catalogo[ISBN]['categoria'] = "Clásico"
+    assert catalogo[ISBN]['copias_disponibles'] == 1
+    assert catalogo[ISBN]['categoria'] == "Clásico"
+
+    del catalogo[ISBN]
+    assert ISBN not in catalogo
+    with pytest.raises(KeyError):
+        catalogo[ISBN]
+
+
+def test_autores_repetidos_se_guardan_una_vez():
+    catalogo = CatalogoCompacto()
+    for i in range(10):
+        catalogo[f"97800000000{i:02d}"] = _registro(titulo=f"Libro {i}", autor="Julio " + "Cortázar")
+    assert catalogo._diccionarios['autor'].valores == ["Julio Cortázar"]
+    assert len(catalogo._codigos['autor']) == 10
+
+
+def test_categoria_none_tiene_su_propio_codigo():
+    catalogo = CatalogoCompacto()
+    catalogo[ISBN] = _registro(categoria=None)
+    assert catalogo[ISBN]['categoria'] is None
+    assert len(catalogo) == 1
+
+
+def test_valor_invalido_no_deja_una_fila_a_medias():
+    catalogo = CatalogoCompacto()
+    catalogo[ISBN] = _registro()
+    with pytest.raises(TypeError):
+        catalogo["9780000000002"] = _registro(copias_total=2.5)
+    with pytest.raises(TypeError):
+        catalogo["9780000000003"] = _registro(autor=["no", "hashable"])
+    with pytest.raises(OverflowError):
+        catalogo["9780000000004"] = _registro(anio=70000)
+    assert list(catalogo) == [ISBN]
+    assert len(catalogo._isbn) == 1
+    # un reemplazo inválido tampoco cambia la fila existente
+    with pytest.raises(TypeError):
+        catalogo[ISBN] = _registro(titulo="Otro", prestamos="x")
+    assert dict(catalogo[ISBN]) == _registro()
+
+
+def test_sistema_compacto_acepta_categoria_none():
+    sistema = SistemaBiblioteca(catalogo_compacto=True, reloj=lambda: datetime(2025, 1, 1))
+    sistema.agregar_libro(ISBN, "Rayuela", "Julio Cortázar", 1963, None, 2)
+    assert len(sistema.catalogo) == 1
+    assert [l['isbn'] for l in sistema.buscar_libros('titulo', 'rayuela')] == [ISBN]
+
+
+def test_importar_libros_compacto_rechaza_filas_que_las_columnas_no_admiten():
+    sistema = SistemaBiblioteca(catalogo_compacto=True, reloj=lambda: datetime(2025, 1, 1))
+    rechazados = sistema.importar_libros([
+        (ISBN, "Rayuela", "Julio Cortázar", 1963, "Novela", 2),
+        ("9780000000002", "Bestiario", "Julio Cortázar", 1951, "Cuento", 2.5),
+        ("9780000000003", "Ficciones", "Jorge Luis Borges", 1944, "Cuento", 1),
+    ])
+    assert [posicion for posicion, _ in rechazados] == [1]
+    assert list(sistema.catalogo) == [ISBN, "9780000000003"]
+    assert [l['isbn'] for l in sistema.buscar_libros('autor', 'borges')] == ["9780000000003"]
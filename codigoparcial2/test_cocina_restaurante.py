@@ -0,0 +1,128 @@
+"""
+Pruebas de la pantalla de cocina (Cocina) conectada a SistemaRestaurante.
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from cocina_restaurante import Cocina
+
+INICIO = datetime(2025, 3, 3, 20, 0)
+
+
+def _cocina(restaurante, reloj, **opciones):
+    """Restaurante de ejemplo con parrilla (Principal) y freidora (Acompañamiento)."""
+    sistema = restaurante(num_mesas=5)
+    cocina = Cocina({'Principal': 'parrilla', 'Acompañamiento': 'freidora'}, reloj=reloj, **opciones)
+    sistema.conectar_cocina(cocina)
+    return sistema, cocina
+
+
+def test_tickets_por_estacion_en_orden_de_pedido(reloj, restaurante):
+    sistema, cocina = _cocina(restaurante, reloj)
+    viejo = sistema.crear_pedido(3)
+    reloj.avanzar(minutes=1)
+    nuevo = sistema.crear_pedido(1)
+    sistema.agregar_item(nuevo, "P001", 2)
+    sistema.agregar_item(viejo, "P001")
+    sistema.agregar_item(viejo, "P004")
+
+    pantalla = cocina.pantalla('parrilla')
+    assert [t['id_pedido'] for t in pantalla['pendientes']] == [viejo, nuevo]
+    assert [t['estacion'] for t in cocina.pantalla('Bebida')['pendientes']] == ['Bebida']
+    assert cocina.pantalla('postres') == {'pendientes': [], 'cocinando': []}
+
+    reloj.avanzar(seconds=30)
+    ticket = cocina.tomar_ticket('parrilla')
+    assert ticket['id_pedido'] == viejo and ticket['estado'] == 'cocinando'
+    pantalla = cocina.pantalla('parrilla')
+    assert [t['id_pedido'] for t in pantalla['pendientes']] == [nuevo]
+    assert pantalla['cocinando'] == [ticket]
+
+    reloj.avanzar(seconds=60)
+    assert cocina.marcar_listo(ticket['id'])['estado'] == 'listo'
+    with pytest.raises(ValueError):
+        cocina.marcar_listo(ticket['id'])
+    metricas = cocina.metricas()['parrilla']
+    assert (metricas['recibidos'], metricas['pendientes'], metricas['cocinando'], metricas['listos']) == (2, 1, 0, 1)
+    assert metricas['espera_p50'] == 30.0
+    assert metricas['total_max'] == 90.0
+    assert cocina.tomar_ticket('freidora') is None
+
+
+def test_cocineros_asyncio_atienden_y_sobreviven_a_fallos(reloj, restaurante):
+    sistema, cocina = _cocina(restaurante, reloj)
+
+    async def preparar(ticket):
+        await asyncio.sleep(0)
+        if ticket['cantidad'] == 3:
+            raise RuntimeError("se quemó")
+
+    async def escenario():
+        tareas = cocina.atender_estacion('parrilla', preparar, cocineros=1)
+        id_pedido = sistema.crear_pedido(1)
+        for cantidad in (1, 3, 2):
+            sistema.agregar_item(id_pedido, "P001", cantidad)
+        await asyncio.wait_for(cocina.esperar_cocina(), timeout=5)
+        for tarea in tareas:
+            tarea.cancel()
+        await asyncio.gather(*tareas, return_exceptions=True)
+        return tareas
+
+    tareas = asyncio.run(escenario())
+    assert all(t.cancelled() for t in tareas)
+    assert [t['cantidad'] for t in cocina.listos] == [1, 2]
+    assert [(t['cantidad'], t['estado']) for t in cocina.fallidos] == [(3, 'fallido')]
+    assert "se quemó" in cocina.fallidos[0]['error']
+    metricas = cocina.metricas()['parrilla']
+    assert (metricas['cocinando'], metricas['listos'], metricas['fallidos']) == (0, 2, 1)
+    assert cocina.tickets == {}
+
+
+def test_ticket_en_preparacion_vuelve_a_la_cola_al_cancelar(reloj, restaurante):
+    sistema, cocina = _cocina(restaurante, reloj)
+
+    async def escenario():
+        empezado = asyncio.Event()
+
+        async def lento(ticket):
+            empezado.set()
+            await asyncio.sleep(60)
+
+        tareas = cocina.atender_estacion('parrilla', lento)
+        sistema.agregar_item(sistema.crear_pedido(1), "P001")
+        await empezado.wait()
+        assert cocina.metricas()['parrilla']['cocinando'] == 1
+        tareas[0].cancel()
+        await asyncio.gather(*tareas, return_exceptions=True)
+
+        async def rapido(ticket):
+            pass
+
+        otras = cocina.atender_estacion('parrilla', rapido)
+        await asyncio.wait_for(cocina.esperar_cocina(), timeout=5)
+        for tarea in otras:
+            tarea.cancel()
+        await asyncio.gather(*otras, return_exceptions=True)
+
+    asyncio.run(escenario())
+    assert [t['estado'] for t in cocina.listos] == ['listo']
+    assert cocina.metricas()['parrilla']['cocinando'] == 0
+
+
+def test_metricas_conservan_solo_las_muestras_recientes(reloj, restaurante):
+    sistema, cocina = _cocina(restaurante, reloj, muestras=5)
+    id_pedido = sistema.crear_pedido(1)
+    for segundos in (100, 1, 1, 1, 1, 1, 1):
+        sistema.agregar_item(id_pedido, "P002")
+        reloj.avanzar(seconds=segundos)
+        cocina.marcar_listo(cocina.tomar_ticket('freidora')['id'])
+
+    metricas = cocina.metricas()['freidora']
+    assert len(cocina._metricas['freidora']['totales']) == 5
+    assert metricas['total_p99'] == 1.0
+    # el máximo histórico no depende de la ventana
+    assert metricas['total_max'] == 100.0
+    assert metricas['listos'] == 7
@@ -0,0 +1,129 @@
+"""
+Pruebas del registro de eventos y de la reproducción de SistemaBiblioteca.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from eventos_biblioteca import RegistroEventos, disponibles_en, leer_eventos, reproducir
+from sistema_biblioteca import SistemaBiblioteca
+
+INICIO = datetime(2025, 3, 3, 10, 0)
+ISBN = "9780000000001"
+
+
+def _registrado(ruta, reloj, **opciones):
+    sistema = SistemaBiblioteca(reloj=reloj, **opciones)
+    return sistema, RegistroEventos(ruta, sistema)
+
+
+def _operar(sistema, reloj):
+    sistema.agregar_libro(ISBN, "Rayuela", "Julio Cortázar", 1963, "Novela", 2)
+    sistema.registrar_usuario("u1", "Ana", "ana@example.com")
+    reloj.avanzar(hours=1)
+    id_prestamo = sistema.prestar_libro(ISBN, "u1")
+    reloj.avanzar(days=20)
+    sistema.devolver_libro(id_prestamo)
+    return id_prestamo
+
+
+def test_reproducir_reconstruye_el_estado(tmp_path, reloj):
+    ruta = str(tmp_path / "biblioteca.evt")
+    sistema, registro = _registrado(ruta, reloj, dias_prestamo=7)
+    id_prestamo = _operar(sistema, reloj)
+    registro.cerrar()
+
+    assert [nombre for nombre, *_ in leer_eventos(ruta)] == [
+        'agregar_libro', 'registrar_usuario', 'prestar_libro', 'devolver_libro']
+    replica = reproducir(ruta)
+    assert replica.prestamos == sistema.prestamos
+    assert replica.prestamos[id_prestamo]['multa'] == 13.0
+    # consulta en el pasado: con el libro prestado quedaba una copia
+    assert disponibles_en(ruta, INICIO + timedelta(days=1), ISBN) == 1
+    assert disponibles_en(ruta, reloj.ahora, ISBN) == 2
+
+
+def test_operacion_fallida_no_se_anota(tmp_path, reloj):
+    ruta = str(tmp_path / "biblioteca.evt")
+    sistema, registro = _registrado(ruta, reloj)
+    with pytest.raises(KeyError):
+        sistema.devolver_libro("P9999")
+    registro.cerrar()
+    assert list(leer_eventos(ruta)) == []
+
+
+def test_argumento_no_codificable_no_cambia_el_estado(tmp_path, reloj):
+    ruta = str(tmp_path / "biblioteca.evt")
+    sistema, registro = _registrado(ruta, reloj)
+    _operar(sistema, reloj)
+    # un generador no se puede anotar: el lote no debe aplicarse
+    with pytest.raises(TypeError):
+        sistema.prestar_lote(((ISBN, "u1") for _ in range(1)))
+    assert sistema.catalogo[ISBN]['copias_disponibles'] == 2
+    registro.cerrar()
+    assert reproducir(ruta).prestamos == sistema.prestamos
+
+
+def test_reloj_con_zona_horaria_no_cambia_el_estado(tmp_path):
+    ruta = str(tmp_path / "biblioteca.evt")
+    sistema, registro = _registrado(ruta, lambda: datetime(2025, 3, 3, tzinfo=timezone.utc))
+    with pytest.raises(TypeError):
+        sistema.registrar_usuario("u1", "Ana", "ana@example.com")
+    assert sistema.usuarios == {}
+    registro.cerrar()
+
+
+def test_reabrir_con_otra_configuracion_falla(tmp_path, reloj):
+    ruta = str(tmp_path / "biblioteca.evt")
+    sistema, registro = _registrado(ruta, reloj, dias_prestamo=7)
+    _operar(sistema, reloj)
+    registro.cerrar()
+
+    with pytest.raises(ValueError):
+        RegistroEventos(ruta, SistemaBiblioteca(dias_prestamo=14, reloj=reloj))
+
+    # con la misma configuración se sigue anotando al final
+    otro = SistemaBiblioteca(dias_prestamo=7, reloj=reloj)
+    registro = RegistroEventos(ruta, otro)
+    otro.registrar_usuario("u2", "Beto", "beto@example.com")
+    registro.cerrar()
+    assert [nombre for nombre, *_ in leer_eventos(ruta)][-1] == 'registrar_usuario'
+
+
+def test_checkpoints_acortan_la_reproduccion(tmp_path, reloj):
+    ruta = str(tmp_path / "biblioteca.evt")
+    sistema = SistemaBiblioteca(reloj=reloj, limite_prestamos=10)
+    registro = RegistroEventos(ruta, sistema, checkpoint_cada=3)
+    _operar(sistema, reloj)
+    for _ in range(4):
+        reloj.avanzar(minutes=5)
+        sistema.devolver_libro(sistema.prestar_libro(ISBN, "u1"))
+    registro.cerrar()
+
+    assert list(tmp_path.glob("biblioteca.evt.ckpt*"))
+    completa = reproducir(ruta, usar_checkpoints=False)
+    desde_checkpoint = reproducir(ruta)
+    assert completa.prestamos == desde_checkpoint.prestamos == sistema.prestamos
+    assert desde_checkpoint.usuarios["u1"]['historial'] == sistema.usuarios["u1"]['historial']
+
+
+def test_cada_evento_llega_al_archivo_sin_cerrar(tmp_path, reloj):
+    ruta = str(tmp_path / "biblioteca.evt")
+    sistema, registro = _registrado(ruta, reloj)
+    _operar(sistema, reloj)
+    # caída: no se llama a cerrar() ni a flush()
+    assert len(list(leer_eventos(ruta))) == 4
+    registro.cerrar()
+
+
+def test_flush_cada_acota_los_eventos_en_bufer(tmp_path, reloj):
+    ruta = str(tmp_path / "biblioteca.evt")
+    sistema = SistemaBiblioteca(reloj=reloj)
+    registro = RegistroEventos(ruta, sistema, flush_cada=3)
+    _operar(sistema, reloj)
+    assert len(list(leer_eventos(ruta))) == 3
+    registro.cerrar()
+    assert len(list(leer_eventos(ruta))) == 4
+    with pytest.raises(ValueError):
+        RegistroEventos(str(tmp_path / "otro.evt"), SistemaBiblioteca(), flush_cada=0)
@@ -0,0 +1,77 @@
+"""
+Pruebas de la importación masiva del catálogo (importar_catalogo).
+"""
+
+import json
+
+import pytest
+
+from importador_biblioteca import COLUMNAS, importar_catalogo, procesar_bloque
+from sistema_biblioteca import SistemaBiblioteca
+
+
+def _escribir(ruta, lineas):
+    ruta.write_text("\n".join(lineas) + "\n", encoding='utf-8')
+    return str(ruta)
+
+
+def test_csv_con_errores_por_linea(tmp_path):
+    ruta = _escribir(tmp_path / "catalogo.csv", [
+        "copias,isbn,titulo,autor,anio,categoria",
+        "2,9780000000001,Rayuela,Julio Cortázar,1963,Novela",
+        "1,978000000000X,ISBN inválido,Autor,2000,General",
+        "dos,9780000000002,Bestiario,Julio Cortázar,1951,Cuento",
+        "1,9780000000001,Duplicado,Autor,2000,General",
+        "1,9780000000003",
+        "",
+        "1,9780000000004,Ficciones,Jorge Luis Borges,1944,Cuento",
+    ])
+    sistema = SistemaBiblioteca()
+    resultado = importar_catalogo(sistema, ruta, tamanio_bloque=2, procesos=1)
+    assert resultado['importados'] == 2
+    assert resultado['lineas'] == 6
+    assert [linea for linea, _ in resultado['errores']] == [3, 4, 5, 6]
+    assert list(sistema.catalogo) == ["9780000000001", "9780000000004"]
+    assert sistema.catalogo["9780000000001"]['copias_total'] == 2
+    assert [l['isbn'] for l in sistema.buscar_libros('autor', 'borges')] == ["9780000000004"]
+
+
+def test_txt_y_jsonl(tmp_path):
+    txt = _escribir(tmp_path / "catalogo.txt", ["9780000000001|Rayuela|Julio Cortázar|1963|Novela|2"])
+    libro = dict(zip(COLUMNAS, ("9780000000002", "Ficciones", "Jorge Luis Borges", 1944, "Cuento", 1)))
+    jsonl = _escribir(tmp_path / "catalogo.jsonl", [json.dumps(libro), "{no es json", "[1, 2]"])
+    sistema = SistemaBiblioteca()
+    assert importar_catalogo(sistema, txt, procesos=1)['importados'] == 1
+    resultado = importar_catalogo(sistema, jsonl, procesos=1)
+    assert resultado['importados'] == 1
+    assert resultado['errores'] == [(2, "Fila mal formada."), (3, "Fila mal formada.")]
+    assert len(sistema.catalogo) == 2
+
+
+def test_varios_procesos_igual_que_uno(tmp_path):
+    lineas = ["isbn,titulo,autor,anio,categoria,copias"]
+    lineas += [f"978{i:010d},Libro {i},Autor {i % 7},2000,General,1" for i in range(300)]
+    ruta = _escribir(tmp_path / "catalogo.csv", lineas)
+    secuencial = SistemaBiblioteca()
+    paralelo = SistemaBiblioteca()
+    importar_catalogo(secuencial, ruta, tamanio_bloque=50, procesos=1)
+    resultado = importar_catalogo(paralelo, ruta, tamanio_bloque=50, procesos=2)
+    assert resultado['importados'] == 300
+    assert list(paralelo.catalogo) == list(secuencial.catalogo)
+    assert paralelo.buscar_libros('autor', 'autor 3') == secuencial.buscar_libros('autor', 'autor 3')
+
+
+def test_encabezado_incompleto_y_formato_desconocido(tmp_path):
+    ruta = _escribir(tmp_path / "catalogo.csv", ["isbn,titulo"])
+    with pytest.raises(ValueError):
+        importar_catalogo(SistemaBiblioteca(), ruta, procesos=1)
+    with pytest.raises(ValueError):
+        importar_catalogo(SistemaBiblioteca(), str(tmp_path / "catalogo.xml"), procesos=1)
+
+
+def test_procesar_bloque_convierte_numeros():
+    libros, numeros, errores, _ = procesar_bloque(
+        (10, ["9780000000001|Rayuela|Julio Cortázar|1963|Novela|2\n", "\n"], 'txt', COLUMNAS))
+    assert libros == [("9780000000001", "Rayuela", "Julio Cortázar", 1963, "Novela", 2)]
+    assert numeros == [10]
+    assert errores == []
@@ -0,0 +1,97 @@
+"""
+Pruebas de la importación paralela y reanudable del menú (importar_menu_paralelo).
+"""
+
+import os
+
+import pytest
+
+import importador_menu
+from importador_menu import importar_menu_paralelo
+from sistema_restaurante import SistemaRestaurante
+
+
+def _archivo_menu(tmp_path, cantidad=40):
+    ruta = tmp_path / "menu.txt"
+    lineas = [f"SKU{i:04d}|Plato {i}|Categoría {i % 3}|{2.5 + i}|{int(i % 5 != 0)}" for i in range(cantidad)]
+    lineas.insert(10, "SKU0001|Duplicado|General|3.0|1")
+    lineas.insert(20, "línea sin formato")
+    lineas.insert(30, "SKU9999|Precio malo|General|abc|1")
+    ruta.write_text("\n".join(lineas) + "\n", encoding='utf-8')
+    return str(ruta)
+
+
+def _errores(ruta):
+    with open(ruta + '.errores', encoding='utf-8') as f:
+        return [linea.split('\t')[0] for linea in f]
+
+
+def test_importa_como_importar_menu(tmp_path):
+    ruta = _archivo_menu(tmp_path)
+    serial = SistemaRestaurante()
+    esperado = serial.importar_menu(ruta)
+    for procesos in (1, 2):
+        sistema = SistemaRestaurante()
+        resultado = importar_menu_paralelo(sistema, ruta, procesos=procesos, tamanio_trozo=200)
+        assert resultado['exitosos'] == esperado['exitosos'] == 40
+        assert resultado['lineas'] == 43
+        assert resultado['errores'] == len(esperado['errores']) == 3
+        assert _errores(ruta) == [str(linea) for linea, _ in esperado['errores']]
+        assert sistema.menu == serial.menu
+        assert not resultado['reanudado']
+        assert not os.path.exists(ruta + '.checkpoint')
+        os.remove(ruta + '.errores')
+
+
+class Interrupcion(Exception):
+    pass
+
+
+def _interrumpir_en(monkeypatch, llamada):
+    """Hace fallar la llamada número `llamada` a _guardar_checkpoint."""
+    original = importador_menu._guardar_checkpoint
+    llamadas = []
+
+    def guardar(ruta_checkpoint, checkpoint):
+        llamadas.append(ruta_checkpoint)
+        if len(llamadas) == llamada:
+            raise Interrupcion()
+        original(ruta_checkpoint, checkpoint)
+
+    monkeypatch.setattr(importador_menu, '_guardar_checkpoint', guardar)
+
+
+@pytest.mark.parametrize("llamada", [3, 4])
+def test_reanuda_despues_de_una_interrupcion(tmp_path, monkeypatch, llamada):
+    # llamada 3: antes de aplicar el segundo trozo (intención no guardada)
+    # llamada 4: con el segundo trozo ya aplicado al menú y sin su checkpoint
+    ruta = _archivo_menu(tmp_path)
+    esperado = SistemaRestaurante().importar_menu(ruta)
+    sistema = SistemaRestaurante()
+    _interrumpir_en(monkeypatch, llamada)
+    with pytest.raises(Interrupcion):
+        importar_menu_paralelo(sistema, ruta, procesos=1, tamanio_trozo=200)
+    assert os.path.exists(ruta + '.checkpoint')
+    monkeypatch.undo()
+
+    resultado = importar_menu_paralelo(sistema, ruta, procesos=1, tamanio_trozo=200)
+    assert resultado['reanudado']
+    assert resultado['exitosos'] == 40
+    assert resultado['errores'] == 3
+    assert _errores(ruta) == [str(linea) for linea, _ in esperado['errores']]
+    assert len(sistema.menu) == 40
+    assert [p['codigo'] for p in sistema.buscar_por_nombre("plato 1", n=3)] == ["SKU0001", "SKU0011", "SKU0012"]
+    assert len(sistema.platos_mas_vendidos(100)) == 40
+
+
+def test_archivo_modificado_empieza_de_cero(tmp_path, monkeypatch):
+    ruta = _archivo_menu(tmp_path)
+    _interrumpir_en(monkeypatch, 3)
+    with pytest.raises(Interrupcion):
+        importar_menu_paralelo(SistemaRestaurante(), ruta, procesos=1, tamanio_trozo=200)
+    monkeypatch.undo()
+    with open(ruta, 'a', encoding='utf-8') as f:
+        f.write("SKU5000|Nuevo|General|1.0|1\n")
+    resultado = importar_menu_paralelo(SistemaRestaurante(), ruta, procesos=1, tamanio_trozo=200)
+    assert not resultado['reanudado']
+    assert resultado['exitosos'] == 41
@@ -0,0 +1,109 @@
+"""
+Pruebas del formato binario versionado del menú (menu_binario).
+"""
+
+import pytest
+
+from menu_binario import exportar_menu_binario, importar_menu_binario, leer_bloques, leer_cabecera
+from sistema_restaurante import SistemaRestaurante
+
+
+def _menu(cantidad=10):
+    sistema = SistemaRestaurante()
+    for i in range(cantidad):
+        sistema.agregar_plato(f"P{i:03d}", f"Plato ñandú {i}", f"Categoría {i % 3}", 1.5 + i)
+    return sistema
+
+
+def _resumen(sistema):
+    return {codigo: (p['nombre'], p['categoria'], p['precio'], p['disponible']) for codigo, p in sistema.menu.items()}
+
+
+def test_menu_completo_ida_y_vuelta(tmp_path):
+    ruta = str(tmp_path / "menu.bin")
+    origen = _menu(10)
+    origen.cambiar_disponibilidad("P004", False)
+    exportado = exportar_menu_binario(origen, ruta, registros_por_bloque=3)
+    assert exportado == {'tipo': 'completo', 'registros': 10, 'version': origen.version_menu}
+
+    destino = SistemaRestaurante()
+    resultado = importar_menu_binario(destino, ruta)
+    assert (resultado['nuevos'], resultado['actualizados'], resultado['iguales']) == (10, 0, 0)
+    assert _resumen(destino) == _resumen(origen)
+    # la sincronización es idempotente
+    assert importar_menu_binario(destino, ruta)['iguales'] == 10
+    assert [p['codigo'] for p in destino.buscar_platos(precio_max=3.0)] == ["P000", "P001"]
+
+
+def test_delta_solo_lleva_los_cambios(tmp_path):
+    origen = _menu(10)
+    destino = SistemaRestaurante()
+    completo = exportar_menu_binario(origen, str(tmp_path / "completo.bin"))
+    importar_menu_binario(destino, str(tmp_path / "completo.bin"))
+
+    origen.sincronizar_plato("P002", "Plato nuevo nombre", "Categoría 2", 9.0)
+    origen.agregar_plato("P100", "Postre", "Postres", 3.0)
+    delta = exportar_menu_binario(origen, str(tmp_path / "delta.bin"), desde_version=completo['version'])
+    assert delta['tipo'] == 'delta' and delta['registros'] == 2
+
+    with open(tmp_path / "delta.bin", 'rb') as f:
+        cabecera = leer_cabecera(f)
+        filas = [fila for bloque in leer_bloques(f) for fila in bloque]
+    assert (cabecera['version_desde'], cabecera['version_hasta']) == (completo['version'], delta['version'])
+    assert [fila[0] for fila in filas] == ["P002", "P100"]
+
+    resultado = importar_menu_binario(destino, str(tmp_path / "delta.bin"))
+    assert (resultado['nuevos'], resultado['actualizados']) == (1, 1)
+    assert _resumen(destino) == _resumen(origen)
+
+
+def test_bloque_corrupto_o_truncado_falla(tmp_path):
+    ruta = tmp_path / "menu.bin"
+    exportar_menu_binario(_menu(10), str(ruta), registros_por_bloque=4)
+    datos = bytearray(ruta.read_bytes())
+
+    corrupto = tmp_path / "corrupto.bin"
+    datos[-20] ^= 0xFF
+    corrupto.write_bytes(bytes(datos))
+    with pytest.raises(ValueError, match="corrupto"):
+        importar_menu_binario(SistemaRestaurante(), str(corrupto))
+
+    truncado = tmp_path / "truncado.bin"
+    truncado.write_bytes(ruta.read_bytes()[:-30])
+    with pytest.raises(ValueError, match="truncado"):
+        importar_menu_binario(SistemaRestaurante(), str(truncado))
+
+    ajeno = tmp_path / "ajeno.bin"
+    ajeno.write_bytes(b"no es un menu" * 10)
+    with pytest.raises(ValueError):
+        importar_menu_binario(SistemaRestaurante(), str(ajeno))
+
+
+def test_exportacion_fallida_conserva_el_archivo_anterior(tmp_path):
+    ruta = tmp_path / "menu.bin"
+    sistema = _menu(5)
+    exportar_menu_binario(sistema, str(ruta))
+    anterior = ruta.read_bytes()
+
+    sistema.agregar_plato("P999", "Plato", "C" * 70000, 1.0)
+    with pytest.raises(ValueError, match="demasiado largo"):
+        exportar_menu_binario(sistema, str(ruta))
+    assert ruta.read_bytes() == anterior
+    assert [p.name for p in tmp_path.iterdir()] == ["menu.bin"]
+
+
+def test_carga_en_bloque_equivale_a_la_de_texto(tmp_path):
+    origen = _menu(12)
+    exportar_menu_binario(origen, str(tmp_path / "menu.bin"), registros_por_bloque=5)
+    origen.exportar_menu(str(tmp_path / "menu.txt"))
+
+    binario, texto = SistemaRestaurante(), SistemaRestaurante()
+    importar_menu_binario(binario, str(tmp_path / "menu.bin"))
+    texto.importar_menu(str(tmp_path / "menu.txt"))
+    assert _resumen(binario) == _resumen(texto)
+    assert binario._ranking == texto._ranking
+    assert binario.versiones_plato == texto.versiones_plato
+    assert binario.buscar_platos(categoria="Categoría 1") == texto.buscar_platos(categoria="Categoría 1")
+
+    # con el menú ya cargado se sincroniza plato a plato
+    assert importar_menu_binario(binario, str(tmp_path / "menu.bin"))['iguales'] == 12
@@ -0,0 +1,110 @@
+"""
+Pruebas de la red de sucursales (RedBibliotecas).
+"""
+
+import pytest
+
+from red_bibliotecas import RedBibliotecas
+from sistema_biblioteca import LibroNoDisponible, LibroNoEncontrado, UsuarioNoRegistrado
+
+ISBN = "9780000000001"
+
+
+@pytest.fixture
+def red():
+    red = RedBibliotecas(num_sucursales=3)
+    red.agregar_libro(ISBN, "Rayuela", "Julio Cortázar", 1963, "Novela", 2, sucursal=0)
+    red.agregar_libro(ISBN, "Rayuela", "Julio Cortázar", 1963, "Novela", 1, sucursal=2)
+    red.registrar_usuarios([(f"u{i}", f"Usuario {i}", f"u{i}@example.com") for i in range(8)])
+    yield red
+    red.cerrar()
+
+
+def test_indice_de_disponibilidad(red):
+    assert red.sucursales_con_copias(ISBN) == [(0, 2), (2, 1)]
+    with pytest.raises(LibroNoEncontrado):
+        red.sucursales_con_copias("9789999999999")
+
+
+def test_prestamos_se_reparten_y_se_devuelven(red):
+    resultados = red.prestar_lote([(ISBN, f"u{i}") for i in range(4)] + [(ISBN, "nadie")])
+    prestados = [r for r in resultados[:4] if isinstance(r, str)]
+    assert len(prestados) == 3
+    assert sum(isinstance(r, LibroNoDisponible) for r in resultados[:4]) == 1
+    assert isinstance(resultados[4], UsuarioNoRegistrado)
+    assert red.sucursales_con_copias(ISBN) == []
+
+    red.devolver_libro(prestados[0])
+    assert sum(n for _, n in red.sucursales_con_copias(ISBN)) == 1
+    with pytest.raises(KeyError):
+        red.devolver_libro("sin-sucursal")
+
+
+def test_usuario_se_registra_en_la_sucursal_del_libro(red):
+    assert red.sucursal_de_usuario("u7") == 1
+    id_prestamo = red.prestar_libro(ISBN, "u7")
+    assert id_prestamo.startswith("S0:")
+    estados = red.obtener_estado_usuario("u7")
+    assert sorted(estados) == [0, 1]
+    assert estados[0]['prestamos_activos'] == 1
+
+
+def test_registrar_usuarios_rechaza_repetidos_en_el_mismo_lote(red):
+    with pytest.raises(ValueError, match="Usuario ya registrado."):
+        red.registrar_usuarios([("u9", "Nueve", "u9@example.com"), ("u9", "Otro", "otro@example.com")])
+    assert "u9" not in red._usuarios
+    with pytest.raises(ValueError, match="Usuario ya registrado."):
+        red.registrar_usuario("u1", "Uno", "u1@example.com")
+
+
+def test_sucursal_que_falla_no_deja_reservas_ni_registros_tentativos(red):
+    principito = "9780000000002"
+    red.agregar_libro(principito, "El Principito", "Antoine de Saint-Exupéry", 1943, "Infantil", 1, sucursal=0)
+    sucursal = red._sucursales[0].sucursal
+    original = sucursal.prestar_lote
+
+    def falla(*args):
+        raise RuntimeError("sucursal caída")
+
+    sucursal.prestar_lote = falla
+    with pytest.raises(RuntimeError):
+        red.prestar_libro(principito, "u7")
+    assert red.sucursales_con_copias(principito) == [(0, 1)]
+    assert (0, "u7") not in red._registrados
+
+    sucursal.prestar_lote = original
+    assert red.prestar_libro(principito, "u7").startswith("S0:")
+    assert (0, "u7") in red._registrados
+    assert red.sucursales_con_copias(principito) == []
+
+
+def test_falla_parcial_conserva_los_prestamos_de_las_otras_sucursales(red):
+    principito = "9780000000002"
+    red.agregar_libro(principito, "El Principito", "Antoine de Saint-Exupéry", 1943, "Infantil", 1, sucursal=0)
+    sucursal = red._sucursales[0].sucursal
+
+    def falla(*args):
+        raise RuntimeError("sucursal caída")
+
+    sucursal.prestar_lote = falla
+    # u0 tiene origen en la sucursal 2, que sí tiene copias de ISBN
+    resultados = red.prestar_lote([(principito, "u7"), (ISBN, "u0")])
+    assert isinstance(resultados[0], RuntimeError)
+    assert resultados[1].startswith("S2:")
+    assert red.sucursales_con_copias(ISBN) == [(0, 2)]
+    assert red.devolver_libro(resultados[1])['multa'] == 0
+
+
+def test_registro_parcial_queda_registrado_en_la_red(red):
+    sucursal = red._sucursales[0].sucursal
+
+    def falla(*args):
+        raise RuntimeError("sucursal caída")
+
+    sucursal.registrar_usuarios = falla
+    nuevos = [(f"n{i}", f"Nuevo {i}", f"n{i}@example.com") for i in range(6)]
+    origen = {id_usuario: red.sucursal_de_usuario(id_usuario) for id_usuario, _, _ in nuevos}
+    with pytest.raises(RuntimeError) as error:
+        red.registrar_usuarios(nuevos)
+    assert set(error.value.fallidas) == {0}
+    assert {u for u in red._usuarios if u.startswith("n")} == {u for u, k in origen.items() if k != 0}
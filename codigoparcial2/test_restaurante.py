@@ -0,0 +1,256 @@
+"""
+Pruebas de SistemaRestaurante.
+"""
+
+from datetime import date, datetime
+
+import pytest
+
+from sistema_restaurante import (CapacidadExcedida, MesaNoDisponible, PedidoInvalido, PlatoNoEncontrado,
+                                 SinMesasDisponibles, SistemaRestaurante)
+
+INICIO = datetime(2025, 3, 3, 12, 0)    # lunes
+
+
+def _vender(sistema, items, mesa=1):
+    """Crea un pedido en `mesa`, agrega {codigo: cantidad} y lo paga."""
+    id_pedido = sistema.crear_pedido(mesa)
+    for codigo, cantidad in items.items():
+        sistema.agregar_item(id_pedido, codigo, cantidad)
+    return sistema.pagar_pedido(id_pedido)
+
+
+# ---------------------------
+# REPORTES POR DÍA Y RANGO
+# ---------------------------
+
+def test_reporte_ventas_dia_usa_los_totales_del_dia(reloj, restaurante):
+    sistema = restaurante()
+    _vender(sistema, {"P001": 2, "P004": 1})
+    _vender(sistema, {"P002": 1})
+    reloj.avanzar(days=1)
+    _vender(sistema, {"P003": 3})
+
+    lunes = sistema.reporte_ventas_dia(date(2025, 3, 3))
+    assert lunes['total_ventas'] == round((20 + 2 + 4) * 1.10, 2)
+    assert lunes['total_impuesto'] == 2.6
+    assert lunes['total_items_vendidos'] == 4
+    assert lunes['detalle_por_categoria'] == {'Principal': 2, 'Bebida': 1, 'Acompañamiento': 1}
+    # por defecto, el día del reloj
+    assert sistema.reporte_ventas_dia()['detalle_por_categoria'] == {'Entrante': 3}
+    assert sistema.reporte_ventas_dia(date(2025, 3, 10))['total_ventas'] == 0
+
+
+def test_reporte_rango_y_semana(reloj, restaurante):
+    sistema = restaurante()
+    for _ in range(7):
+        _vender(sistema, {"P001": 1})
+        reloj.avanzar(days=1)
+
+    semana = sistema.reporte_ventas_semana(date(2025, 3, 5))
+    assert (semana['desde'], semana['hasta']) == ("2025-03-03", "2025-03-09")
+    assert semana['pedidos'] == 7
+    assert semana['total_ventas'] == 77.0
+    rango = sistema.reporte_ventas_rango(date(2025, 3, 4), date(2025, 3, 5))
+    assert rango['pedidos'] == 2 and rango['total_items_vendidos'] == 2
+    with pytest.raises(ValueError):
+        sistema.reporte_ventas_rango(date(2025, 3, 5), date(2025, 3, 4))
+    # los buckets no dependen de la lista de ventas
+    sistema.ventas.clear()
+    assert sistema.reporte_ventas_semana(date(2025, 3, 5))['pedidos'] == 7
+
+
+# ---------------------------
+# RANKING DE MÁS VENDIDOS
+# ---------------------------
+
+def test_platos_mas_vendidos_historico(restaurante):
+    sistema = restaurante()
+    assert sistema.platos_mas_vendidos(2) == [("P001", "Hamburguesa", 0), ("P002", "Papas Fritas", 0)]
+    _vender(sistema, {"P003": 2, "P004": 5})
+    _vender(sistema, {"P003": 4})
+    assert sistema.platos_mas_vendidos(3) == [
+        ("P003", "Ensalada", 6), ("P004", "Refresco", 5), ("P001", "Hamburguesa", 0)]
+    # un plato nuevo entra al final del ranking
+    sistema.agregar_plato("P005", "Flan", "Postre", 3.0)
+    assert sistema.platos_mas_vendidos(10)[-1] == ("P005", "Flan", 0)
+
+
+def test_platos_mas_vendidos_por_ventana(reloj, restaurante):
+    sistema = restaurante()
+    _vender(sistema, {"P001": 5})
+    reloj.avanzar(minutes=90)
+    _vender(sistema, {"P002": 2})
+
+    assert sistema.platos_mas_vendidos(5, ventana='hora') == [("P002", "Papas Fritas", 2)]
+    assert sistema.platos_mas_vendidos(5, ventana='dia') == [
+        ("P001", "Hamburguesa", 5), ("P002", "Papas Fritas", 2)]
+    reloj.avanzar(hours=23)
+    assert sistema.platos_mas_vendidos(5, ventana='dia') == [("P002", "Papas Fritas", 2)]
+    reloj.avanzar(hours=2)
+    assert sistema.platos_mas_vendidos(5, ventana='dia') == []
+    assert sistema.platos_mas_vendidos(1) == [("P001", "Hamburguesa", 5)]
+    with pytest.raises(ValueError):
+        sistema.platos_mas_vendidos(5, ventana='semana')
+
+
+# ---------------------------
+# PRECIOS FIJADOS EN EL PEDIDO
+# ---------------------------
+
+def test_calcular_total_usa_el_precio_al_momento_de_pedir(restaurante):
+    sistema = restaurante()
+    id_pedido = sistema.crear_pedido(1)
+    sistema.agregar_item(id_pedido, "P001", 2)
+    sistema.sincronizar_plato("P001", "Hamburguesa", "Principal", 99.0)
+    sistema.agregar_item(id_pedido, "P001", 1)
+    sistema.agregar_item(id_pedido, "P004", 1)
+    assert sistema.pedidos[id_pedido]['lineas']["P001"] == {'precio': 10.0, 'categoria': 'Principal'}
+    assert sistema.calcular_total(id_pedido) == {'subtotal': 32.0, 'impuesto': 3.2, 'propina': 0.0, 'total': 35.2}
+    assert sistema.calcular_total(id_pedido, propina_porcentaje=0.5)['propina'] == 16.0
+
+
+def test_ventas_por_categoria_no_cambia_con_el_menu(restaurante):
+    sistema = restaurante()
+    _vender(sistema, {"P001": 1, "P002": 2})
+    sistema.sincronizar_plato("P001", "Hamburguesa", "Especial", 50.0)
+    _vender(sistema, {"P001": 1})
+    assert sistema.ventas_por_categoria() == {'Principal': 10.0, 'Acompañamiento': 8.0, 'Especial': 50.0}
+    assert sistema.reporte_ventas_dia(INICIO.date())['detalle_por_categoria'] == {
+        'Principal': 1, 'Acompañamiento': 2, 'Especial': 1}
+
+
+def test_agregar_item_valida(restaurante):
+    sistema = restaurante()
+    id_pedido = sistema.crear_pedido(1)
+    with pytest.raises(PlatoNoEncontrado):
+        sistema.agregar_item(id_pedido, "P999")
+    with pytest.raises(ValueError):
+        sistema.agregar_item(id_pedido, "P001", 0)
+    sistema.cambiar_disponibilidad("P002", False)
+    with pytest.raises(ValueError):
+        sistema.agregar_item(id_pedido, "P002")
+    sistema.pagar_pedido(id_pedido)
+    with pytest.raises(PedidoInvalido):
+        sistema.agregar_item(id_pedido, "P001")
+    with pytest.raises(PedidoInvalido):
+        sistema.pagar_pedido(id_pedido)
+    with pytest.raises(PedidoInvalido):
+        sistema.calcular_total("P99999")
+
+
+# ---------------------------
+# MESAS LIBRES Y ASIGNACIÓN
+# ---------------------------
+
+def _salon(restaurante):
+    """Mesas 1-10 de 4 más la 11 (2 personas) y la 12 (8 personas)."""
+    sistema = restaurante()
+    sistema.configurar_mesa(11, 2)
+    sistema.configurar_mesa(12, 8)
+    return sistema
+
+
+def test_asignar_mesa_elige_la_mas_chica_que_alcanza(restaurante):
+    sistema = _salon(restaurante)
+    assert sistema.asignar_mesa(2)[0] == 11
+    assert sistema.asignar_mesa(2)[0] == 1
+    assert sistema.asignar_mesa(5)[0] == 12
+    with pytest.raises(SinMesasDisponibles):
+        sistema.asignar_mesa(6)
+    with pytest.raises(ValueError):
+        sistema.asignar_mesa(0)
+
+
+def test_indice_de_mesas_libres_sigue_reservas_y_pagos(restaurante):
+    sistema = _salon(restaurante)
+    assert sistema.mesas_disponibles(5) == [12]
+    id_pedido = sistema.reservar_mesa(12, 6)
+    assert sistema.mesas_disponibles(5) == []
+    with pytest.raises(MesaNoDisponible):
+        sistema.reservar_mesa(12, 2)
+    with pytest.raises(CapacidadExcedida):
+        sistema.reservar_mesa(11, 3)
+    sistema.agregar_item(id_pedido, "P001")
+    sistema.pagar_pedido(id_pedido)
+    assert sistema.mesas_disponibles(5) == [12]
+
+    sistema.reservar_mesa(3, 2)
+    assert 3 not in sistema.mesas_disponibles()
+    sistema.liberar_mesa(3)
+    assert sistema.mesas_disponibles(3) == list(range(1, 11)) + [12]
+    with pytest.raises(ValueError):
+        sistema.liberar_mesa(3)
+
+
+def test_configurar_mesa_libre_la_reubica_en_el_indice(restaurante):
+    sistema = _salon(restaurante)
+    sistema.configurar_mesa(1, 6)
+    assert sistema.mesas_disponibles(5) == [1, 12]
+    assert sistema.asignar_mesa(5)[0] == 1
+    # una mesa ocupada cambia de capacidad al liberarse
+    sistema.configurar_mesa(1, 2)
+    sistema.liberar_mesa(1)
+    assert sistema.mesas_disponibles(5) == [12]
+    assert sistema.mesas_disponibles(1)[:2] == [1, 11]
+
+
+# ---------------------------
+# ÍNDICE DE BÚSQUEDA DEL MENÚ
+# ---------------------------
+
+def _codigos(platos):
+    return [p['codigo'] for p in platos]
+
+
+def _esperados(sistema, categoria=None, precio_max=None):
+    """buscar_platos recalculado recorriendo todo el menú."""
+    platos = [(p['precio'], codigo) for codigo, p in sistema.menu.items()
+              if p['disponible'] and (categoria is None or p['categoria'].lower() == categoria.lower())
+              and (precio_max is None or p['precio'] <= precio_max)]
+    return [codigo for _, codigo in sorted(platos, key=lambda par: (par[0], sistema._orden_plato[par[1]]))]
+
+
+def test_buscar_platos_por_categoria_precio_y_nombre(restaurante):
+    sistema = restaurante()
+    assert _codigos(sistema.buscar_platos()) == ["P004", "P002", "P003", "P001"]
+    assert _codigos(sistema.buscar_platos(precio_max=4)) == ["P004", "P002"]
+    assert _codigos(sistema.buscar_platos(categoria="principal")) == ["P001"]
+    assert sistema.buscar_platos(categoria="Postres") == []
+    with pytest.raises(ValueError):
+        sistema.buscar_platos(precio_max="caro")
+    sistema.cambiar_disponibilidad("P002", False)
+    assert _codigos(sistema.buscar_platos(precio_max=4)) == ["P004"]
+    assert _codigos(sistema.buscar_por_nombre("HAM")) == ["P001"]
+    assert sistema.buscar_platos()[0]['nombre'] == "Refresco"
+
+
+def test_sincronizar_codigo_repetido_en_un_lote():
+    sistema = SistemaRestaurante()
+    conteo = sistema.sincronizar_platos([("B", "b", "X", 3.0, 1), ("B", "b", "X", 7.0, 1)])
+    assert conteo == {'nuevos': 1, 'actualizados': 1, 'iguales': 0}
+    assert _codigos(sistema.buscar_platos()) == ["B"]
+    assert sistema.buscar_platos()[0]['precio'] == 7.0
+    assert _codigos(sistema.buscar_por_nombre("b")) == ["B"]
+
+
+def test_sincronizar_repetido_no_borra_otro_plato_del_indice():
+    sistema = SistemaRestaurante()
+    sistema.agregar_plato("A", "a", "X", 5.0)
+    sistema.agregar_plato("B", "b", "X", 4.0)
+    sistema.agregar_plato("C", "c", "X", 9.0)
+    sistema.sincronizar_platos([("B", "b", "X", 6.0, 1), ("B", "b", "X", 8.0, 1), ("B", "bb", "X", 10.0, 0)])
+    assert _codigos(sistema.buscar_platos()) == _esperados(sistema) == ["A", "C"]
+    sistema.sincronizar_platos([("B", "b", "X", 6.0, 1), ("B", "b", "X", 6.5, 1)])
+    assert _codigos(sistema.buscar_platos(categoria="x")) == _esperados(sistema, "x") == ["A", "B", "C"]
+    assert _codigos(sistema.buscar_por_nombre("")) == ["A", "B", "C"]
+
+
+def test_sincronizar_fila_invalida_deja_el_indice_consistente(restaurante):
+    sistema = restaurante()
+    with pytest.raises(ValueError):
+        sistema.sincronizar_platos([("P001", "Hamburguesa", "Principal", 1.0, 1),
+                                    ("P001", "Hamburguesa", "Principal", 3.0, 1),
+                                    ("P005", "", "Postre", 2.0, 1)])
+    assert _codigos(sistema.buscar_platos()) == _esperados(sistema)
+    assert _codigos(sistema.buscar_platos(precio_max=3)) == ["P004", "P001"]
@@ -0,0 +1,166 @@
+"""
+Pruebas de la fachada asyncio y del servidor JSON-lines de la biblioteca.
+"""
+
+import asyncio
+from datetime import datetime
+import json
+import os
+import tempfile
+
+from servidor_biblioteca import AsyncSistemaBiblioteca, servir
+from sistema_biblioteca import LibroNoDisponible, SistemaBiblioteca
+
+INICIO = datetime(2025, 3, 3, 10, 0)
+ISBN = "9780000000001"
+
+
+def _sistema(copias=2, usuarios=3):
+    sistema = SistemaBiblioteca(reloj=lambda: INICIO)
+    sistema.agregar_libro(ISBN, "Rayuela", "Julio Cortázar", 1963, "Novela", copias)
+    for i in range(usuarios):
+        sistema.registrar_usuario(f"u{i}", f"Usuario {i}", f"u{i}@example.com")
+    return sistema
+
+
+def test_busquedas_identicas_comparten_un_calculo():
+    sistema = _sistema()
+    llamadas = []
+    original = sistema.buscar_libros
+    sistema.buscar_libros = lambda *args: llamadas.append(args) or original(*args)
+
+    async def escenario():
+        fachada = AsyncSistemaBiblioteca(sistema)
+        return await asyncio.gather(*(fachada.buscar_libros('titulo', 'rayuela') for _ in range(20)))
+
+    resultados = asyncio.run(escenario())
+    assert len(llamadas) == 1
+    assert all(r == [{'isbn': ISBN, **sistema.catalogo[ISBN]}] for r in resultados)
+
+
+def test_prestamos_de_una_vuelta_se_aplican_en_un_lote():
+    sistema = _sistema(copias=2)
+    lotes = []
+    original = sistema.prestar_lote
+    sistema.prestar_lote = lambda operaciones: lotes.append(operaciones) or original(operaciones)
+
+    async def escenario():
+        fachada = AsyncSistemaBiblioteca(sistema)
+        return await asyncio.gather(*(fachada.prestar_libro(ISBN, f"u{i}") for i in range(3)),
+                                    return_exceptions=True)
+
+    resultados = asyncio.run(escenario())
+    assert len(lotes) == 1
+    assert resultados[:2] == ["P0001", "P0002"]
+    assert isinstance(resultados[2], LibroNoDisponible)
+
+
+def test_esperar_reserva_se_resuelve_con_la_devolucion():
+    sistema = _sistema(copias=1)
+
+    async def escenario():
+        fachada = AsyncSistemaBiblioteca(sistema)
+        id_prestamo = await fachada.prestar_libro(ISBN, "u0")
+        id_reserva = await fachada.reservar_libro(ISBN, "u1")
+        espera = asyncio.ensure_future(fachada.esperar_reserva(id_reserva, timeout=5))
+        await asyncio.sleep(0)
+        assert not espera.done()
+        await fachada.devolver_libro(id_prestamo)
+        return await espera
+
+    assert asyncio.run(escenario()) == 'asignada'
+
+
+def test_esperar_reserva_con_timeout_retorna_en_espera():
+    sistema = _sistema(copias=1)
+
+    async def escenario():
+        fachada = AsyncSistemaBiblioteca(sistema)
+        await fachada.prestar_libro(ISBN, "u0")
+        id_reserva = await fachada.reservar_libro(ISBN, "u1")
+        return await fachada.esperar_reserva(id_reserva, timeout=0.05)
+
+    assert asyncio.run(escenario()) == 'en_espera'
+
+
+def test_servidor_json_lines():
+    sistema = _sistema(copias=1)
+    ruta = os.path.join(tempfile.mkdtemp(), "b.sock")
+
+    async def escenario():
+        servidor = await servir(sistema, ruta)
+        reader, writer = await asyncio.open_unix_connection(ruta)
+        peticiones = [
+            {'id': 1, 'op': 'prestar_libro', 'args': {'isbn': ISBN, 'id_usuario': 'u0'}},
+            {'id': 2, 'op': 'prestar_libro', 'args': {'isbn': ISBN, 'id_usuario': 'u1'}},
+            {'id': 3, 'op': 'eliminar_todo', 'args': {}},
+        ]
+        for peticion in peticiones:
+            writer.write((json.dumps(peticion) + "\n").encode('utf-8'))
+        await writer.drain()
+        respuestas = [json.loads(await reader.readline()) for _ in peticiones]
+        writer.close()
+        servidor.close()
+        await servidor.wait_closed()
+        return {r['id']: r for r in respuestas}
+
+    respuestas = asyncio.run(escenario())
+    assert respuestas[1] == {'id': 1, 'ok': True, 'resultado': "P0001"}
+    assert respuestas[2]['error'] == 'LibroNoDisponible'
+    assert respuestas[3]['error'] == 'ValueError'
+
+
+def test_prestar_libro_async_completa_la_reserva_asignada():
+    sistema = _sistema(copias=1)
+
+    async def escenario():
+        fachada = AsyncSistemaBiblioteca(sistema)
+        id_prestamo = await fachada.prestar_libro(ISBN, "u0")
+        id_reserva = await fachada.reservar_libro(ISBN, "u1")
+        await fachada.devolver_libro(id_prestamo)
+        return id_reserva, await fachada.prestar_libro(ISBN, "u1")
+
+    id_reserva, id_prestamo = asyncio.run(escenario())
+    assert id_prestamo == "P0002"
+    assert sistema.reservas[id_reserva]['estado'] == 'completada'
+    assert sistema.catalogo[ISBN]['copias_disponibles'] == 0
+
+
+def test_busquedas_compartidas_entregan_copias_independientes():
+    sistema = _sistema()
+
+    async def escenario():
+        fachada = AsyncSistemaBiblioteca(sistema)
+        return await asyncio.gather(*(fachada.buscar_libros('titulo', 'rayuela') for _ in range(2)))
+
+    primero, segundo = asyncio.run(escenario())
+    primero[0]['titulo'] = "Otro"
+    primero.clear()
+    assert [l['titulo'] for l in segundo] == ["Rayuela"]
+
+
+def test_fachada_con_loop_cerrado_no_rompe_al_sistema():
+    sistema = _sistema(copias=1)
+    id_prestamo = sistema.prestar_libro(ISBN, "u0")
+    id_reserva = sistema.reservar_libro(ISBN, "u1")
+    fachada = AsyncSistemaBiblioteca(sistema)
+    asyncio.run(fachada.esperar_reserva(id_reserva, timeout=0.01))
+    # el loop ya se cerró: la devolución asigna la reserva sin errores
+    sistema.devolver_libro(id_prestamo)
+    assert sistema.reservas[id_reserva]['estado'] == 'asignada'
+    assert sistema._suscriptores == []
+
+
+def test_cerrar_desuscribe_la_fachada():
+    sistema = _sistema(copias=1)
+    sistema.prestar_libro(ISBN, "u0")
+    id_reserva = sistema.reservar_libro(ISBN, "u1")
+
+    async def escenario():
+        fachada = AsyncSistemaBiblioteca(sistema)
+        await fachada.esperar_reserva(id_reserva, timeout=0.01)
+        assert len(sistema._suscriptores) == 1
+        fachada.cerrar()
+
+    asyncio.run(escenario())
+    assert sistema._suscriptores == []
@@ -0,0 +1,55 @@
+"""
+Pruebas del simulador de eventos discretos de la biblioteca.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from simulador_biblioteca import RelojSimulado, SimuladorBiblioteca
+
+
+def _simulador(**opciones):
+    return SimuladorBiblioteca(num_usuarios=200, num_libros=50, copias=1, semilla=7, **opciones)
+
+
+def test_reloj_simulado_solo_avanza():
+    reloj = RelojSimulado(datetime(2025, 1, 1))
+    reloj.avanzar(timedelta(days=2))
+    reloj.avanzar_a(datetime(2025, 1, 5))
+    assert reloj() == datetime(2025, 1, 5)
+    with pytest.raises(ValueError):
+        reloj.avanzar_a(datetime(2025, 1, 4))
+
+
+def test_misma_semilla_mismo_resultado():
+    primero = _simulador().ejecutar(60)
+    segundo = _simulador().ejecutar(60)
+    for campo in ('eventos', 'operaciones', 'prestamos', 'devoluciones', 'renovaciones',
+                  'rechazos', 'contencion_pico', 'libros_mas_disputados', 'multas'):
+        assert primero[campo] == segundo[campo]
+
+
+def test_reporte_consistente_con_el_sistema():
+    simulador = _simulador()
+    reporte = simulador.ejecutar(90)
+    sistema = simulador.sistema
+    assert simulador.reloj() == simulador.inicio + timedelta(days=90)
+    assert reporte['prestamos'] == len(sistema.prestamos)
+    activos = sum(len(u['prestamos_activos']) for u in sistema.usuarios.values())
+    assert reporte['prestamos'] - reporte['devoluciones'] == activos
+    # con una copia por libro y 200 usuarios hay rechazos por falta de copias
+    assert reporte['rechazos']['sin_copias'] > 0
+    assert reporte['libros_mas_disputados']
+    multas = reporte['multas']
+    assert multas['cantidad'] == sum(multas['histograma'].values())
+    assert multas['p50'] <= multas['p90'] <= multas['maxima']
+
+
+def test_ejecutar_continua_desde_donde_quedo():
+    simulador = _simulador()
+    simulador.ejecutar(30)
+    reporte = simulador.ejecutar(30)
+    assert simulador.reloj() == simulador.inicio + timedelta(days=60)
+    assert reporte['dias_simulados'] == 30
+    assert reporte['prestamos'] == len(simulador.sistema.prestamos) - _simulador().ejecutar(30)['prestamos']
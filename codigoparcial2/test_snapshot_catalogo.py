@@ -0,0 +1,91 @@
+"""
+Pruebas de la instantánea binaria del catálogo (exportar_snapshot / CatalogoMapeado).
+"""
+
+import pytest
+
+from sistema_biblioteca import SistemaBiblioteca
+from snapshot_catalogo import CatalogoMapeado, exportar_snapshot
+
+LIBROS = [
+    ("9780000000003", "Rayuela", "Julio Cortázar", 1963, "Novela", 2),
+    ("9780000000001", "Cien años de soledad", "Gabriel García Márquez", 1967, "Novela", 3),
+    ("9780000000002", "Bestiario", "Julio Cortázar", 1951, "Cuento", 1),
+    ("9780000000004", "Ficciones", "Jorge Luis Borges", 1944, "Cuento", 1),
+    ("9780000000005", "Yo", "Ana Li", 2001, "Poesía", 1),
+]
+
+
+@pytest.fixture
+def sistema():
+    sistema = SistemaBiblioteca()
+    for libro in LIBROS:
+        sistema.agregar_libro(*libro)
+    sistema.catalogo["9780000000003"]['copias_disponibles'] = 1
+    sistema.catalogo["9780000000003"]['prestamos'] = 7
+    return sistema
+
+
+@pytest.fixture
+def mapeado(sistema, tmp_path):
+    ruta = str(tmp_path / "catalogo.snap")
+    assert exportar_snapshot(sistema.catalogo, ruta) == len(LIBROS)
+    catalogo = CatalogoMapeado(ruta)
+    yield catalogo
+    catalogo.cerrar()
+
+
+def test_acceso_por_isbn_igual_al_catalogo(sistema, mapeado):
+    assert len(mapeado) == len(sistema.catalogo)
+    assert sorted(mapeado) == sorted(sistema.catalogo)
+    for isbn, info in sistema.catalogo.items():
+        assert mapeado[isbn] == info
+    assert "9789999999999" not in mapeado
+    assert 9780000000001 not in mapeado
+    with pytest.raises(KeyError):
+        mapeado["123"]
+
+
+@pytest.mark.parametrize("criterio, valor, categoria", [
+    ('titulo', 'soledad', None),
+    ('titulo', 'AÑOS', None),
+    ('autor', 'cortazar', None),
+    ('autor', 'cortazar', 'Cuento'),
+    ('autor', 'li', None),
+    ('titulo', 'yo', None),
+    ('titulo', 'zzzz', None),
+    ('titulo', '', 'Novela'),
+    ('titulo', '', None),
+    ('titulo', '', 'Inexistente'),
+])
+def test_busquedas_iguales_a_las_del_sistema(sistema, mapeado, criterio, valor, categoria):
+    assert mapeado.buscar_libros(criterio, valor, categoria) == sistema.buscar_libros(criterio, valor, categoria)
+
+
+def test_archivo_invalido_se_rechaza(tmp_path):
+    ruta = tmp_path / "otro.snap"
+    ruta.write_bytes(b'\0' * 256)
+    with pytest.raises(ValueError):
+        CatalogoMapeado(str(ruta))
+
+
+def test_categoria_none_se_exporta_y_se_lee(sistema, tmp_path):
+    sistema.agregar_libro("9780000000006", "Sin clasificar", "Autor Anónimo", 2000, None, 1)
+    ruta = str(tmp_path / "catalogo.snap")
+    exportar_snapshot(sistema.catalogo, ruta)
+    mapeado = CatalogoMapeado(ruta)
+    try:
+        assert mapeado["9780000000006"]['categoria'] is None
+        assert mapeado.buscar_libros('titulo', 'clasificar') == sistema.buscar_libros('titulo', 'clasificar')
+        assert mapeado.buscar_libros('titulo', '', 'Novela') == sistema.buscar_libros('titulo', '', 'Novela')
+    finally:
+        mapeado.cerrar()
+
+
+def test_cerrar_con_resultados_vivos(sistema, tmp_path):
+    ruta = str(tmp_path / "catalogo.snap")
+    exportar_snapshot(sistema.catalogo, ruta)
+    mapeado = CatalogoMapeado(ruta)
+    filas = mapeado._filas_de('categoria', 'Novela')
+    mapeado.cerrar()
+    assert list(filas) == [0, 2]